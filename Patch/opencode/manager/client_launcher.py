@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 """
 SR客户端启动器
-一键启动客户端并在客户端关闭时自动清理补丁文件
+一键启动客户端并在客户端关闭时自动清理补丁文件，可校验客户端文件完整性
 
 Version: 1.1.0
 License: GNU V3 LICENSE
@@ -10,12 +10,42 @@ License: GNU V3 LICENSE
 
 import os
 import sys
+import json
 import time
 import shutil
+import argparse
+import threading
 import subprocess
 import psutil
 import ctypes
+import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 客户端文件预读配置
+PREWARM_CONFIG = {
+    "enabled": True,
+    "budget_mb": 2048,                      # 单次预读的数据量上限
+    "workers": 4,                           # 预读线程数
+    "chunk_kb": 1024,                       # 无 posix_fadvise 时每次读取的块大小
+    "profile_file": "prewarm_profile.json", # 记录客户端实际访问文件的列表，与启动器同目录
+    "learn_seconds": 300,                   # 客户端启动后记录文件访问的时长（秒）
+    "learn_interval": 2.0                   # 记录文件访问的轮询间隔（秒）
+}
+
+# 客户端完整性校验配置
+INTEGRITY_CONFIG = {
+    "workers": 0,                              # 哈希进程数，0表示与CPU核数相同
+    "batch_mb": 64,                            # 小文件合并为一个任务，减少进程间通信
+    "cache_file": "integrity_cache.json",      # 按大小与修改时间缓存的文件哈希，与启动器同目录
+    "baseline_file": "integrity_baseline.json", # 客户端目录没有 pkg_version 时作为参照的清单
+    "check_on_launch": False                   # 启动前校验（只重新计算有变化的文件）
+}
+
+# 每次映射的窗口大小，须为 mmap.ALLOCATIONGRANULARITY 的整数倍；限制32位进程的地址空间占用
+_MMAP_WINDOW = 256 * 1024 * 1024
 
 def is_admin():
     """检查是否以管理员权限运行"""
@@ -87,10 +117,454 @@ def run_as_admin():
             input("按回车键退出...")
             sys.exit(1)
 
+class ClientPrewarmer:
+    """
+    客户端文件预读
+    在文件检查与启动期间用线程池将客户端资源读入系统页缓存：
+    支持 posix_fadvise 的平台交给内核异步预读，其余平台（Windows）以低IO优先级顺序读取。
+    有上次记录的访问列表时只预读客户端实际打开过的文件，否则按最近使用时间与文件大小挑选
+    """
+    
+    def __init__(self, client_dir: Path, profile_path: Path, budget_mb: int = 2048,
+                 workers: int = 4, chunk_kb: int = 1024):
+        self.client_dir = client_dir
+        self.profile_path = profile_path
+        self.budget = budget_mb * 1024 * 1024
+        self.workers = workers
+        self.chunk_size = chunk_kb * 1024
+        self.source = ""
+        self.planned_bytes = 0
+        self.warmed_bytes = 0
+        self.warmed_files = 0
+        self.started = 0.0
+        self.finished = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # 清除时暂停预读（如启动前的完整性校验期间），避免与校验争抢磁盘
+        self._resume = threading.Event()
+        self._resume.set()
+        self._thread: Optional[threading.Thread] = None
+    
+    def load_profile(self) -> List[str]:
+        """读取上次记录的访问列表（相对于客户端目录的路径，按首次访问顺序）"""
+        try:
+            with open(self.profile_path, "r", encoding="utf-8") as f:
+                return list(json.load(f).get("files", []))
+        except (OSError, ValueError):
+            return []
+    
+    def select_files(self) -> List[Tuple[Path, int]]:
+        """按预算挑选要预读的文件"""
+        candidates = []
+        learned = self.load_profile()
+        if learned:
+            self.source = "访问记录"
+            for relative in learned:
+                path = self.client_dir / relative
+                try:
+                    candidates.append((path, path.stat().st_size))
+                except OSError:
+                    continue
+        else:
+            self.source = "最近使用"
+            ranked = []
+            for root, _, names in os.walk(self.client_dir):
+                self._resume.wait()
+                if self._stop.is_set():
+                    return []
+                for name in names:
+                    path = Path(root) / name
+                    try:
+                        st = path.stat()
+                    except OSError:
+                        continue
+                    ranked.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+            ranked.sort(key=lambda item: (item[0], item[1]), reverse=True)
+            candidates = [(path, size) for _, size, path in ranked]
+        
+        selected = []
+        remaining = self.budget
+        for path, size in candidates:
+            if 0 < size <= remaining:
+                selected.append((path, size))
+                remaining -= size
+        return selected
+    
+    def start(self):
+        """在后台开始预读，立即返回"""
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        self._resume.set()
+    
+    def pause(self):
+        """暂停预读，正在读取的文件在当前块结束后等待"""
+        self._resume.clear()
+    
+    def resume(self):
+        self._resume.set()
+    
+    def _run(self):
+        files = self.select_files()
+        self.planned_bytes = sum(size for _, size in files)
+        with ThreadPoolExecutor(max_workers=self.workers, initializer=_enter_background_io) as pool:
+            for path, size in files:
+                pool.submit(self._warm, path, size)
+        self.finished = time.time()
+    
+    def _warm(self, path: Path, size: int):
+        self._resume.wait()
+        if self._stop.is_set():
+            return
+        done = 0
+        try:
+            if hasattr(os, "posix_fadvise"):
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+                done = size
+            else:
+                buffer = bytearray(self.chunk_size)
+                with open(path, "rb", buffering=0) as f:
+                    while not self._stop.is_set():
+                        self._resume.wait()
+                        n = f.readinto(buffer)
+                        if not n:
+                            break
+                        done += n
+        except OSError:
+            pass
+        with self._lock:
+            self.warmed_bytes += done
+            self.warmed_files += 1
+    
+    def summary(self) -> str:
+        elapsed = (self.finished or time.time()) - self.started
+        state = "完成" if self.finished else "进行中"
+        return (f"预读{state}（{self.source}）: {self.warmed_files} 个文件，"
+                f"{self.warmed_bytes / 1024 / 1024:.0f}/{self.planned_bytes / 1024 / 1024:.0f} MB，"
+                f"耗时 {elapsed:.1f}s")
+
+def _enter_background_io():
+    """Windows 下将预读线程切换到后台模式，降低其IO与CPU优先级，避免与客户端自身读取竞争"""
+    if sys.platform == "win32":
+        THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+
+class ClientAccessRecorder:
+    """在客户端运行初期轮询其打开的文件，记录客户端目录下实际访问的文件及首次访问顺序"""
+    
+    def __init__(self, client_dir: Path, pid: int, duration: float = 300, interval: float = 2.0):
+        self.client_dir = client_dir.resolve()
+        self.pid = pid
+        self.duration = duration
+        self.interval = interval
+        self.files: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+    
+    def _processes(self) -> List[psutil.Process]:
+        """客户端进程树，以及由 cyrene.exe 拉起的 StarRail.exe"""
+        processes = []
+        try:
+            root = psutil.Process(self.pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            pass
+        pids = {proc.pid for proc in processes}
+        for proc in psutil.process_iter(["name"]):
+            if proc.info["name"] == "StarRail.exe" and proc.pid not in pids:
+                processes.append(proc)
+        return processes
+    
+    def _run(self):
+        deadline = time.time() + self.duration
+        while time.time() < deadline:
+            for proc in self._processes():
+                try:
+                    open_files = proc.open_files()
+                except psutil.Error:
+                    continue
+                for item in open_files:
+                    try:
+                        relative = Path(item.path).resolve().relative_to(self.client_dir)
+                    except (ValueError, OSError):
+                        continue
+                    self.files.setdefault(relative.as_posix(), len(self.files))
+            if self._stop.wait(self.interval):
+                break
+    
+    def save(self, profile_path: Path) -> bool:
+        """保存访问列表；本次未记录到任何文件时保留原有列表"""
+        if not self.files:
+            return False
+        ordered = sorted(self.files, key=self.files.get)
+        tmp_path = profile_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated": time.time(), "files": ordered}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, profile_path)
+        return True
+
+def hash_file(path: str) -> Optional[str]:
+    """以内存映射分段读取文件并计算 md5（与 pkg_version 一致），无法读取时返回 None"""
+    digest = hashlib.md5()
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            offset = 0
+            while offset < size:
+                length = min(_MMAP_WINDOW, size - offset)
+                with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=offset) as view:
+                    digest.update(view)
+                offset += length
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+def _hash_batch(paths: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """进程池任务：计算一批文件的哈希"""
+    return [(path, hash_file(path)) for path in paths]
+
+def _path_key(relative: str) -> str:
+    """清单中的路径键，Windows 下不区分大小写"""
+    return relative.lower() if os.name == "nt" else relative
+
+class ClientIntegrityChecker:
+    """
+    客户端完整性校验
+    以客户端目录中的 pkg_version 清单（每行一个 JSON：remoteName、md5、fileSize）为参照，
+    没有时使用 --verify-baseline 记录的清单。文件哈希按 (大小, 修改时间) 缓存，
+    只有发生变化的文件才重新计算；需要计算的文件按大小分批交给进程池并行处理
+    """
+    
+    def __init__(self, client_dir: Path, cache_path: Path, baseline_path: Path,
+                 workers: int = 0, batch_mb: int = 64, exclude: Optional[List[str]] = None):
+        self.client_dir = client_dir
+        self.cache_path = cache_path
+        self.baseline_path = baseline_path
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_bytes = batch_mb * 1024 * 1024
+        self.exclude = {_path_key(name) for name in (exclude or [])}
+        self.hashed_files = 0
+        self.hashed_bytes = 0
+    
+    def scan(self) -> Dict[str, Tuple[str, int, int]]:
+        """
+        遍历客户端目录，返回 {路径键: (相对路径, 大小, 修改时间ns)}
+        使用 os.scandir，Windows 下大小与时间直接来自目录列表，无需逐个打开文件
+        """
+        files = {}
+        stack = [(self.client_dir, "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                relative = prefix + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, relative + "/"))
+                    elif entry.is_file():
+                        st = entry.stat()
+                        key = _path_key(relative)
+                        if key not in self.exclude:
+                            files[key] = (relative, st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+        return files
+    
+    def load_reference(self) -> Tuple[str, Dict[str, Tuple[str, int, str]]]:
+        """读取参照清单，返回 (来源, {路径键: (清单中的路径, 大小, md5)})"""
+        reference = {}
+        sources = sorted(self.client_dir.glob("*pkg_version"))
+        for path in sources:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            item = json.loads(line)
+                            name = item["remoteName"]
+                            reference[_path_key(name)] = (name, int(item["fileSize"]), item["md5"].lower())
+                        except (ValueError, KeyError, TypeError):
+                            continue
+            except OSError:
+                continue
+        if reference:
+            return ", ".join(path.name for path in sources), reference
+        try:
+            with open(self.baseline_path, "r", encoding="utf-8") as f:
+                files = json.load(f).get("files", {})
+            return self.baseline_path.name, {_path_key(name): (name, int(size), md5)
+                                             for name, (size, md5) in files.items()}
+        except (OSError, ValueError, TypeError):
+            return "", {}
+    
+    def load_cache(self) -> Dict[str, Tuple[int, int, str]]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return {key: tuple(value) for key, value in json.load(f).get("files", {}).items()}
+        except (OSError, ValueError, TypeError):
+            return {}
+    
+    def save_cache(self, cache: Dict[str, Tuple[int, int, str]]):
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated": time.time(), "files": cache}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+    
+    def hash_files(self, files: Dict[str, Tuple[str, int, int]], keys: List[str],
+                   use_cache: bool = True) -> Dict[str, Optional[str]]:
+        """计算指定文件的哈希，命中缓存的直接使用缓存值；返回 {路径键: md5}"""
+        cache = self.load_cache() if use_cache else {}
+        digests: Dict[str, Optional[str]] = {}
+        pending = []
+        for key in keys:
+            _, size, mtime_ns = files[key]
+            cached = cache.get(key)
+            if cached and cached[0] == size and cached[1] == mtime_ns:
+                digests[key] = cached[2]
+            else:
+                pending.append(key)
+        
+        if pending:
+            # 大文件单独成任务并最先提交，小文件按数据量合批，使各进程负载均衡
+            pending.sort(key=lambda key: files[key][1], reverse=True)
+            batches: List[List[str]] = []
+            current: List[str] = []
+            current_bytes = 0
+            for key in pending:
+                current.append(key)
+                current_bytes += files[key][1]
+                if current_bytes >= self.batch_bytes or len(current) >= 1024:
+                    batches.append(current)
+                    current, current_bytes = [], 0
+            if current:
+                batches.append(current)
+            total_bytes = sum(files[key][1] for key in pending)
+            print(f"计算 {len(pending)} 个文件的哈希（{total_bytes / 1024 / 1024:.0f} MB，{self.workers} 个进程）...")
+            by_path = {str(self.client_dir / files[key][0]): key for key in pending}
+            started = time.time()
+            last_report = started
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(_hash_batch, [str(self.client_dir / files[key][0]) for key in batch])
+                           for batch in batches]
+                for future in as_completed(futures):
+                    for path, digest in future.result():
+                        key = by_path[path]
+                        digests[key] = digest
+                        self.hashed_files += 1
+                        self.hashed_bytes += files[key][1]
+                    now = time.time()
+                    if now - last_report >= 2:
+                        last_report = now
+                        speed = self.hashed_bytes / max(now - started, 1e-9) / 1024 / 1024
+                        print(f"  {self.hashed_bytes * 100 // max(total_bytes, 1)}%  {speed:.0f} MB/s")
+        
+        if pending:
+            # 合并回缓存，保留本次未涉及的文件，去掉已不存在的文件
+            if not use_cache:
+                cache = self.load_cache()
+            cache = {key: value for key, value in cache.items() if key in files}
+            for key in pending:
+                if digests.get(key):
+                    _, size, mtime_ns = files[key]
+                    cache[key] = (size, mtime_ns, digests[key])
+            try:
+                self.save_cache(cache)
+            except OSError as e:
+                print(f"保存哈希缓存失败: {e}")
+        return digests
+    
+    def verify(self, use_cache: bool = True) -> Dict:
+        """按参照清单校验，返回缺失、大小不符、内容不符与无法读取的文件列表"""
+        started = time.time()
+        source, reference = self.load_reference()
+        files = self.scan()
+        result = {"source": source, "checked": 0, "missing": [], "size_mismatch": [],
+                  "hash_mismatch": [], "unreadable": []}
+        if not reference:
+            result["elapsed"] = time.time() - started
+            return result
+        to_hash = []
+        for key, (name, size, _) in reference.items():
+            if key in self.exclude:
+                continue
+            entry = files.get(key)
+            if entry is None:
+                result["missing"].append(name)
+            elif entry[1] != size:
+                result["size_mismatch"].append(f"{entry[0]}（应为 {size} 字节，实际 {entry[1]} 字节）")
+            else:
+                to_hash.append(key)
+        digests = self.hash_files(files, to_hash, use_cache)
+        for key in to_hash:
+            digest = digests.get(key)
+            if digest is None:
+                result["unreadable"].append(files[key][0])
+            elif digest != reference[key][2]:
+                result["hash_mismatch"].append(files[key][0])
+        result["checked"] = len(reference)
+        result["elapsed"] = time.time() - started
+        return result
+    
+    def save_baseline(self, use_cache: bool = True) -> int:
+        """将当前客户端目录记录为参照清单，返回文件数"""
+        files = self.scan()
+        digests = self.hash_files(files, list(files), use_cache)
+        baseline = {files[key][0]: (files[key][1], digest) for key, digest in digests.items() if digest}
+        tmp_path = self.baseline_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated": time.time(), "files": baseline}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.baseline_path)
+        return len(baseline)
+
+def print_integrity_report(result: Dict, limit: int = 20) -> bool:
+    """打印校验结果，全部通过时返回 True"""
+    if not result["source"]:
+        print("没有可用的参照清单：客户端目录中没有 pkg_version，也没有记录过基准清单（--verify-baseline）")
+        return False
+    problems = [("missing", "缺失"), ("size_mismatch", "大小不符"),
+                ("hash_mismatch", "内容不符"), ("unreadable", "无法读取")]
+    failed = sum(len(result[key]) for key, _ in problems)
+    print(f"完整性校验（参照 {result['source']}）: {result['checked']} 个文件，"
+          f"{failed} 个异常，耗时 {result['elapsed']:.1f}s")
+    for key, title in problems:
+        items = result[key]
+        if items:
+            print(f"{title} {len(items)} 个:")
+            for item in sorted(items)[:limit]:
+                print(f"  - {item}")
+            if len(items) > limit:
+                print(f"  ... 另有 {len(items) - limit} 个")
+    return failed == 0
+
 class ClientLauncher:
     """客户端启动器"""
     
-    def __init__(self):
+    def __init__(self, prewarm: Optional[Dict] = None, integrity: Optional[Dict] = None):
+        self.prewarm_config = dict(PREWARM_CONFIG, **(prewarm or {}))
+        self.integrity_config = dict(INTEGRITY_CONFIG, **(integrity or {}))
+        self.prewarmer: Optional[ClientPrewarmer] = None
+        
         # 获取当前脚本所在目录
         if getattr(sys, 'frozen', False):
             # 打包后的可执行文件 (d:\Games\SR\Patch\manager\client_launcher.exe)
@@ -117,6 +591,85 @@ class ClientLauncher:
         print(f"客户端目录: {self.client_dir}")
         print(f"补丁文件目录: {self.releases_dir}")
     
+    def get_prewarm_profile_path(self) -> Path:
+        """访问记录文件路径"""
+        return self.script_dir / self.prewarm_config["profile_file"]
+    
+    def start_prewarm(self):
+        """启动器打开后立即在后台开始预读客户端文件"""
+        if not self.prewarm_config.get("enabled") or not self.client_dir.exists():
+            return
+        self.prewarmer = ClientPrewarmer(
+            self.client_dir,
+            self.get_prewarm_profile_path(),
+            budget_mb=int(self.prewarm_config["budget_mb"]),
+            workers=int(self.prewarm_config["workers"]),
+            chunk_kb=int(self.prewarm_config["chunk_kb"])
+        ).start()
+        print(f"后台预读客户端文件（上限 {self.prewarm_config['budget_mb']} MB）...")
+    
+    def stop_prewarm(self):
+        if self.prewarmer:
+            self.prewarmer.stop()
+            print(self.prewarmer.summary())
+            self.prewarmer = None
+    
+    def start_access_recorder(self, process) -> Optional[ClientAccessRecorder]:
+        """记录客户端实际访问的文件，供下次启动时预读"""
+        if not self.prewarm_config.get("enabled"):
+            return None
+        return ClientAccessRecorder(
+            self.client_dir,
+            process.pid,
+            duration=float(self.prewarm_config["learn_seconds"]),
+            interval=float(self.prewarm_config["learn_interval"])
+        ).start()
+    
+    def save_access_profile(self, recorder: Optional[ClientAccessRecorder]):
+        if recorder is None:
+            return
+        recorder.stop()
+        try:
+            if recorder.save(self.get_prewarm_profile_path()):
+                print(f"✓ 已记录客户端访问的 {len(recorder.files)} 个文件，下次启动时优先预读")
+        except OSError as e:
+            print(f"保存访问记录失败: {e}")
+    
+    def create_integrity_checker(self) -> ClientIntegrityChecker:
+        return ClientIntegrityChecker(
+            self.client_dir,
+            self.script_dir / self.integrity_config["cache_file"],
+            self.script_dir / self.integrity_config["baseline_file"],
+            workers=int(self.integrity_config["workers"]),
+            batch_mb=int(self.integrity_config["batch_mb"]),
+            # 补丁文件只在客户端运行期间存在，不参与校验
+            exclude=self.patch_files
+        )
+    
+    def verify_integrity(self, use_cache: bool = True) -> bool:
+        """校验客户端文件完整性并打印结果"""
+        if not self.client_dir.exists():
+            print(f"错误: 客户端目录不存在: {self.client_dir}")
+            return False
+        # 校验需要完整读取客户端文件，期间暂停后台预读
+        if self.prewarmer:
+            self.prewarmer.pause()
+        try:
+            return print_integrity_report(self.create_integrity_checker().verify(use_cache))
+        finally:
+            if self.prewarmer:
+                self.prewarmer.resume()
+    
+    def save_integrity_baseline(self, use_cache: bool = True) -> bool:
+        """将当前客户端目录记录为校验基准"""
+        if not self.client_dir.exists():
+            print(f"错误: 客户端目录不存在: {self.client_dir}")
+            return False
+        checker = self.create_integrity_checker()
+        count = checker.save_baseline(use_cache)
+        print(f"✓ 已将 {count} 个文件记录为校验基准: {checker.baseline_path}")
+        return True
+    
     def check_files(self):
         """检查必要文件是否存在"""
         print("检查文件...")
@@ -145,6 +698,10 @@ class ClientLauncher:
                 print(f"  - {file}")
             return False
         
+        if self.integrity_config.get("check_on_launch") and not self.verify_integrity():
+            print("错误: 客户端文件不完整，请修复或重新下载客户端")
+            return False
+        
         print("✓ 所有必要文件检查通过")
         return True
     
@@ -241,6 +798,15 @@ class ClientLauncher:
         print("SR客户端启动器")
         print("=" * 50)
         
+        # 预读与文件检查、补丁复制并行进行
+        self.start_prewarm()
+        try:
+            return self.launch_and_wait()
+        finally:
+            self.stop_prewarm()
+    
+    def launch_and_wait(self):
+        """检查文件、复制补丁、启动客户端并等待其退出"""
         # 检查文件
         if not self.check_files():
             print("启动失败，请检查文件完整性")
@@ -264,9 +830,13 @@ class ClientLauncher:
         
         print("客户端启动成功！")
         print("注意: 请不要手动删除补丁文件，启动器会在客户端退出时自动清理")
+        if self.prewarmer:
+            print(self.prewarmer.summary())
+        recorder = self.start_access_recorder(process)
         
         # 等待客户端退出
         self.wait_for_client_exit(process)
+        self.save_access_profile(recorder)
         
         # 清理补丁文件
         self.cleanup_patch_files()
@@ -278,6 +848,38 @@ class ClientLauncher:
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='SR客户端启动器')
+    parser.add_argument('--no-prewarm', action='store_true',
+                       help='不预读客户端文件')
+    parser.add_argument('--prewarm-budget', type=int, default=None, metavar='MB',
+                       help='预读的数据量上限（MB）')
+    parser.add_argument('--verify', action='store_true',
+                       help='只校验客户端文件完整性（对照 pkg_version 或已记录的基准），不启动客户端')
+    parser.add_argument('--verify-baseline', action='store_true',
+                       help='将当前客户端目录记录为校验基准（客户端没有 pkg_version 时使用）')
+    parser.add_argument('--verify-on-launch', action='store_true',
+                       help='启动客户端前先校验文件完整性，有异常时不启动')
+    parser.add_argument('--verify-full', action='store_true',
+                       help='忽略哈希缓存，重新计算所有文件')
+    parser.add_argument('--verify-workers', type=int, default=None, metavar='N',
+                       help='计算哈希的进程数')
+    args = parser.parse_args()
+    prewarm = {"enabled": not args.no_prewarm}
+    if args.prewarm_budget is not None:
+        prewarm["budget_mb"] = args.prewarm_budget
+    integrity = {"check_on_launch": args.verify_on_launch or INTEGRITY_CONFIG["check_on_launch"]}
+    if args.verify_workers:
+        integrity["workers"] = args.verify_workers
+    
+    if args.verify or args.verify_baseline:
+        # 校验只读取客户端文件，无需管理员权限
+        launcher = ClientLauncher(integrity=integrity)
+        if args.verify_baseline:
+            ok = launcher.save_integrity_baseline(not args.verify_full)
+        else:
+            ok = launcher.verify_integrity(not args.verify_full)
+        sys.exit(0 if ok else 1)
+    
     # 检查并申请管理员权限
     # 如果没有权限，run_as_admin()会申请权限并重新启动程序，当前进程会退出
     # 如果已有权限，run_as_admin()返回True，程序继续执行
@@ -287,7 +889,7 @@ def main():
     print("✓ 已获得管理员权限")
     
     try:
-        launcher = ClientLauncher()
+        launcher = ClientLauncher(prewarm, integrity)
         success = launcher.run()
         
         if not success:
@@ -316,4 +918,7 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # 打包为可执行文件后，哈希进程池的子进程需要由此进入
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
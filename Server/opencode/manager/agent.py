@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服远程管理代理
+在每台节点上以代理模式运行管理器，通过带认证的多路复用TCP连接暴露进程管理接口；
+协调端以批量、流水线方式向各节点下发命令
+
+协议：每帧为4字节大端长度 + UTF-8 JSON
+- 连接建立后服务端发送 {"challenge": 随机数}
+- 客户端回复 {"auth": HMAC-SHA256(token, challenge)}
+- 之后客户端可连续发送 {"id": n, "op": 操作, "args": {...}}，
+  服务端并发处理并以 {"id": n, "ok": bool, "result"/"error": ...} 乱序返回
+
+License: GNU V3 LICENSE
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import secrets
+import struct
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+DEFAULT_AGENT_PORT = 23400
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+# 认证完成前只接受很小的帧，未认证的连接无法让代理分配大块内存
+AUTH_FRAME_SIZE = 1024
+
+_LENGTH = struct.Struct(">I")
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    """编码一帧消息"""
+    payload = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _LENGTH.pack(len(payload)) + payload
+
+async def read_frame(reader: asyncio.StreamReader, max_size: int = MAX_FRAME_SIZE) -> Dict[str, Any]:
+    """读取一帧消息，超过 max_size 的帧视为协议错误"""
+    header = await reader.readexactly(_LENGTH.size)
+    (length,) = _LENGTH.unpack(header)
+    if length > max_size:
+        raise ValueError(f"帧过大: {length}")
+    return json.loads(await reader.readexactly(length))
+
+def sign_challenge(token: str, challenge: str) -> str:
+    """计算认证摘要"""
+    return hmac.new(token.encode("utf-8"), challenge.encode("ascii"), hashlib.sha256).hexdigest()
+
+def read_token_file(path: str) -> str:
+    """从文件读取认证令牌（去除首尾空白），令牌不出现在命令行中，也就不会被 ps 看到"""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+def parse_address(address: str, default_port: int = DEFAULT_AGENT_PORT) -> Tuple[str, int]:
+    """解析 host:port 形式的地址"""
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+    return host, int(port)
+
+class SupervisorAPI:
+    """将 ProcessManager 的方法映射为远程可调用的操作"""
+
+    def __init__(self, process_manager):
+        self.process_manager = process_manager
+
+    def _service_names(self, services: Optional[List[str]] = None) -> List[str]:
+        names = list(self.process_manager.service_status.keys())
+        if services:
+            return [name for name in services if name in self.process_manager.service_status]
+        return names
+
+    def op_ping(self) -> Dict[str, Any]:
+        return {"time": time.time()}
+
+    def op_list(self) -> List[str]:
+        return self._service_names()
+
+    def op_status(self, services: Optional[List[str]] = None) -> Dict[str, Any]:
+        result = {}
+        for name in self._service_names(services):
+            process = self.process_manager.service_processes.get(name)
+            result[name] = {
+                "status": self.process_manager.get_service_status(name).value,
+                "running": bool(self.process_manager.is_service_running(name)),
+                "pid": process.pid if process else None
+            }
+        return result
+
+    def op_start(self, service: str) -> bool:
+        return bool(self.process_manager.start_service(service))
+
+    def op_stop(self, service: str) -> bool:
+        return bool(self.process_manager.stop_service(service))
+
+    def op_restart(self, service: str) -> bool:
+        return bool(self.process_manager.restart_service(service, "remote"))
+
+    def op_preflight(self, service: str) -> List[Dict[str, Any]]:
+        return self.process_manager.run_preflight(service)
+
+    def op_profile(self, action: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if action == "cprofile-toggle":
+            # 远程调用在线程池中执行，cProfile 只能分析调用线程，因此仅在GUI中提供
+            raise ValueError("cProfile 只能在GUI中通过 F9 开启，远程请使用 cpu-start/cpu-stop")
+        return self.process_manager.get_profiler().control(action, **(options or {}))
+
+    def call(self, op: str, args: Dict[str, Any]) -> Any:
+        handler = getattr(self, f"op_{op}", None)
+        if handler is None:
+            raise ValueError(f"未知操作: {op}")
+        return handler(**args)
+
+class SupervisorAgent:
+    """远程管理代理服务端"""
+
+    def __init__(self, process_manager, token: str, host: str = "127.0.0.1", port: int = DEFAULT_AGENT_PORT):
+        if not token:
+            raise ValueError("代理模式必须设置认证令牌")
+        self.api = SupervisorAPI(process_manager)
+        self.token = token
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server:
+            self._server.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        try:
+            challenge = secrets.token_hex(16)
+            writer.write(encode_frame({"challenge": challenge}))
+            await writer.drain()
+            reply = await asyncio.wait_for(read_frame(reader, AUTH_FRAME_SIZE), timeout=5)
+            auth = reply.get("auth", "") if isinstance(reply, dict) else ""
+            if not hmac.compare_digest(str(auth), sign_challenge(self.token, challenge)):
+                writer.write(encode_frame({"ok": False, "error": "认证失败"}))
+                await writer.drain()
+                print(f"[agent] 拒绝未认证连接: {peer}")
+                return
+            writer.write(encode_frame({"ok": True}))
+
+            write_lock = asyncio.Lock()
+            tasks = set()
+            while True:
+                request = await read_frame(reader)
+                if not isinstance(request, dict):
+                    async with write_lock:
+                        writer.write(encode_frame({"id": None, "ok": False, "error": "请求必须是JSON对象"}))
+                        await writer.drain()
+                    continue
+                task = asyncio.ensure_future(self._dispatch(request, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+            pass
+        except ValueError as e:
+            print(f"[agent] 协议错误 {peer}: {e}")
+        finally:
+            writer.close()
+
+    def _run_batch(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按顺序执行一批操作，保证同一服务的 stop/start 不会乱序"""
+        results = []
+        for call in calls:
+            try:
+                results.append({"ok": True, "result": self.api.call(call.get("op", ""), call.get("args") or {})})
+            except Exception as e:
+                results.append({"ok": False, "error": str(e)})
+        return results
+
+    async def _dispatch(self, request: Dict[str, Any], writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        """在线程池中执行可能阻塞的管理操作，完成后立即回写结果"""
+        loop = asyncio.get_running_loop()
+        try:
+            op = request.get("op", "")
+            args = request.get("args") or {}
+            if not isinstance(args, dict):
+                raise ValueError("args 必须是JSON对象")
+            if op == "batch":
+                result = await loop.run_in_executor(None, self._run_batch, args.get("calls", []))
+            else:
+                result = await loop.run_in_executor(None, self.api.call, op, args)
+            response = {"id": request.get("id"), "ok": True, "result": result}
+        except Exception as e:
+            response = {"id": request.get("id"), "ok": False, "error": str(e)}
+        async with write_lock:
+            writer.write(encode_frame(response))
+            await writer.drain()
+
+class AgentConnection:
+    """到单个代理的多路复用连接"""
+
+    def __init__(self, host: str, port: int, token: str):
+        self.host = host
+        self.port = port
+        self.token = token
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._reader_task: Optional[asyncio.Task] = None
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def open(self, timeout: float = 5.0):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout)
+        hello = await asyncio.wait_for(read_frame(self._reader, AUTH_FRAME_SIZE), timeout)
+        self._writer.write(encode_frame({"auth": sign_challenge(self.token, hello["challenge"])}))
+        await self._writer.drain()
+        reply = await asyncio.wait_for(read_frame(self._reader, AUTH_FRAME_SIZE), timeout)
+        if not reply.get("ok"):
+            self._writer.close()
+            raise PermissionError(f"{self.address}: {reply.get('error', '认证失败')}")
+        self._reader_task = asyncio.ensure_future(self._read_responses())
+        return self
+
+    async def _read_responses(self):
+        try:
+            while True:
+                response = await read_frame(self._reader)
+                future = self._pending.pop(response.get("id"), None)
+                if future and not future.done():
+                    future.set_result(response)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"{self.address}: 连接已断开 ({e})"))
+            self._pending.clear()
+
+    def send(self, op: str, **args) -> asyncio.Future:
+        """发送请求但不等待，返回响应Future；多次调用的请求会在同一连接上流水线发送"""
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self._writer.write(encode_frame({"id": self._next_id, "op": op, "args": args}))
+        return future
+
+    async def call(self, op: str, timeout: float = 30.0, **args) -> Any:
+        """发送请求并等待结果"""
+        future = self.send(op, **args)
+        await self._writer.drain()
+        response = await asyncio.wait_for(future, timeout)
+        if not response.get("ok"):
+            raise RuntimeError(f"{self.address}: {response.get('error')}")
+        return response["result"]
+
+    async def batch(self, calls: List[Tuple[str, Dict[str, Any]]], timeout: float = 60.0) -> List[Dict[str, Any]]:
+        """将多个操作合并为一次请求，一个往返完成"""
+        return await self.call("batch", timeout=timeout,
+                               calls=[{"op": op, "args": args} for op, args in calls])
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+
+class AgentCoordinator:
+    """协调多个节点上的代理"""
+
+    def __init__(self, nodes: List[str], token: str):
+        self.nodes = [parse_address(node) for node in nodes]
+        self.token = token
+        self.connections: Dict[str, AgentConnection] = {}
+
+    async def connect(self) -> Dict[str, str]:
+        """并发连接所有节点，返回连接失败的节点及原因"""
+        async def open_one(host, port):
+            connection = AgentConnection(host, port, self.token)
+            await connection.open()
+            return connection
+
+        results = await asyncio.gather(*[open_one(host, port) for host, port in self.nodes],
+                                       return_exceptions=True)
+        errors = {}
+        for (host, port), result in zip(self.nodes, results):
+            if isinstance(result, Exception):
+                errors[f"{host}:{port}"] = str(result) or type(result).__name__
+            else:
+                self.connections[result.address] = result
+        return errors
+
+    async def status_sweep(self) -> Dict[str, Any]:
+        """每个节点一次往返获取全部服务状态，各节点并发进行"""
+        addresses = list(self.connections)
+        results = await asyncio.gather(*[self.connections[a].call("status") for a in addresses],
+                                       return_exceptions=True)
+        return {a: ({"error": str(r)} if isinstance(r, Exception) else r) for a, r in zip(addresses, results)}
+
+    async def broadcast(self, calls: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+        """向所有节点下发同一批操作"""
+        addresses = list(self.connections)
+        results = await asyncio.gather(*[self.connections[a].batch(calls) for a in addresses],
+                                       return_exceptions=True)
+        return {a: ({"error": str(r)} if isinstance(r, Exception) else r) for a, r in zip(addresses, results)}
+
+    async def close(self):
+        for connection in self.connections.values():
+            await connection.close()
+
+def run_remote_command(nodes: List[str], token: str, action: str, services: Optional[List[str]] = None) -> bool:
+    """命令行入口：对所有节点执行 status/start/stop/restart"""
+    async def main():
+        coordinator = AgentCoordinator(nodes, token)
+        errors = await coordinator.connect()
+        for address, error in errors.items():
+            print(f"✗ {address} 连接失败: {error}")
+        try:
+            started = time.perf_counter()
+            if action == "status":
+                sweep = await coordinator.status_sweep()
+                print(f"状态汇总耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+                print("-" * 60)
+                for address, statuses in sweep.items():
+                    if "error" in statuses:
+                        print(f"{address:<22} 错误: {statuses['error']}")
+                        continue
+                    for name, info in statuses.items():
+                        print(f"{address:<22} {name:<25} {info['status']}")
+                print("-" * 60)
+                return not errors
+            names = services
+            if not names:
+                lists = await asyncio.gather(*[c.call("list") for c in coordinator.connections.values()])
+                names = sorted({name for names_on_node in lists for name in names_on_node})
+            results = await coordinator.broadcast([(action, {"service": name}) for name in names])
+            ok = not errors
+            for address, items in results.items():
+                if isinstance(items, dict):
+                    print(f"✗ {address} {items['error']}")
+                    ok = False
+                    continue
+                for name, item in zip(names, items):
+                    success = item.get("ok") and item.get("result")
+                    ok = ok and bool(success)
+                    print(f"{'✓' if success else '✗'} {address} {action} {name} {item.get('error', '')}")
+            return ok
+        finally:
+            await coordinator.close()
+
+    return asyncio.run(main())
+
+def run_profile_command(nodes: List[str], token: str, action: str,
+                        options: Optional[Dict[str, Any]] = None) -> bool:
+    """命令行入口：在各节点的管理器上执行自身分析操作，结果文件写在节点本地"""
+    from selfprofile import print_profile_result
+
+    async def main():
+        coordinator = AgentCoordinator(nodes, token)
+        errors = await coordinator.connect()
+        for address, error in errors.items():
+            print(f"✗ {address} 连接失败: {error}")
+        try:
+            results = await coordinator.broadcast([("profile", {"action": action, "options": options or {}})])
+            ok = not errors
+            for address, items in results.items():
+                if isinstance(items, dict):
+                    print(f"✗ {address} {items['error']}")
+                    ok = False
+                    continue
+                item = items[0]
+                if not item.get("ok"):
+                    print(f"✗ {address} {item.get('error', '')}")
+                    ok = False
+                    continue
+                print(f"[{address}]", end=" ")
+                print_profile_result(item["result"])
+            return ok
+        finally:
+            await coordinator.close()
+
+    return asyncio.run(main())
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服告警规则引擎
+规则在加载时编译为带状态的求值器，每次采样只做增量更新（阈值持续时间、滑动窗口增量、
+多窗口错误预算消耗速率），不回扫历史。告警在触发、持续（冷却期后再次提醒）与恢复时
+发送到可插拔的通知端（webhook、命令、文件），同一告警在冷却期内不重复发送，
+恢复后在冷却期内再次触发（指标来回抖动）时也不再发送新的触发/恢复通知
+
+采样格式：{指标名: {服务名: 值}}，全局指标的服务名为空字符串
+
+License: GNU V3 LICENSE
+"""
+
+import abc
+import collections
+import hashlib
+import json
+import operator
+import os
+import platform
+import re
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+Sample = Dict[str, Dict[str, float]]
+
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+        "==": operator.eq, "!=": operator.ne}
+
+# 多窗口消耗速率的默认组合：(短窗口秒, 长窗口秒, 消耗倍数)，两个窗口同时超过倍数时触发
+DEFAULT_BURN_WINDOWS = ((300, 3600, 14.4), (1800, 21600, 6.0))
+
+class Rule(abc.ABC):
+    """规则基类：evaluate() 对每个匹配的服务返回 (服务名, 是否越限, 当前值)"""
+
+    kind = ""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec["name"]
+        self.service = spec.get("service", "*")
+        self.severity = spec.get("severity", "warning")
+        self.hold = float(spec.get("for", 0))
+        self.summary = spec.get("summary", "")
+        op = spec.get("op", ">")
+        if op not in _OPS:
+            raise ValueError(f"规则 {self.name} 的比较符无效: {op}")
+        self.op_text = op
+        self.op = _OPS[op]
+        self.threshold = float(spec.get("value", 0))
+
+    def _values(self, sample: Sample, metric: str) -> Iterator[Tuple[str, float]]:
+        series = sample.get(metric)
+        if not series:
+            return
+        if self.service == "*":
+            yield from series.items()
+        elif self.service in series:
+            yield self.service, series[self.service]
+
+    def describe(self) -> str:
+        return f"{self.op_text} {self.threshold:g}"
+
+    @abc.abstractmethod
+    def evaluate(self, ts: float, sample: Sample) -> Iterator[Tuple[str, bool, float]]:
+        """用一次采样更新规则状态"""
+
+class ThresholdRule(Rule):
+    """当前值与阈值比较"""
+
+    kind = "threshold"
+
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.metric = spec["metric"]
+
+    def evaluate(self, ts: float, sample: Sample) -> Iterator[Tuple[str, bool, float]]:
+        for service, value in self._values(sample, self.metric):
+            yield service, self.op(value, self.threshold), value
+
+class RateRule(Rule):
+    """
+    窗口内的变化量（aggregate=increase）或每秒变化率（aggregate=rate）与阈值比较
+    每个服务维护一个时间窗口队列，只在两端增删；counter=true 时把数值回落视为计数器重置
+    """
+
+    kind = "rate"
+
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.metric = spec["metric"]
+        self.window = float(spec.get("window", 300))
+        self.per_second = spec.get("aggregate", "increase") == "rate"
+        self.counter = bool(spec.get("counter", False))
+        self._series: Dict[str, Dict[str, Any]] = {}
+
+    def describe(self) -> str:
+        what = "每秒变化" if self.per_second else "增量"
+        return f"{self.window:g}s {what} {self.op_text} {self.threshold:g}"
+
+    def evaluate(self, ts: float, sample: Sample) -> Iterator[Tuple[str, bool, float]]:
+        for service, value in self._values(sample, self.metric):
+            state = self._series.get(service)
+            if state is None:
+                state = self._series[service] = {"last": value, "total": value, "points": collections.deque()}
+            elif self.counter and value < state["last"]:
+                state["total"] += value
+            else:
+                state["total"] += value - state["last"]
+            state["last"] = value
+            points = state["points"]
+            points.append((ts, state["total"]))
+            # 保留一个不晚于窗口起点的点作为基准
+            while len(points) > 1 and points[1][0] <= ts - self.window:
+                points.popleft()
+            base_ts, base = points[0]
+            change = state["total"] - base
+            if self.per_second:
+                change = change / (ts - base_ts) if ts > base_ts else 0.0
+            yield service, self.op(change, self.threshold), change
+
+class BurnRateRule(Rule):
+    """
+    错误预算消耗速率：窗口内 坏事件增量/总事件增量 除以 (1 - objective)
+    任一 (短窗口, 长窗口, 倍数) 组合中两个窗口的消耗速率都超过倍数时触发，当前值为最大的长窗口消耗速率
+    """
+
+    kind = "burn_rate"
+
+    def __init__(self, spec: Dict[str, Any]):
+        super().__init__(spec)
+        self.bad = spec["bad"]
+        self.total = spec["total"]
+        self.objective = float(spec.get("objective", 0.99))
+        if not 0 < self.objective < 1:
+            raise ValueError(f"规则 {self.name} 的 objective 必须在 0 与 1 之间")
+        self.windows = [tuple(w) for w in spec.get("windows", DEFAULT_BURN_WINDOWS)]
+        self.lengths = sorted({float(length) for short, long, _ in self.windows for length in (short, long)})
+        self._series: Dict[str, Dict[float, collections.deque]] = {}
+
+    def describe(self) -> str:
+        return f"SLO {self.objective:.2%} 消耗速率 " + "/".join(f"{factor:g}x" for _, _, factor in self.windows)
+
+    def evaluate(self, ts: float, sample: Sample) -> Iterator[Tuple[str, bool, float]]:
+        totals = sample.get(self.total) or {}
+        for service, bad in self._values(sample, self.bad):
+            total = totals.get(service)
+            if total is None:
+                continue
+            queues = self._series.setdefault(service, {length: collections.deque() for length in self.lengths})
+            burns = {}
+            for length, points in queues.items():
+                points.append((ts, bad, total))
+                while len(points) > 1 and points[1][0] <= ts - length:
+                    points.popleft()
+                _, bad_base, total_base = points[0]
+                requests = total - total_base
+                errors = max(0.0, bad - bad_base)
+                burns[length] = errors / requests / (1 - self.objective) if requests > 0 else 0.0
+            breached = any(burns[float(short)] > factor and burns[float(long)] > factor
+                           for short, long, factor in self.windows)
+            yield service, breached, max(burns[float(long)] for _, long, _ in self.windows)
+
+RULE_TYPES = {cls.kind: cls for cls in (ThresholdRule, RateRule, BurnRateRule)}
+
+def compile_rules(specs: List[Dict[str, Any]]) -> List[Rule]:
+    """编译规则配置，配置错误时抛出 ValueError"""
+    rules = []
+    names = set()
+    for spec in specs:
+        kind = spec.get("type", "threshold")
+        if kind not in RULE_TYPES:
+            raise ValueError(f"未知规则类型: {kind}")
+        try:
+            rule = RULE_TYPES[kind](spec)
+        except KeyError as e:
+            raise ValueError(f"规则 {spec.get('name', '?')} 缺少字段 {e}")
+        if rule.name in names:
+            raise ValueError(f"规则名重复: {rule.name}")
+        names.add(rule.name)
+        rules.append(rule)
+    return rules
+
+# ---- 通知端 ----
+
+class FileSink:
+    """每条通知追加一行 JSON"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.name = f"file:{self.path.name}"
+
+    def send(self, notification: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(notification, ensure_ascii=False) + "\n")
+
+class CommandSink:
+    """执行命令，通知 JSON 写入标准输入，主要字段同时放入 SR_ALERT_* 环境变量"""
+
+    def __init__(self, command: List[str], timeout: float = 10.0):
+        self.command = command
+        self.timeout = timeout
+        self.name = f"command:{Path(command[0]).name}"
+
+    def send(self, notification: Dict[str, Any]):
+        env = dict(os.environ)
+        for key in ("alert", "service", "status", "severity", "value", "summary"):
+            env[f"SR_ALERT_{key.upper()}"] = str(notification.get(key, ""))
+        result = subprocess.run(self.command, input=json.dumps(notification, ensure_ascii=False).encode("utf-8"),
+                                env=env, timeout=self.timeout, capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"退出码 {result.returncode}: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+class WebhookSink:
+    """以 JSON POST 到指定地址，失败时按退避重试"""
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 5.0,
+                 retries: int = 2, backoff: float = 1.0):
+        self.url = url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.name = f"webhook:{url}"
+
+    def send(self, notification: Dict[str, Any]):
+        body = json.dumps(notification, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8", **self.headers}
+        for attempt in range(self.retries + 1):
+            try:
+                request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                return
+            except (urllib.error.URLError, OSError) as e:
+                # 4xx 为请求本身的问题，重试无意义
+                if isinstance(e, urllib.error.HTTPError) and e.code < 500 or attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+def build_sinks(specs: List[Dict[str, Any]], base_dir: Path) -> list:
+    """按配置创建通知端，文件路径相对于 base_dir"""
+    sinks = []
+    for spec in specs:
+        kind = spec.get("type")
+        if kind == "file":
+            path = Path(spec.get("path") or "alerts.log")
+            sinks.append(FileSink(str(path if path.is_absolute() else base_dir / path)))
+        elif kind == "command":
+            sinks.append(CommandSink(list(spec["command"]), float(spec.get("timeout", 10))))
+        elif kind == "webhook":
+            sinks.append(WebhookSink(spec["url"], spec.get("headers"), float(spec.get("timeout", 5)),
+                                     int(spec.get("retries", 2))))
+        else:
+            raise ValueError(f"未知通知端类型: {kind}")
+    return sinks
+
+# ---- 引擎 ----
+
+class AlertEngine:
+    """
+    每次 evaluate() 用一份采样更新所有规则，按告警状态变化生成通知：
+    越限持续 for 秒后触发；触发期间每隔 cooldown 秒提醒一次；条件消失或指标不再出现时恢复。
+    同一告警（指纹相同）距上次触发通知不足 cooldown 时再次触发会被静默，其恢复也不发送，
+    若静默期间持续越限到冷却期结束，则照常发出提醒
+    """
+
+    def __init__(self, rules: List[Rule], sinks: list, cooldown: float = 1800.0):
+        self.rules = rules
+        self.sinks = sinks
+        self.cooldown = cooldown
+        self.host = platform.node()
+        self.sent = 0
+        self.failed = 0
+        self.suppressed = 0
+        self._states: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # (规则名, 服务名) -> 最近一次发出触发通知的时间，恢复后仍保留，用于抑制抖动
+        self._last_fired: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, sample: Sample, ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """求值并发送通知，返回本次生成的通知"""
+        ts = time.time() if ts is None else ts
+        notifications = []
+        with self._lock:
+            for rule in self.rules:
+                seen = set()
+                for service, breached, value in rule.evaluate(ts, sample):
+                    seen.add(service)
+                    key = (rule.name, service)
+                    state = self._states.get(key)
+                    if not breached:
+                        if state is not None:
+                            del self._states[key]
+                            self._resolve(rule, service, state, ts, value, notifications)
+                        continue
+                    if state is None:
+                        state = self._states[key] = {"since": ts, "firing": False, "muted": False, "notified": 0.0}
+                    if not state["firing"] and ts - state["since"] >= rule.hold:
+                        state["firing"] = True
+                        last = self._last_fired.get(key)
+                        if last is not None and ts - last < self.cooldown:
+                            # 冷却期内再次触发，视为上一次告警的抖动
+                            state["muted"] = True
+                            state["notified"] = last
+                            self.suppressed += 1
+                        else:
+                            notifications.append(self._fire(rule, service, state, ts, value))
+                    elif state["firing"] and ts - state["notified"] >= self.cooldown:
+                        state["muted"] = False
+                        notifications.append(self._fire(rule, service, state, ts, value))
+                for key in [key for key in self._states if key[0] == rule.name and key[1] not in seen]:
+                    self._resolve(rule, key[1], self._states.pop(key), ts, None, notifications)
+        for notification in notifications:
+            self.deliver(notification)
+        return notifications
+
+    def _fire(self, rule: Rule, service: str, state: Dict[str, Any], ts: float,
+              value: Optional[float]) -> Dict[str, Any]:
+        self._last_fired[(rule.name, service)] = ts
+        return self._notification(rule, service, state, "firing", ts, value)
+
+    def _resolve(self, rule: Rule, service: str, state: Dict[str, Any], ts: float, value: Optional[float],
+                 notifications: List[Dict[str, Any]]):
+        if not state["firing"]:
+            return
+        if state["muted"]:
+            self.suppressed += 1
+            return
+        notifications.append(self._notification(rule, service, state, "resolved", ts, value))
+
+    def _notification(self, rule: Rule, service: str, state: Dict[str, Any], status: str,
+                      ts: float, value: Optional[float]) -> Dict[str, Any]:
+        state["notified"] = ts
+        identity = f"{self.host}/{rule.name}/{service}"
+        return {
+            "alert": rule.name,
+            "service": service,
+            "status": status,
+            "severity": rule.severity,
+            "value": None if value is None else round(value, 4),
+            "condition": f"{rule.kind} {rule.describe()}",
+            "summary": rule.summary,
+            "started": state["since"],
+            "ts": ts,
+            "host": self.host,
+            "fingerprint": hashlib.sha1(identity.encode("utf-8")).hexdigest()[:12],
+        }
+
+    def deliver(self, notification: Dict[str, Any]) -> int:
+        """发送到所有通知端，单个通知端失败不影响其他通知端；返回成功的数量"""
+        delivered = 0
+        for sink in self.sinks:
+            try:
+                sink.send(notification)
+                delivered += 1
+                self.sent += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"告警发送失败 {sink.name}: {e}")
+        return delivered
+
+    def active(self) -> List[Dict[str, Any]]:
+        """当前处于触发状态的告警"""
+        with self._lock:
+            return [{"alert": name, "service": service, "since": state["since"]}
+                    for (name, service), state in self._states.items() if state["firing"]]
+
+class LogCounters:
+    """按正则统计服务输出的匹配行数，作为计数器指标；可直接注册为 ProcessManager 的输出回调"""
+
+    def __init__(self, specs: Dict[str, Dict[str, str]]):
+        self._specs = [(name, spec.get("service"), re.compile(spec["pattern"])) for name, spec in specs.items()]
+        self.counts: Dict[str, Dict[str, float]] = {name: {} for name in specs}
+
+    def __call__(self, service_name: str, stream_name: str, line: str):
+        for name, service, pattern in self._specs:
+            if (service is None or service == service_name) and pattern.search(line):
+                series = self.counts[name]
+                series[service_name] = series.get(service_name, 0.0) + 1
+
+    def values(self) -> Sample:
+        sample = {}
+        for name, service, _ in self._specs:
+            series = dict(self.counts[name])
+            if service and service not in series:
+                # 尚无匹配时计为0，保证比值类规则有数据
+                series[service] = 0.0
+            sample[name] = series
+        return sample
+
+# ---- 本地接收端替身 ----
+
+class _ReceiverHandler(BaseHTTPRequestHandler):
+    receiver: "AlertReceiver" = None
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        receiver = self.receiver
+        status = receiver.next_status()
+        if status < 300:
+            try:
+                receiver.record(json.loads(body.decode("utf-8")))
+            except ValueError:
+                status = 400
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+class AlertReceiver:
+    """
+    本地 webhook 接收端替身，用于测试告警投递
+    statuses 为依次返回的状态码（用完后返回 200），可用于验证失败重试
+    """
+
+    def __init__(self, listen: Tuple[str, int] = ("127.0.0.1", 0), statuses: Optional[List[int]] = None,
+                 echo: bool = False):
+        self.received: List[Dict[str, Any]] = []
+        self.requests = 0
+        self.echo = echo
+        self._statuses = collections.deque(statuses or [])
+        self._cond = threading.Condition()
+        handler = type("ReceiverHandler", (_ReceiverHandler,), {"receiver": self})
+        self._server = ThreadingHTTPServer(listen, handler)
+        self._server.daemon_threads = True
+        self.listen = self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.listen
+        return f"http://{host}:{port}/alerts"
+
+    def next_status(self) -> int:
+        with self._cond:
+            self.requests += 1
+            return self._statuses.popleft() if self._statuses else 200
+
+    def record(self, notification: Dict[str, Any]):
+        with self._cond:
+            self.received.append(notification)
+            self._cond.notify_all()
+        if self.echo:
+            print_notification(notification)
+
+    def wait_for(self, count: int, timeout: float = 5.0) -> bool:
+        """等待收到至少 count 条通知"""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.received) >= count, timeout)
+
+    def start(self) -> "AlertReceiver":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def print_notification(notification: Dict[str, Any]) -> None:
+    """打印一条告警通知"""
+    from datetime import datetime
+    stamp = datetime.fromtimestamp(notification.get("ts", time.time())).strftime("%Y-%m-%d %H:%M:%S")
+    mark = "✓ 恢复" if notification.get("status") == "resolved" else f"✗ {notification.get('severity', '')}"
+    service = f" [{notification['service']}]" if notification.get("service") else ""
+    value = notification.get("value")
+    print(f"{stamp} {mark} {notification.get('alert')}{service} 当前值 {'-' if value is None else value} "
+          f"（{notification.get('condition', '')}）{notification.get('summary') or ''}")
+
+def send_test_alert(engine: AlertEngine) -> int:
+    """向所有通知端发送一条测试通知，返回成功的数量"""
+    now = time.time()
+    return engine.deliver({
+        "alert": "test", "service": "", "status": "firing", "severity": "info", "value": None,
+        "condition": "manual test", "summary": "告警通道测试", "started": now, "ts": now,
+        "host": engine.host, "fingerprint": "test",
+    })
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服 gameserver 副本自动扩缩容
+按准入控制前端的排队深度、各实例的已建立连接数（psutil）与看门狗探测延迟计算所需副本数；
+扩容与缩容使用不同的利用率阈值形成滞回区间，各自有冷却时间，缩容还取一段窗口内的最高建议值；
+缩容时先把副本从前端摘除，等其上的连接全部结束后再停止进程
+
+License: GNU V3 LICENSE
+"""
+
+import collections
+import math
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import psutil
+
+# 副本在本机监听，前端通过回环地址转发
+REPLICA_HOST = "127.0.0.1"
+
+def _sockaddr_in(port: int) -> bytes:
+    """AF_INET、网络字节序端口、0.0.0.0 与8字节填充"""
+    return struct.pack("<H", 2) + struct.pack(">H", port) + b"\x00" * 12
+
+def patch_listen_port(data: bytes, port_from: int, port_to: int) -> bytes:
+    """
+    改写 ELF 中 bind 使用的 sockaddr_in 的端口
+    cyrene-sr 的监听端口是汇编常量，没有参数可以指定；该结构在文件中必须恰好出现一次
+    """
+    pattern = _sockaddr_in(port_from)
+    count = data.count(pattern)
+    if count != 1:
+        raise ValueError(f"可执行文件中监听端口 {port_from} 的 sockaddr_in 出现了 {count} 次，无法改写")
+    return data.replace(pattern, _sockaddr_in(port_to))
+
+def prepare_replica_binary(source: Path, port_from: int, port_to: int, dest_dir: Path) -> Path:
+    """生成监听 port_to 的可执行文件副本，内容相同时直接复用"""
+    data = patch_listen_port(source.read_bytes(), port_from, port_to)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    target = dest_dir / f"{source.name}-{port_to}"
+    if target.exists() and target.read_bytes() == data:
+        return target
+    # 先写临时文件再替换，旧文件仍被进程映射时也能更新
+    temp = target.with_name(target.name + ".tmp")
+    temp.write_bytes(data)
+    os.chmod(temp, 0o755)
+    os.replace(temp, target)
+    return target
+
+class ScalingPolicy:
+    """
+    扩缩容决策
+    扩容：建议值高于当前副本数且距上次扩容超过 up_cooldown，单次最多增加 max_step_up 个
+    缩容：down_window 内缩容建议值的最大值仍低于当前副本数，且距上次扩缩容超过 down_cooldown，每次减少一个
+    """
+
+    def __init__(self, min_replicas: int, max_replicas: int, up_cooldown: float = 30.0,
+                 down_cooldown: float = 300.0, down_window: float = 300.0, max_step_up: int = 2):
+        self.min_replicas = min_replicas
+        self.max_replicas = max(min_replicas, max_replicas)
+        self.up_cooldown = up_cooldown
+        self.down_cooldown = down_cooldown
+        self.down_window = down_window
+        self.max_step_up = max(1, max_step_up)
+        self.last_up = float("-inf")
+        self.last_down = float("-inf")
+        self._history: "collections.deque[Tuple[float, int]]" = collections.deque()
+
+    def clamp(self, replicas: int) -> int:
+        return min(self.max_replicas, max(self.min_replicas, replicas))
+
+    def decide(self, now: float, current: int, scale_up_to: int, scale_down_to: int) -> int:
+        """返回目标副本数；scale_up_to 按扩容阈值计算，scale_down_to 按（更低的）缩容阈值计算"""
+        scale_up_to = self.clamp(scale_up_to)
+        scale_down_to = self.clamp(scale_down_to)
+        self._history.append((now, scale_down_to))
+        while self._history[0][0] < now - self.down_window:
+            self._history.popleft()
+        # 上下限不受冷却限制
+        if current < self.min_replicas or current > self.max_replicas:
+            return self.clamp(current)
+        if scale_up_to > current:
+            if now - self.last_up < self.up_cooldown:
+                return current
+            self.last_up = now
+            return min(scale_up_to, current + self.max_step_up)
+        stable = max(replicas for _, replicas in self._history)
+        if stable < current and now - max(self.last_up, self.last_down) >= self.down_cooldown:
+            self.last_down = now
+            return current - 1
+        return current
+
+class Autoscaler:
+    """
+    gameserver 副本控制器，由调度器周期性调用 tick()
+    副本命名为 "模板名@序号"、监听 port_base + 序号，作为普通服务注册到 ProcessManager，
+    状态、日志、告警与看门狗探测都与其他服务一致；副本状态依次为 starting、ready、draining
+    """
+
+    def __init__(self, process_manager, config: Dict[str, Any], static_backends: List[Tuple[str, int]],
+                 startup_timeout: float = 10.0):
+        self.process_manager = process_manager
+        self.template = config.get("template", "cyrene-sr-gameserver")
+        self.port_base = int(config.get("port_base", 23330))
+        self.target_utilization = float(config.get("target_utilization", 0.8))
+        self.scale_down_utilization = min(self.target_utilization, float(config.get("scale_down_utilization", 0.5)))
+        self.latency_high_ms = float(config.get("latency_high_ms", 0) or 0)
+        self.latency_samples = max(1, int(config.get("latency_samples", 5)))
+        self.drain_timeout = float(config.get("drain_timeout", 600))
+        self.startup_timeout = startup_timeout
+        self.static_backends = list(static_backends)
+        self.policy = ScalingPolicy(
+            int(config.get("min_replicas", 0)),
+            int(config.get("max_replicas", 4)),
+            up_cooldown=float(config.get("up_cooldown", 30)),
+            down_cooldown=float(config.get("down_cooldown", 300)),
+            down_window=float(config.get("down_window", 300)),
+            max_step_up=int(config.get("max_step_up", 2))
+        )
+        self.replicas: Dict[str, Dict[str, Any]] = {}
+        self.last_sample: Dict[str, Any] = {}
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def stop(self):
+        """停止决策，等待进行中的一轮结束；副本进程由调用方与其他服务一起停止"""
+        with self._lock:
+            self._stopped = True
+
+    # ---- 信号采集 ----
+
+    def _sockets(self, service_name: str, port: int) -> Tuple[bool, int]:
+        """副本进程是否已在端口上监听，以及该端口上已建立的连接数"""
+        process = self.process_manager.service_processes.get(service_name)
+        if process is None or process.poll() is not None:
+            return False, 0
+        try:
+            proc = psutil.Process(process.pid)
+            connections = getattr(proc, "net_connections", proc.connections)(kind="tcp")
+        except psutil.Error:
+            return False, 0
+        listening = established = 0
+        for conn in connections:
+            if not conn.laddr or conn.laddr.port != port:
+                continue
+            if conn.status == psutil.CONN_LISTEN:
+                listening = 1
+            elif conn.status == psutil.CONN_ESTABLISHED:
+                established += 1
+        return bool(listening), established
+
+    def _probe_latency(self, service_names: List[str]) -> Optional[float]:
+        """
+        各实例最近 latency_samples 次成功探测延迟中位数的最大值，样本不足的实例不参与
+        单连接的 gameserver 上探测会排在正在服务的玩家连接之后，取中位数避免单次长延迟触发扩容
+        """
+        worst = None
+        for service_name in service_names:
+            liveness = self.process_manager.watchdog.liveness.get(service_name)
+            if not liveness or len(liveness["recent_ms"]) < self.latency_samples:
+                continue
+            recent = sorted(list(liveness["recent_ms"])[-self.latency_samples:])
+            median = recent[(len(recent) - 1) // 2]
+            worst = median if worst is None else max(worst, median)
+        return worst
+
+    def sample(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """根据前端统计与各副本连接数计算扩容、缩容两个建议副本数"""
+        load = metrics.get("backends", {})
+        capacity = max(1, self.process_manager.frontend.backend_capacity)
+        serving = [name for name, replica in self.replicas.items() if replica["state"] == "ready"]
+        busy = sum(load.get(f"{host}:{port}", 0) for host, port in self.static_backends)
+        busy += sum(self.replicas[name]["connections"] for name in serving)
+        queue = int(metrics.get("queue_depth", 0))
+        current = sum(1 for replica in self.replicas.values() if replica["state"] != "draining")
+        # 固定后端（frontend_config.backends）不归控制器管理，从建议值中扣除
+        static = len(self.static_backends)
+        demand = busy + queue
+        scale_up_to = math.ceil(demand / (capacity * self.target_utilization)) - static
+        scale_down_to = math.ceil(demand / (capacity * self.scale_down_utilization)) - static
+        latency = self._probe_latency(serving + [self.template])
+        if self.latency_high_ms and latency is not None and latency > self.latency_high_ms:
+            scale_up_to = max(scale_up_to, current + 1)
+            scale_down_to = max(scale_down_to, current)
+        return {
+            "busy": busy, "queue": queue, "capacity": capacity * (static + len(serving)),
+            "latency_ms": latency, "current": current,
+            "scale_up_to": self.policy.clamp(scale_up_to), "scale_down_to": self.policy.clamp(scale_down_to)
+        }
+
+    # ---- 副本管理 ----
+
+    def _update_backends(self):
+        """把固定后端与就绪副本同步给前端；不在列表中的后端由前端在连接结束后摘除"""
+        frontend = self.process_manager.frontend
+        backends = self.static_backends + [(REPLICA_HOST, replica["port"]) for replica in
+                                           sorted(self.replicas.values(), key=lambda r: r["index"])
+                                           if replica["state"] == "ready"]
+        frontend.call_soon(frontend.set_backends, backends)
+
+    def _add_replica(self, now: float) -> bool:
+        used = {replica["index"] for replica in self.replicas.values()}
+        index = next(i for i in range(1, len(used) + 2) if i not in used)
+        service_name = f"{self.template}@{index}"
+        port = self.port_base + index
+        try:
+            service_config = self.process_manager.build_replica_config(self.template, port)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[autoscale] 无法生成副本 {service_name}: {e}")
+            return False
+        probes = self.process_manager.config_manager.get_setting("watchdog_config.probes") or {}
+        probe = dict(probes[self.template], port=port) if self.template in probes else None
+        self.process_manager.add_service(service_name, service_config, probe)
+        if not self.process_manager.start_service(service_name):
+            self.process_manager.remove_service(service_name)
+            return False
+        self.replicas[service_name] = {"index": index, "port": port, "state": "starting",
+                                       "since": now, "connections": 0}
+        return True
+
+    def _discard(self, service_name: str, reason: str):
+        """停止并注销副本"""
+        replica = self.replicas.pop(service_name)
+        self.process_manager.stop_service(service_name)
+        self.process_manager.remove_service(service_name)
+        self.process_manager.journal_event(service_name, "replica_removed", reason=reason,
+                                           port=replica["port"])
+        print(f"[autoscale] 副本 {service_name} 已移除（{reason}）")
+        if replica["state"] == "ready":
+            self._update_backends()
+
+    def _begin_drain(self, now: float) -> Optional[str]:
+        """选择一个副本下线：优先尚未就绪的，其次连接数最少的；返回副本名"""
+        starting = [name for name, replica in self.replicas.items() if replica["state"] == "starting"]
+        if starting:
+            service_name = max(starting, key=lambda name: self.replicas[name]["index"])
+            self._discard(service_name, "缩容")
+            return service_name
+        ready = [name for name, replica in self.replicas.items() if replica["state"] == "ready"]
+        if not ready:
+            return None
+        service_name = min(ready, key=lambda name: (self.replicas[name]["connections"],
+                                                    -self.replicas[name]["index"]))
+        replica = self.replicas[service_name]
+        replica.update(state="draining", since=now)
+        # 排空期间不再探测，探测连接也会占用单连接的 gameserver
+        self.process_manager.watchdog.remove_probe(service_name)
+        self._update_backends()
+        self.process_manager.journal_event(service_name, "drain", connections=replica["connections"])
+        print(f"[autoscale] 副本 {service_name} 开始排空，当前 {replica['connections']} 个连接")
+        return service_name
+
+    def _reconcile(self, now: float, load: Dict[str, int]):
+        """推进副本状态：端口开始监听即就绪，进程退出即移除，排空完成或超时后停止"""
+        for service_name, replica in list(self.replicas.items()):
+            listening, replica["connections"] = self._sockets(service_name, replica["port"])
+            running = self.process_manager.is_service_running(service_name)
+            state = replica["state"]
+            if state == "starting":
+                if not running:
+                    self._discard(service_name, "启动失败")
+                elif listening:
+                    replica.update(state="ready", since=now)
+                    self._update_backends()
+                    self.process_manager.journal_event(service_name, "replica_ready", port=replica["port"],
+                                                       startup_s=round(now - replica["since"], 2))
+                    print(f"[autoscale] 副本 {service_name} 已就绪，监听 {replica['port']}")
+                elif now - replica["since"] > self.startup_timeout:
+                    self._discard(service_name, "启动超时")
+            elif state == "ready":
+                if not running:
+                    self._discard(service_name, "进程退出")
+            elif state == "draining":
+                routed = f"{REPLICA_HOST}:{replica['port']}" in load
+                if not running:
+                    self._discard(service_name, "进程退出")
+                elif not routed and replica["connections"] == 0:
+                    self._discard(service_name, "排空完成")
+                elif now - replica["since"] > self.drain_timeout:
+                    self._discard(service_name, f"排空超时，剩余 {replica['connections']} 个连接")
+
+    def tick(self):
+        """采样一次并执行扩缩容决策"""
+        with self._lock:
+            if self._stopped:
+                return
+            now = time.monotonic()
+            metrics = self.process_manager.frontend.metrics()
+            self._reconcile(now, metrics.get("backends", {}))
+            sample = self.last_sample = self.sample(metrics)
+            current = sample["current"]
+            target = self.policy.decide(now, current, sample["scale_up_to"], sample["scale_down_to"])
+            if target == current:
+                return
+            latency = f"{sample['latency_ms']:.0f}ms" if sample["latency_ms"] is not None else "-"
+            signals = (f"连接 {sample['busy']} 排队 {sample['queue']} 容量 {sample['capacity']} "
+                       f"探测延迟 {latency}")
+            if target > current:
+                print(f"[autoscale] 扩容 {current} -> {target}：{signals}")
+                for _ in range(target - current):
+                    if not self._add_replica(now):
+                        break
+                self.process_manager.journal_event(self.template, "scale_up", replicas=target,
+                                                   busy=sample["busy"], queue=sample["queue"])
+            else:
+                print(f"[autoscale] 缩容 {current} -> {target}：{signals}")
+                self._begin_drain(now)
+                self.process_manager.journal_event(self.template, "scale_down", replicas=target,
+                                                   busy=sample["busy"], queue=sample["queue"])
+
+    def status(self) -> Dict[str, Any]:
+        """副本状态与最近一次采样"""
+        with self._lock:
+            return {
+                "replicas": {name: {key: replica[key] for key in ("port", "state", "connections")}
+                             for name, replica in self.replicas.items()},
+                "sample": dict(self.last_sample)
+            }
+
+def print_autoscale_status(status: Dict[str, Any]) -> None:
+    """打印副本状态"""
+    sample = status["sample"]
+    if sample:
+        latency = f"{sample['latency_ms']:.0f}ms" if sample["latency_ms"] is not None else "-"
+        print(f"[autoscale] 副本 {sample['current']} 连接 {sample['busy']} 排队 {sample['queue']} "
+              f"容量 {sample['capacity']} 探测延迟 {latency} 建议 {sample['scale_up_to']}/{sample['scale_down_to']}")
+    for name, replica in sorted(status["replicas"].items()):
+        print(f"  {name:<28}{replica['port']:>6}  {replica['state']:<10}{replica['connections']:>4} 个连接")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服性能基准
+对比原生运行与 pexecvelf 模拟运行下 cyrene-sr 与 hoyo-sdk 的系统调用密集型吞吐；
+结果中保留逐请求延迟样本与可执行文件哈希，可存入 benchstore 做版本间的统计比较
+
+License: GNU V3 LICENSE
+"""
+
+import hashlib
+import socket
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from protocol import (
+    DISPATCH_PORT, GAMESERVER_PORT, SDK_PORT, PacketReader, heartbeat_request,
+)
+
+def is_port_free(port: int, host: str = "127.0.0.1") -> bool:
+    """检查端口是否空闲"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex((host, port)) != 0
+
+def wait_for_port(port: int, timeout: float = 10.0, host: str = "127.0.0.1") -> bool:
+    """等待端口开始监听"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def drive_gameserver(requests: int, pipeline: int = 1, port: int = GAMESERVER_PORT) -> Dict[str, Any]:
+    """
+    通过单个连接发送 PlayerHeartBeat 请求
+    每个请求在服务端触发 read/clock_gettime/write 系统调用
+    """
+    packet = heartbeat_request(1)
+    latencies = []
+    reader = PacketReader()
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        started = time.perf_counter()
+        sent = 0
+        while sent < requests:
+            batch = min(pipeline, requests - sent)
+            t0 = time.perf_counter()
+            sock.sendall(packet * batch)
+            received = 0
+            while received < batch:
+                data = sock.recv(65536)
+                if not data:
+                    raise ConnectionError("游戏服务器关闭了连接")
+                received += len(reader.feed(data))
+            latencies.append((time.perf_counter() - t0) / batch)
+            sent += batch
+        elapsed = time.perf_counter() - started
+    return _summarize(requests, elapsed, latencies)
+
+def drive_dispatch(requests: int, port: int = DISPATCH_PORT) -> Dict[str, Any]:
+    """
+    逐个发送 /query_dispatch 短连接请求
+    每个请求在服务端触发 accept/read/write/close 系统调用
+    """
+    return drive_http(requests, port, "/query_dispatch")
+
+def drive_http(requests: int, port: int, path: str) -> Dict[str, Any]:
+    """逐个发送 HTTP GET 短连接请求"""
+    request = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            sock.sendall(request)
+            while sock.recv(65536):
+                pass
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    return _summarize(requests, elapsed, latencies)
+
+def _summarize(requests: int, elapsed: float, latencies: List[float]) -> Dict[str, Any]:
+    """汇总吞吐与延迟，samples_us 为逐请求（流水线时为每批平均）延迟样本"""
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1e6
+    return {
+        "requests": requests,
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed if elapsed > 0 else 0.0,
+        "p50_us": pct(0.50),
+        "p99_us": pct(0.99),
+        "samples_us": [latency * 1e6 for latency in latencies],
+    }
+
+def hash_command_files(cmd: List[str]) -> str:
+    """命令行中所有存在的文件（可执行文件及 pexecvelf 模式下的ELF）的合并 sha256，不含 wine 前缀"""
+    digest = hashlib.sha256()
+    if cmd and Path(cmd[0]).name.startswith("wine"):
+        cmd = cmd[1:]
+    for part in cmd:
+        path = Path(part)
+        if not path.is_file():
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def run_target(cmd: List[str], cwd: Path, port: int, driver, requests: int) -> Dict[str, Any]:
+    """启动一个服务进程，压测后关闭"""
+    if not is_port_free(port):
+        return {"error": f"端口 {port} 已被占用，请先停止正在运行的服务"}
+    process = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_for_port(port):
+            return {"error": "服务未能在超时时间内开始监听"}
+        return driver(requests)
+    except OSError as e:
+        return {"error": str(e)}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def run_launch_benchmark(commands: Dict[str, Dict[str, Optional[Tuple[List[str], Path]]]],
+                         requests: int = 5000, pipeline: int = 1) -> Dict[str, Dict[str, Any]]:
+    """
+    对各启动模式依次压测 gameserver 与 dispatch
+    commands: {模式: {服务名: (命令行, 工作目录) 或 None}}
+    """
+    targets = {
+        "cyrene-sr-gameserver": (GAMESERVER_PORT, lambda n: drive_gameserver(n, pipeline)),
+        "cyrene-sr-dispatch": (DISPATCH_PORT, drive_dispatch),
+        "hoyo-sdk": (SDK_PORT, lambda n: drive_http(n, SDK_PORT, "/account/register")),
+    }
+    results: Dict[str, Dict[str, Any]] = {}
+    for mode, services in commands.items():
+        results[mode] = {}
+        for service_name, (port, driver) in targets.items():
+            launch = services.get(service_name)
+            if launch is None:
+                results[mode][service_name] = {"error": "当前平台不支持该启动模式（非 Windows 需安装 wine）或可执行文件不存在"}
+                continue
+            cmd, cwd = launch
+            result = run_target(cmd, cwd, port, driver, requests)
+            if "error" not in result:
+                result.update(binary_sha256=hash_command_files(cmd),
+                              pipeline=pipeline if port == GAMESERVER_PORT else 1)
+            results[mode][service_name] = result
+    return results
+
+def print_benchmark_report(results: Dict[str, Dict[str, Any]]) -> None:
+    """打印对比报告"""
+    print(f"{'模式':<10} {'服务':<25} {'吞吐(req/s)':>12} {'p50(us)':>10} {'p99(us)':>10}")
+    print("-" * 72)
+    for mode, services in results.items():
+        for service_name, result in services.items():
+            if "error" in result:
+                print(f"{mode:<10} {service_name:<25} {result['error']}")
+            else:
+                print(f"{mode:<10} {service_name:<25} {result['throughput_rps']:>12.0f} "
+                      f"{result['p50_us']:>10.1f} {result['p99_us']:>10.1f}")
+    print("-" * 72)
+    native = results.get("native", {})
+    emulated = results.get("emulated", {})
+    for service_name in native:
+        a, b = native.get(service_name, {}), emulated.get(service_name, {})
+        if "throughput_rps" in a and "throughput_rps" in b and b["throughput_rps"] > 0:
+            print(f"{service_name}: 原生吞吐为模拟的 {a['throughput_rps'] / b['throughput_rps']:.2f} 倍")
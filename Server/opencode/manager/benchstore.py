@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服基准结果库与回归判定
+每次基准测试的吞吐与逐请求延迟样本按（主机指纹、服务、启动模式、可执行文件哈希）存入 SQLite；
+比较两个版本时用 NumPy 做分层自助法（先重抽运行、再重抽样本），
+得到 p50/p99 延迟与吞吐比值的置信区间，区间整体越过阈值时判定为显著回归
+
+License: GNU V3 LICENSE
+"""
+
+import array
+import hashlib
+import json
+import os
+import platform
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    fingerprint TEXT PRIMARY KEY,
+    info TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    host TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    service TEXT NOT NULL,
+    binary_sha256 TEXT NOT NULL,
+    label TEXT,
+    requests INTEGER NOT NULL,
+    pipeline INTEGER NOT NULL,
+    throughput_rps REAL NOT NULL,
+    p50_us REAL NOT NULL,
+    p99_us REAL NOT NULL,
+    samples BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (host, mode, service, pipeline, binary_sha256, ts);
+"""
+
+# 比较的指标：(键, 名称, 越大越好)
+METRICS = (
+    ("p50_us", "p50延迟", False),
+    ("p99_us", "p99延迟", False),
+    ("throughput_rps", "吞吐", True),
+)
+
+def host_fingerprint() -> Tuple[str, Dict[str, Any]]:
+    """主机指纹：硬件与系统信息的哈希，只有同一指纹下的结果才可比较"""
+    info = {
+        "node": platform.node(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+    try:
+        import psutil
+        info["physical_cpus"] = psutil.cpu_count(logical=False)
+        info["memory_mb"] = psutil.virtual_memory().total // (1024 * 1024)
+    except ImportError:
+        pass
+    fingerprint = hashlib.sha256(json.dumps(info, sort_keys=True).encode()).hexdigest()[:12]
+    return fingerprint, info
+
+def _pack_samples(samples: List[float]) -> bytes:
+    return zlib.compress(array.array("f", samples).tobytes())
+
+def _unpack_samples(blob: bytes) -> "np.ndarray":
+    return np.frombuffer(zlib.decompress(blob), dtype=np.float32).astype(np.float64)
+
+class BenchmarkStore:
+    """基准结果库"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        self.host, self.host_info = host_fingerprint()
+
+    def close(self):
+        self.db.close()
+
+    def save(self, mode: str, service: str, result: Dict[str, Any], label: Optional[str] = None) -> int:
+        """保存一次基准结果（需包含 samples_us 与 binary_sha256）"""
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO hosts (fingerprint, info) VALUES (?, ?)",
+                            (self.host, json.dumps(self.host_info, ensure_ascii=False)))
+            return self.db.execute(
+                "INSERT INTO runs (ts, host, mode, service, binary_sha256, label, requests, pipeline, "
+                "throughput_rps, p50_us, p99_us, samples) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), self.host, mode, service, result["binary_sha256"], label,
+                 result["requests"], result.get("pipeline", 1), result["throughput_rps"],
+                 result["p50_us"], result["p99_us"], _pack_samples(result["samples_us"]))
+            ).lastrowid
+
+    def save_results(self, results: Dict[str, Dict[str, Any]], label: Optional[str] = None) -> int:
+        """保存 run_launch_benchmark 的全部成功结果，返回保存的条数"""
+        saved = 0
+        for mode, services in results.items():
+            for service, result in services.items():
+                if "error" not in result:
+                    self.save(mode, service, result, label)
+                    saved += 1
+        return saved
+
+    def builds(self, mode: str, service: str, pipeline: int = 1) -> List[Dict[str, Any]]:
+        """本机上某服务的所有版本，按最近一次测试时间倒序"""
+        rows = self.db.execute(
+            "SELECT binary_sha256, MAX(label), COUNT(*), MAX(ts) FROM runs "
+            "WHERE host = ? AND mode = ? AND service = ? AND pipeline = ? "
+            "GROUP BY binary_sha256 ORDER BY MAX(ts) DESC",
+            (self.host, mode, service, pipeline)
+        ).fetchall()
+        return [{"sha256": sha, "label": label, "runs": runs, "last_ts": ts} for sha, label, runs, ts in rows]
+
+    def resolve_build(self, builds: List[Dict[str, Any]], ref: str) -> Optional[Dict[str, Any]]:
+        """按哈希前缀或标签查找版本"""
+        for build in builds:
+            if build["label"] == ref or build["sha256"].startswith(ref.lower()):
+                return build
+        return None
+
+    def load_runs(self, mode: str, service: str, sha256: str, pipeline: int = 1,
+                  limit: int = 10) -> List["np.ndarray"]:
+        """读取某版本最近若干次运行的延迟样本"""
+        rows = self.db.execute(
+            "SELECT samples FROM runs WHERE host = ? AND mode = ? AND service = ? AND pipeline = ? "
+            "AND binary_sha256 = ? ORDER BY ts DESC LIMIT ?",
+            (self.host, mode, service, pipeline, sha256, limit)
+        ).fetchall()
+        return [_unpack_samples(blob) for blob, in rows]
+
+def _estimates(draws: "np.ndarray") -> Dict[str, "np.ndarray"]:
+    """每行一组样本，计算各指标；吞吐为平均延迟的倒数（单连接串行压测）"""
+    p50, p99 = np.percentile(draws, [50, 99], axis=-1)
+    return {"p50_us": p50, "p99_us": p99, "throughput_rps": 1e6 / draws.mean(axis=-1)}
+
+def bootstrap_metrics(runs: List["np.ndarray"], iterations: int, rng: "np.random.Generator") -> Dict[str, "np.ndarray"]:
+    """
+    分层自助法：每次迭代有放回地抽取运行，再从每个被抽中的运行中有放回地抽取等量样本，
+    同时反映运行之间（主机噪声）与运行之内的波动
+    """
+    per_run = min(len(run) for run in runs)
+    offsets = np.cumsum([0] + [len(run) for run in runs[:-1]])
+    lengths = np.array([len(run) for run in runs])
+    pooled = np.concatenate(runs)
+    chunk = max(1, 4_000_000 // (per_run * len(runs)))
+    results: Dict[str, List["np.ndarray"]] = {key: [] for key, _, _ in METRICS}
+    for start in range(0, iterations, chunk):
+        count = min(chunk, iterations - start)
+        picked = rng.integers(0, len(runs), size=(count, len(runs)))
+        within = (rng.random((count, len(runs), per_run)) * lengths[picked][:, :, None]).astype(np.int64)
+        draws = pooled[(offsets[picked][:, :, None] + within).reshape(count, -1)]
+        for key, values in _estimates(draws).items():
+            results[key].append(values)
+    return {key: np.concatenate(values) for key, values in results.items()}
+
+def compare_runs(baseline: List["np.ndarray"], candidate: List["np.ndarray"], iterations: int = 2000,
+                 confidence: float = 0.95, threshold: float = 0.03, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    比较两个版本，返回每个指标的点估计、比值（候选/基线）及其置信区间
+    延迟比值区间下限高于 1+threshold、或吞吐比值区间上限低于 1-threshold 时判定为回归
+    """
+    rng = np.random.default_rng(seed)
+    base_point = _estimates(np.concatenate(baseline))
+    cand_point = _estimates(np.concatenate(candidate))
+    base_boot = bootstrap_metrics(baseline, iterations, rng)
+    cand_boot = bootstrap_metrics(candidate, iterations, rng)
+    tail = (1 - confidence) / 2 * 100
+    rows = []
+    for key, name, higher_is_better in METRICS:
+        ratios = cand_boot[key] / base_boot[key]
+        low, high = np.percentile(ratios, [tail, 100 - tail])
+        if higher_is_better:
+            regression, improvement = high < 1 - threshold, low > 1 + threshold
+        else:
+            regression, improvement = low > 1 + threshold, high < 1 - threshold
+        rows.append({
+            "metric": key, "name": name,
+            "baseline": float(base_point[key]), "candidate": float(cand_point[key]),
+            "ratio": float(cand_point[key] / base_point[key]),
+            "low": float(low), "high": float(high),
+            "verdict": "regression" if regression else "improvement" if improvement else "same",
+        })
+    return rows
+
+def compare_builds(store: BenchmarkStore, mode: str, services: List[str], baseline_ref: Optional[str] = None,
+                   candidate_ref: Optional[str] = None, pipeline: int = 1, iterations: int = 2000,
+                   confidence: float = 0.95, threshold: float = 0.03) -> List[Dict[str, Any]]:
+    """
+    对每个服务比较两个版本；未指定时候选为最近测试的版本，基线为此前最近测试的另一版本
+    无法比较的服务返回带 error 的条目
+    """
+    if np is None:
+        raise RuntimeError("统计比较需要 NumPy，请先执行 pip install numpy")
+    reports = []
+    for service in services:
+        report: Dict[str, Any] = {"service": service}
+        reports.append(report)
+        # 流水线深度只作用于 gameserver，不同深度的结果不可比较
+        key_pipeline = pipeline if service == "cyrene-sr-gameserver" else 1
+        builds = store.builds(mode, service, key_pipeline)
+        candidate = store.resolve_build(builds, candidate_ref) if candidate_ref else (builds[0] if builds else None)
+        if candidate is None:
+            report["error"] = "没有候选版本的测试结果"
+            continue
+        if baseline_ref:
+            baseline = store.resolve_build(builds, baseline_ref)
+        else:
+            baseline = next((b for b in builds if b["sha256"] != candidate["sha256"]), None)
+        if baseline is None or baseline["sha256"] == candidate["sha256"]:
+            report["error"] = "没有可比较的基线版本"
+            continue
+        base_runs = store.load_runs(mode, service, baseline["sha256"], key_pipeline)
+        cand_runs = store.load_runs(mode, service, candidate["sha256"], key_pipeline)
+        report.update(
+            baseline=baseline, candidate=candidate,
+            metrics=compare_runs(base_runs, cand_runs, iterations, confidence, threshold)
+        )
+    return reports
+
+def has_regressions(reports: List[Dict[str, Any]]) -> bool:
+    return any(m["verdict"] == "regression" for r in reports for m in r.get("metrics", []))
+
+def print_comparison(reports: List[Dict[str, Any]], confidence: float) -> None:
+    """打印版本比较结果"""
+    marks = {"regression": "✗ 回归", "improvement": "↑ 改善", "same": "  无显著差异"}
+
+    def build_name(build: Dict[str, Any]) -> str:
+        label = f" ({build['label']})" if build.get("label") else ""
+        return f"{build['sha256'][:12]}{label} ×{build['runs']}"
+
+    for report in reports:
+        print(f"\n{report['service']}")
+        if "error" in report:
+            print(f"  {report['error']}")
+            continue
+        print(f"  基线 {build_name(report['baseline'])}  →  候选 {build_name(report['candidate'])}")
+        for m in report["metrics"]:
+            unit = "req/s" if m["metric"] == "throughput_rps" else "us"
+            print(f"  {m['name']:<6} {m['baseline']:>10.1f} → {m['candidate']:>10.1f} {unit:<5} "
+                  f"比值 {m['ratio']:.3f} [{m['low']:.3f}, {m['high']:.3f}]@{confidence:.0%}  {marks[m['verdict']]}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服网页仪表盘
+内置的轻量HTTP服务，通过 Server-Sent Events 推送服务状态、日志尾部与资源占用。
+状态与资源数据只推送发生变化的字段，日志按时间窗口合批，
+断线重连时按 Last-Event-ID 补发缺失的事件，过旧时改为发送完整快照
+
+License: GNU V3 LICENSE
+"""
+
+import collections
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+class DashboardHub:
+    """仪表盘事件中心：维护当前状态并向订阅者分发增量事件"""
+
+    def __init__(self, history: int = 2048, log_tail: int = 200, log_batch: float = 0.25):
+        self.log_batch = log_batch
+        self._cond = threading.Condition()
+        self._events: "collections.deque[Tuple[int, str, str]]" = collections.deque(maxlen=history)
+        self._next_id = 1
+        self._services: Dict[str, Dict[str, Any]] = {}
+        self._telemetry: Dict[str, Dict[str, Any]] = {}
+        self._log_tail: Dict[str, "collections.deque[str]"] = collections.defaultdict(
+            lambda: collections.deque(maxlen=log_tail))
+        self._pending_logs: List[Tuple[str, str, str]] = []
+        self._flush_scheduled = False
+
+    # ---- 发布 ----
+
+    def _publish(self, event: str, payload: Dict[str, Any]):
+        """调用方需持有锁"""
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        self._events.append((self._next_id, event, data))
+        self._next_id += 1
+        self._cond.notify_all()
+
+    def update_service(self, service_name: str, **fields):
+        """更新服务状态，仅推送变化的字段"""
+        with self._cond:
+            current = self._services.setdefault(service_name, {})
+            changes = {key: value for key, value in fields.items() if current.get(key) != value}
+            if not changes:
+                return
+            current.update(changes)
+            self._publish("state", {"service": service_name, "changes": changes})
+
+    def update_telemetry(self, samples: Dict[str, Dict[str, Any]]):
+        """更新资源占用，仅推送变化的服务与字段"""
+        with self._cond:
+            diff = {}
+            for service_name, values in samples.items():
+                current = self._telemetry.setdefault(service_name, {})
+                changes = {key: value for key, value in values.items() if current.get(key) != value}
+                if changes:
+                    current.update(changes)
+                    diff[service_name] = changes
+            for service_name in set(self._telemetry) - set(samples):
+                del self._telemetry[service_name]
+                diff[service_name] = None
+            if diff:
+                self._publish("telemetry", diff)
+
+    def add_log(self, service_name: str, stream_name: str, line: str):
+        """记录一行日志（可直接注册为 ProcessManager 的输出回调），按窗口合批推送"""
+        with self._cond:
+            self._log_tail[service_name].append(line)
+            self._pending_logs.append((service_name, stream_name, line))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        timer = threading.Timer(self.log_batch, self._flush_logs)
+        timer.daemon = True
+        timer.start()
+
+    def _flush_logs(self):
+        with self._cond:
+            pending, self._pending_logs = self._pending_logs, []
+            self._flush_scheduled = False
+            if pending:
+                self._publish("logs", {"lines": pending})
+
+    # ---- 订阅 ----
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return self._snapshot_locked()
+
+    def _snapshot_locked(self) -> Dict[str, Any]:
+        return {
+            "services": {name: dict(fields) for name, fields in self._services.items()},
+            "telemetry": {name: dict(values) for name, values in self._telemetry.items()},
+            "logs": {name: list(lines) for name, lines in self._log_tail.items()},
+        }
+
+    def events_since(self, last_id: Optional[int], timeout: float) -> Tuple[int, List[Tuple[int, str, str]]]:
+        """
+        返回 last_id 之后的事件，没有新事件时最多等待 timeout 秒
+        last_id 为 None 或已被淘汰时返回一个完整快照事件
+        """
+        with self._cond:
+            oldest = self._events[0][0] if self._events else self._next_id
+            if last_id is None or last_id + 1 < oldest:
+                last = self._next_id - 1
+                data = json.dumps(self._snapshot_locked(), ensure_ascii=False, separators=(",", ":"))
+                return last, [(last, "snapshot", data)]
+            if last_id + 1 >= self._next_id:
+                self._cond.wait(timeout)
+            events = [event for event in self._events if event[0] > last_id]
+            return (events[-1][0] if events else last_id), events
+
+_PAGE = """<!DOCTYPE html>
+<html lang="zh-CN"><head><meta charset="utf-8"><title>SR私服仪表盘</title>
+<style>
+body{font-family:sans-serif;background:#1e1e1e;color:#ddd;margin:16px}
+table{border-collapse:collapse;margin-bottom:12px}td,th{padding:4px 12px;border-bottom:1px solid #333;text-align:left}
+.running{color:#4caf50}.starting{color:#ffc107}.degraded{color:#ff9800}.error,.stopped{color:#f44336}
+pre{background:#111;padding:8px;height:50vh;overflow:auto;font-size:12px}
+</style></head><body>
+<h3>SR私服仪表盘 <small id="conn">连接中...</small></h3>
+<table><thead><tr><th>服务</th><th>状态</th><th>PID</th><th>CPU%</th><th>内存(MB)</th></tr></thead><tbody id="rows"></tbody></table>
+<pre id="log"></pre>
+<script>
+const services={},telemetry={},log=document.getElementById("log"),MAX=500;
+function render(){const rows=document.getElementById("rows");rows.innerHTML="";
+for(const name of Object.keys(services).sort()){const s=services[name],t=telemetry[name]||{};
+const tr=document.createElement("tr");
+for(const [v,c] of [[name],[s.status,s.status],[s.pid||"-"],[t.cpu??"-"],[t.rss_mb??"-"]]){
+const td=document.createElement("td");td.textContent=v;if(c)td.className=c;tr.appendChild(td);}
+rows.appendChild(tr);}}
+function appendLines(lines){const atBottom=log.scrollTop+log.clientHeight>=log.scrollHeight-4;
+log.textContent+=lines.join("\\n")+"\\n";const all=log.textContent.split("\\n");
+if(all.length>MAX)log.textContent=all.slice(-MAX).join("\\n");if(atBottom)log.scrollTop=log.scrollHeight;}
+const es=new EventSource("events");
+es.onopen=()=>document.getElementById("conn").textContent="已连接";
+es.onerror=()=>document.getElementById("conn").textContent="重新连接中...";
+es.addEventListener("snapshot",e=>{const d=JSON.parse(e.data);
+for(const k in services)delete services[k];for(const k in telemetry)delete telemetry[k];
+Object.assign(services,d.services);Object.assign(telemetry,d.telemetry);log.textContent="";
+appendLines(Object.entries(d.logs).flatMap(([n,ls])=>ls.map(l=>"["+n+"] "+l)));render();});
+es.addEventListener("state",e=>{const d=JSON.parse(e.data);
+services[d.service]=Object.assign(services[d.service]||{},d.changes);render();});
+es.addEventListener("telemetry",e=>{const d=JSON.parse(e.data);
+for(const [n,c] of Object.entries(d)){if(c===null)delete telemetry[n];else telemetry[n]=Object.assign(telemetry[n]||{},c);}render();});
+es.addEventListener("logs",e=>appendLines(JSON.parse(e.data).lines.map(([n,s,l])=>"["+n+"] "+l)));
+</script></body></html>
+"""
+
+class _DashboardHandler(BaseHTTPRequestHandler):
+    hub: DashboardHub = None
+    keepalive: float = 15.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/":
+            self._send(200, "text/html; charset=utf-8", _PAGE.encode("utf-8"))
+        elif path == "/snapshot":
+            body = json.dumps(self.hub.snapshot(), ensure_ascii=False).encode("utf-8")
+            self._send(200, "application/json; charset=utf-8", body)
+        elif path == "/events":
+            self._stream()
+        else:
+            self._send(404, "text/plain; charset=utf-8", b"not found")
+
+    def _send(self, code: int, content_type: str, body: bytes):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.end_headers()
+        header = self.headers.get("Last-Event-ID")
+        last_id = int(header) if header and header.isdigit() else None
+        try:
+            while True:
+                last_id, events = self.hub.events_since(last_id, self.keepalive)
+                if events:
+                    chunk = "".join(f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+                                    for event_id, event, data in events)
+                else:
+                    # 保活注释，防止代理断开空闲连接
+                    chunk = ": keepalive\n\n"
+                self.wfile.write(chunk.encode("utf-8"))
+                self.wfile.flush()
+        except (ConnectionError, OSError):
+            pass
+
+class DashboardServer:
+    """仪表盘HTTP服务，并定期采集资源占用"""
+
+    def __init__(self, hub: DashboardHub, listen: Tuple[str, int],
+                 telemetry_source: Optional[Callable[[], Dict[str, Dict[str, Any]]]] = None,
+                 telemetry_interval: float = 2.0, scheduler=None):
+        self.hub = hub
+        self.scheduler = scheduler
+        self.telemetry_source = telemetry_source
+        self.telemetry_interval = telemetry_interval
+        handler = type("DashboardHandler", (_DashboardHandler,), {"hub": hub})
+        self._server = ThreadingHTTPServer(listen, handler)
+        self._server.daemon_threads = True
+        self.listen = self._server.server_address[:2]
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        if self.telemetry_source and self.scheduler is not None:
+            self.scheduler.every("dashboard-telemetry", self.telemetry_interval, self.sample, blocking=True)
+        elif self.telemetry_source:
+            threading.Thread(target=self._sample_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.scheduler is not None:
+            self.scheduler.cancel("dashboard-telemetry")
+        self._server.shutdown()
+        self._server.server_close()
+
+    def sample(self):
+        try:
+            self.hub.update_telemetry(self.telemetry_source())
+        except Exception as e:
+            print(f"仪表盘资源采集出错: {e}")
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.telemetry_interval):
+            self.sample()
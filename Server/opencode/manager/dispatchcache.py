@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服 dispatch 缓存前端
+dispatch 为单线程逐个处理的短连接服务，重启后大量客户端同时登录时会在其 accept 队列中排队。
+本前端终结客户端的 keep-alive 连接，按路径与查询参数缓存 dispatch 的响应：
+命中时直接写出预先拼好的完整响应；未命中时同一键只向 dispatch 发出一个请求，其余请求等待其结果；
+缓存按 TTL 过期，dispatch 可执行文件变化时整体失效，dispatch 不可用时在 stale_ttl 内返回过期内容
+
+License: GNU V3 LICENSE
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from frontend import WaitStats, call_in_loop, start_server_thread
+from protocol import encode_varint
+
+# dispatch.pb.asm 中 Gateserver 消息的 port 字段号
+GATESERVER_PORT_FIELD = 14
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 431: "Request Header Fields Too Large",
+            502: "Bad Gateway"}
+
+def build_response(status: int, body: bytes, content_type: bytes = b"text/plain", keep_alive: bool = True) -> bytes:
+    """带 Content-Length 的完整 HTTP/1.1 响应"""
+    reason = _REASONS.get(status, "OK")
+    return (f"HTTP/1.1 {status} {reason}\r\n".encode("ascii")
+            + b"Content-Type: " + content_type + b"\r\n"
+            + f"Content-Length: {len(body)}\r\n".encode("ascii")
+            + (b"Connection: keep-alive\r\n\r\n" if keep_alive else b"Connection: close\r\n\r\n")
+            + body)
+
+def file_fingerprint(path: Optional[Path]) -> Optional[str]:
+    """可执行文件内容的哈希，文件不存在时返回 None"""
+    if path is None:
+        return None
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+def rewrite_gateway_port(raw: bytes, port: int) -> Optional[bytes]:
+    """
+    改写 query_gateway 响应（顶层 Gateserver 消息）中的网关端口
+    端口是顶层字段，长度变化不影响其他字段；不是合法 protobuf 或不含该字段时返回 None
+    """
+    out = bytearray()
+    pos = 0
+    found = False
+    try:
+        while pos < len(raw):
+            start = pos
+            key, pos = _read_varint(raw, pos)
+            field, wire = key >> 3, key & 7
+            if wire == 0:
+                value_start = pos
+                _, pos = _read_varint(raw, pos)
+                if field == GATESERVER_PORT_FIELD:
+                    out += raw[start:value_start] + encode_varint(port)
+                    found = True
+                    continue
+            elif wire == 2:
+                length, pos = _read_varint(raw, pos)
+                pos += length
+            elif wire in (1, 5):
+                pos += 8 if wire == 1 else 4
+            else:
+                return None
+            if pos > len(raw):
+                return None
+            out += raw[start:pos]
+    except IndexError:
+        return None
+    return bytes(out) if found else None
+
+class CacheEntry:
+    """一个缓存响应，keep-alive 与 close 两种形式都预先拼好"""
+
+    __slots__ = ("status", "keep_alive", "close", "head_len", "fetched", "expires")
+
+    def __init__(self, status: int, body: bytes, content_type: bytes, ttl: float):
+        self.status = status
+        self.keep_alive = build_response(status, body, content_type, True)
+        self.close = build_response(status, body, content_type, False)
+        self.head_len = len(self.keep_alive) - len(body)
+        self.fetched = time.monotonic()
+        self.expires = self.fetched + ttl
+
+class DispatchCache:
+    """
+    dispatch 缓存前端
+    只缓存 GET 的 200 响应，其余请求原样转发；ignore_params 中的查询参数（如时间戳）不参与缓存键
+    rewrite_from/rewrite_to 非空且长度相同时，把响应中内嵌的地址（如 query_gateway 的地址）替换为前端地址，
+    使客户端的后续请求同样经过缓存；gateway_port 非0时改写 query_gateway 下发的网关端口，
+    把客户端引向准入控制前端或抓包代理
+    """
+
+    def __init__(self, listen: Tuple[str, int], upstream: Tuple[str, int], ttl: float = 300.0,
+                 stale_ttl: float = 3600.0, binary: Optional[Path] = None, check_interval: float = 2.0,
+                 ignore_params: Optional[List[str]] = None, upstream_timeout: float = 5.0,
+                 max_entries: int = 4096, rewrite_from: str = "", rewrite_to: str = "",
+                 gateway_port: int = 0):
+        self.listen = listen
+        self.upstream = upstream
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.binary = binary
+        self.check_interval = check_interval
+        self.ignore_params = set(ignore_params or [])
+        self.upstream_timeout = upstream_timeout
+        self.max_entries = max_entries
+        self.rewrite = (rewrite_from.encode(), rewrite_to.encode()) if rewrite_from and rewrite_to else None
+        if self.rewrite and len(self.rewrite[0]) != len(self.rewrite[1]):
+            # 长度变化会破坏 protobuf 中的长度前缀
+            print(f"[dispatch-cache] 地址替换要求长度相同，已忽略: {rewrite_from} -> {rewrite_to}")
+            self.rewrite = None
+        self.gateway_port = gateway_port
+
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._binary_stat: Optional[Tuple[int, int, int]] = None
+        self.binary_sha256: Optional[str] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.hit_stats = WaitStats()
+        self.upstream_stats = WaitStats()
+        self.counters: Dict[str, int] = {key: 0 for key in (
+            "connections", "requests", "hits", "misses", "coalesced", "stale", "passthrough",
+            "upstream_errors", "invalidations")}
+
+    # ---- 缓存 ----
+
+    def cache_key(self, target: str) -> str:
+        path, _, query = target.partition("?")
+        if not query:
+            return path
+        if self.ignore_params:
+            params = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in self.ignore_params]
+            query = urlencode(sorted(params))
+        return f"{path}?{query}" if query else path
+
+    def invalidate(self, reason: str = ""):
+        """清空缓存（需在事件循环线程中调用，其他线程请用 call_soon）"""
+        if self._entries:
+            self.counters["invalidations"] += 1
+            print(f"[dispatch-cache] 缓存已失效{('：' + reason) if reason else ''}，丢弃 {len(self._entries)} 项")
+        self._entries.clear()
+
+    def _check_binary(self):
+        """可执行文件的状态变化时重新计算哈希，内容变化则清空缓存"""
+        try:
+            st = os.stat(self.binary)
+            stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            stat = None
+        if stat != self._binary_stat:
+            self._binary_stat = stat
+            sha256 = file_fingerprint(self.binary) if stat else None
+            if sha256 != self.binary_sha256:
+                if self.binary_sha256 is not None:
+                    self.invalidate("dispatch 可执行文件已变化")
+                self.binary_sha256 = sha256
+        self._loop.call_later(self.check_interval, self._check_binary)
+
+    def _store(self, key: str, entry: CacheEntry):
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # 淘汰最早写入的一项（dict 保持插入顺序）
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = entry
+
+    async def _fetch(self, method: str, target: str, headers: bytes = b"",
+                     body: bytes = b"") -> Tuple[int, bytes, bytes]:
+        """向 dispatch 发出一个短连接请求，返回 (状态码, Content-Type, 响应体)"""
+        started = time.perf_counter()
+        host, port = self.upstream
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.upstream_timeout)
+        try:
+            # dispatch 只读取一次请求，因此请求头与请求体一次写出
+            writer.write(f"{method} {target} HTTP/1.1\r\nHost: {host}:{port}\r\n".encode("latin-1")
+                         + headers + b"Connection: close\r\n\r\n" + body)
+            data = await asyncio.wait_for(reader.read(), self.upstream_timeout)
+        finally:
+            writer.close()
+        head, _, payload = data.partition(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        status = int(lines[0].split(b" ", 2)[1])
+        content_type = b"text/plain"
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-type":
+                content_type = value.strip()
+            elif name == b"content-length":
+                payload = payload[:int(value)]
+        self.upstream_stats.add(time.perf_counter() - started)
+        return status, content_type, payload
+
+    def _rewrite_body(self, body: bytes) -> bytes:
+        """dispatch 的响应体为 base64 编码的 protobuf，解码后做等长替换再编码"""
+        old, new = self.rewrite
+        if old in body:
+            return body.replace(old, new)
+        try:
+            raw = base64.b64decode(body, validate=True)
+        except ValueError:
+            return body
+        return base64.b64encode(raw.replace(old, new)) if old in raw else body
+
+    def _rewrite_gateway(self, body: bytes) -> bytes:
+        try:
+            raw = base64.b64decode(body, validate=True)
+        except ValueError:
+            return body
+        rewritten = rewrite_gateway_port(raw, self.gateway_port)
+        return base64.b64encode(rewritten) if rewritten is not None else body
+
+    async def _fill(self, key: str, target: str) -> CacheEntry:
+        status, content_type, body = await self._fetch("GET", target)
+        if self.rewrite and status == 200:
+            body = self._rewrite_body(body)
+        if self.gateway_port and status == 200 and target.partition("?")[0] == "/query_gateway":
+            body = self._rewrite_gateway(body)
+        entry = CacheEntry(status, body, content_type, self.ttl)
+        if status == 200:
+            self._store(key, entry)
+        return entry
+
+    async def _miss(self, key: str, target: str, entry: Optional[CacheEntry]) -> CacheEntry:
+        """未命中或已过期：回源，同一键的并发请求只回源一次"""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            # 同一键已有请求在进行，共享其结果
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(pending)
+        self.counters["misses"] += 1
+        pending = self._inflight[key] = self._loop.create_future()
+        try:
+            fresh = await self._fill(key, target)
+            pending.set_result(fresh)
+            return fresh
+        except Exception as e:
+            self.counters["upstream_errors"] += 1
+            if entry is not None and entry.expires + self.stale_ttl > time.monotonic():
+                self.counters["stale"] += 1
+                pending.set_result(entry)
+                return entry
+            error = CacheEntry(502, f"dispatch unavailable: {e}".encode(), b"text/plain", 0)
+            pending.set_result(error)
+            return error
+        finally:
+            del self._inflight[key]
+
+    # ---- 客户端连接 ----
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.counters["connections"] += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                except asyncio.LimitOverrunError:
+                    writer.write(build_response(431, b"", keep_alive=False))
+                    return
+                started = time.perf_counter()
+                self.counters["requests"] += 1
+                request_line, _, header_block = head.partition(b"\r\n")
+                try:
+                    method, target, version = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    writer.write(build_response(400, b"", keep_alive=False))
+                    return
+                lowered = header_block.lower()
+                if version == "HTTP/1.0":
+                    keep_alive = b"connection: keep-alive" in lowered
+                else:
+                    keep_alive = b"connection: close" not in lowered
+
+                if method in ("GET", "HEAD"):
+                    key = self.cache_key(target)
+                    entry = self._entries.get(key)
+                    hit = entry is not None and entry.expires > time.monotonic()
+                    if hit:
+                        self.counters["hits"] += 1
+                    else:
+                        entry = await self._miss(key, target, entry)
+                    response = entry.keep_alive if keep_alive else entry.close
+                    writer.write(response[:entry.head_len] if method == "HEAD" else response)
+                    if hit:
+                        self.hit_stats.add(time.perf_counter() - started)
+                else:
+                    response = await self._passthrough(method, target, lowered, header_block, reader, keep_alive)
+                    writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def _passthrough(self, method: str, target: str, lowered: bytes, header_block: bytes,
+                           reader: asyncio.StreamReader, keep_alive: bool) -> bytes:
+        """不缓存的请求原样转发，请求体只支持 Content-Length"""
+        self.counters["passthrough"] += 1
+        length = 0
+        content_type = b""
+        for line, original in zip(lowered.split(b"\r\n"), header_block.split(b"\r\n")):
+            if line.startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+            elif line.startswith(b"content-type:"):
+                content_type = original + b"\r\n"
+        body = await reader.readexactly(length) if length else b""
+        if length:
+            content_type += f"Content-Length: {length}\r\n".encode("ascii")
+        try:
+            status, response_type, payload = await self._fetch(method, target, content_type, body)
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            self.counters["upstream_errors"] += 1
+            return build_response(502, f"dispatch unavailable: {e}".encode(), keep_alive=keep_alive)
+        return build_response(status, payload, response_type, keep_alive)
+
+    # ---- 运行与统计 ----
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self.binary is not None:
+            self._check_binary()
+        self._server = await asyncio.start_server(self._handle_client, *self.listen, backlog=1024)
+        self.listen = self._server.sockets[0].getsockname()[:2]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> threading.Thread:
+        """在后台线程的独立事件循环中运行，监听失败时抛出异常"""
+        return start_server_thread(self, "dispatch-cache")
+
+    def call_soon(self, func, *args):
+        """从其他线程安全地调用（如 invalidate）"""
+        if self._loop:
+            self._loop.call_soon_threadsafe(func, *args)
+        else:
+            func(*args)
+
+    def metrics(self) -> Dict[str, Any]:
+        """命中率、命中时的处理耗时与回源耗时（可从任意线程调用）"""
+        return call_in_loop(self._loop, self._collect_metrics)
+
+    def _collect_metrics(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+        return {
+            "entries": len(self._entries),
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+            "hit_p50_us": self.hit_stats.percentile(0.50) * 1e6,
+            "hit_p99_us": self.hit_stats.percentile(0.99) * 1e6,
+            "upstream_p50_ms": self.upstream_stats.percentile(0.50) * 1000,
+            "upstream_p99_ms": self.upstream_stats.percentile(0.99) * 1000,
+            "binary_sha256": self.binary_sha256,
+            **self.counters
+        }
+
+def print_dispatch_cache_metrics(metrics: Dict[str, Any]) -> None:
+    """打印 dispatch 缓存统计"""
+    print(f"[dispatch-cache] 请求 {metrics['requests']} 命中率 {metrics['hit_rate']:.1%} "
+          f"(命中 {metrics['hits']} 回源 {metrics['misses']} 合并 {metrics['coalesced']} "
+          f"过期返回 {metrics['stale']} 回源失败 {metrics['upstream_errors']}) 缓存 {metrics['entries']} 项 "
+          f"命中耗时p50/p99 {metrics['hit_p50_us']:.0f}/{metrics['hit_p99_us']:.0f}us "
+          f"回源p50 {metrics['upstream_p50_ms']:.1f}ms")
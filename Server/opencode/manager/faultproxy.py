@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服网络故障注入代理
+在客户端与各服务之间插入基于 asyncio 的TCP/HTTP代理，注入延迟与抖动、带宽限制、
+随机重置、分段写入，以及按 cmd_id 丢弃游戏封包
+
+License: GNU V3 LICENSE
+"""
+
+import asyncio
+import collections
+import json
+import random
+import socket
+import struct
+import time
+from typing import Dict, Any, List, Optional
+
+from agent import parse_address
+from protocol import PacketReader
+
+# 每个方向排队等待送达的数据上限，超出后暂停读取来源，使带宽限制能反压到发送方
+MAX_PENDING_BYTES = 256 * 1024
+
+def sample_delay(rng: random.Random, latency_ms: float, jitter: Optional[Dict[str, Any]]) -> float:
+    """按配置的分布采样单个数据块的延迟（秒）"""
+    delay = latency_ms
+    if jitter:
+        dist = jitter.get("dist", "uniform")
+        scale = float(jitter.get("ms", 0))
+        if dist == "uniform":
+            delay += rng.uniform(-scale, scale)
+        elif dist == "normal":
+            delay += rng.gauss(0, scale)
+        elif dist == "exponential":
+            delay += rng.expovariate(1.0 / scale) if scale > 0 else 0
+        elif dist == "pareto":
+            # 长尾抖动，alpha 越小尾部越重
+            delay += scale * (rng.paretovariate(float(jitter.get("alpha", 2.0))) - 1)
+        else:
+            raise ValueError(f"未知的抖动分布: {dist}")
+    return max(0.0, delay) / 1000.0
+
+class _Direction:
+    """单向数据通道：保证延迟注入后数据仍按序送达，并模拟带宽限制"""
+
+    def __init__(self, route: "FaultRoute", writer: asyncio.StreamWriter, name: str):
+        self.route = route
+        self.writer = writer
+        self.name = name
+        # 元素为 (送达时刻, 数据)，None 表示发送结束
+        self.queue: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue()
+        self.pending_bytes = 0
+        self.drained = asyncio.Event()
+        self.closed = False
+        self.last_delivery = 0.0
+        self.link_free_at = 0.0
+        # 未配置延迟类故障时直接写出，避免额外的队列调度开销
+        self.immediate = not (route.latency_ms or route.jitter or route.bytes_per_second
+                              or route.partial_write_rate)
+        self.task = None if self.immediate else asyncio.ensure_future(self._deliver())
+
+    async def send(self, data: bytes):
+        if not self.immediate:
+            while self.pending_bytes >= MAX_PENDING_BYTES and not self.closed:
+                self.drained.clear()
+                await self.drained.wait()
+            if self.closed:
+                raise ConnectionResetError("对端已断开")
+            self.pending_bytes += len(data)
+            self._schedule(data)
+            return
+        self.writer.write(data)
+        await self.writer.drain()
+        self.route.stats[f"bytes_{self.name}"] += len(data)
+
+    def _schedule(self, data: bytes):
+        route = self.route
+        now = time.monotonic()
+        pieces = [data]
+        if route.partial_write_rate and len(data) > 1 and route.rng.random() < route.partial_write_rate:
+            # 拆分为若干小段分别送达，验证对端的粘包/半包处理
+            cuts = sorted(route.rng.sample(range(1, len(data)), min(len(data) - 1, route.rng.randint(1, 4))))
+            pieces = [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+            route.stats["partial_writes"] += 1
+        for index, piece in enumerate(pieces):
+            deliver_at = now + sample_delay(route.rng, route.latency_ms, route.jitter)
+            if index:
+                deliver_at += index * route.rng.uniform(0.001, 0.02)
+            # 不允许乱序：不早于上一块
+            deliver_at = max(deliver_at, self.last_delivery)
+            if route.bytes_per_second:
+                start = max(deliver_at, self.link_free_at)
+                self.link_free_at = start + len(piece) / route.bytes_per_second
+                deliver_at = self.link_free_at
+            self.last_delivery = deliver_at
+            self.queue.put_nowait((deliver_at, piece))
+
+    def close(self):
+        """送完已排队的数据后关闭"""
+        if self.closed:
+            return
+        if self.immediate:
+            self.closed = True
+            self.writer.close()
+        else:
+            self.queue.put_nowait(None)
+
+    def abort(self):
+        """丢弃未送达的数据并立即结束（连接已被重置）"""
+        self.closed = True
+        self.drained.set()
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _deliver(self):
+        try:
+            while True:
+                item = await self.queue.get()
+                if item is None:
+                    break
+                deliver_at, data = item
+                wait = deliver_at - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.writer.write(data)
+                await self.writer.drain()
+                self.route.stats[f"bytes_{self.name}"] += len(data)
+                self.pending_bytes -= len(data)
+                if self.pending_bytes < MAX_PENDING_BYTES:
+                    self.drained.set()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.closed = True
+            self.drained.set()
+            self.writer.close()
+
+class FaultRoute:
+    """一条代理路由及其故障配置"""
+
+    def __init__(self, config: Dict[str, Any], seed: Optional[int] = None):
+        self.listen = parse_address(config["listen"])
+        self.upstream = parse_address(config["upstream"])
+        self.mode = config.get("mode", "tcp")
+        self.latency_ms = float(config.get("latency_ms", 0))
+        self.jitter = config.get("jitter")
+        self.bytes_per_second = float(config.get("bandwidth_kbps", 0)) * 1024 / 8
+        self.reset_rate = float(config.get("reset_rate", 0))
+        self.partial_write_rate = float(config.get("partial_write_rate", 0))
+        self.http_error_rate = float(config.get("http_error_rate", 0))
+        self.drop_cmd_ids = {int(cmd_id): float(p) for cmd_id, p in (config.get("drop_cmd_ids") or {}).items()}
+        self.rng = random.Random(seed)
+        self.stats = collections.Counter()
+        self.dropped_by_cmd = collections.Counter()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, *self.listen)
+        self.listen = self._server.sockets[0].getsockname()[:2]
+        return self
+
+    def close(self):
+        if self._server:
+            self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["connections"] += 1
+        if self.mode == "http" and self.http_error_rate and self.rng.random() < self.http_error_rate:
+            # 直接返回503，模拟服务端过载
+            self.stats["http_errors"] += 1
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return
+        try:
+            up_reader, up_writer = await asyncio.open_connection(*self.upstream)
+        except OSError:
+            self.stats["upstream_errors"] += 1
+            writer.close()
+            return
+
+        to_upstream = _Direction(self, up_writer, "up")
+        to_client = _Direction(self, writer, "down")
+        framed = self.mode == "gameserver" and self.drop_cmd_ids
+
+        async def pump(src: asyncio.StreamReader, direction: _Direction):
+            frames = PacketReader() if framed else None
+            try:
+                while True:
+                    data = await src.read(65536)
+                    if not data:
+                        break
+                    if self.reset_rate and self.rng.random() < self.reset_rate:
+                        self.stats["resets"] += 1
+                        self._reset(writer)
+                        self._reset(up_writer)
+                        to_upstream.abort()
+                        to_client.abort()
+                        return
+                    if frames is not None:
+                        data = self._filter_frames(frames, data)
+                        if not data:
+                            continue
+                    await direction.send(data)
+            except ValueError:
+                # 封包魔数错误，无法再按帧解析，直接断开
+                self.stats["bad_frames"] += 1
+            except (ConnectionError, OSError):
+                pass
+            direction.close()
+
+        await asyncio.gather(pump(reader, to_upstream), pump(up_reader, to_client))
+        # 被重置的方向其送达任务已取消，这里只等待正常结束的方向
+        await asyncio.gather(*(d.task for d in (to_upstream, to_client) if d.task), return_exceptions=True)
+
+    def _filter_frames(self, frames: PacketReader, data: bytes) -> bytes:
+        """按 cmd_id 丢弃封包，未完整的封包留在缓冲区等待后续数据"""
+        kept = []
+        for cmd_id, packet in frames.feed(data):
+            p = self.drop_cmd_ids.get(cmd_id)
+            if p is not None and self.rng.random() < p:
+                self.stats["dropped_frames"] += 1
+                self.dropped_by_cmd[cmd_id] += 1
+                continue
+            kept.append(packet)
+        return b"".join(kept)
+
+    @staticmethod
+    def _reset(writer: asyncio.StreamWriter):
+        """以RST方式中断连接"""
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            except OSError:
+                pass
+        writer.transport.abort()
+
+    def describe(self) -> str:
+        host, port = self.listen
+        up_host, up_port = self.upstream
+        return f"{host}:{port} -> {up_host}:{up_port} ({self.mode})"
+
+    def report(self) -> Dict[str, Any]:
+        return {"route": self.describe(), **dict(self.stats),
+                "dropped_by_cmd": dict(self.dropped_by_cmd)}
+
+def load_fault_routes(path: Optional[str], default_routes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """读取故障配置文件（JSON，包含 routes 列表），未指定时使用默认配置"""
+    if not path:
+        return default_routes
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["routes"] if isinstance(data, dict) else data
+
+def run_fault_proxy(routes: List[Dict[str, Any]], seed: Optional[int] = None, report_interval: float = 30.0):
+    """命令行入口：运行全部路由直到中断"""
+    async def main():
+        active = []
+        for index, config in enumerate(routes):
+            route = await FaultRoute(config, None if seed is None else seed + index).start()
+            active.append(route)
+            print(f"[fault] {route.describe()}")
+        try:
+            while True:
+                await asyncio.sleep(report_interval)
+                for route in active:
+                    print(f"[fault] {route.report()}")
+        finally:
+            for route in active:
+                route.close()
+                print(f"[fault] {route.report()}")
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服前端接入层
+在单连接 gameserver 之前提供准入控制：按IP令牌桶限速、有界FIFO等待队列，
+后端空闲时立即将排队连接转交，并统计队列深度与等待时间
+
+License: GNU V3 LICENSE
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+def start_server_thread(server, name: Optional[str] = None, timeout: float = 10.0) -> threading.Thread:
+    """
+    在后台线程的独立事件循环中运行 server（需提供 start/serve_forever）
+    启动失败（如端口被占用）时在调用方线程重新抛出原异常
+    """
+    started: concurrent.futures.Future = concurrent.futures.Future()
+
+    def run():
+        async def main():
+            try:
+                await server.start()
+            except BaseException as e:
+                started.set_exception(e)
+                return
+            started.set_result(None)
+            await server.serve_forever()
+        asyncio.run(main())
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    try:
+        started.result(timeout)
+    except concurrent.futures.TimeoutError:
+        raise TimeoutError(f"{timeout:.0f} 秒内未完成启动") from None
+    return thread
+
+def call_in_loop(loop: Optional[asyncio.AbstractEventLoop], func, *args, timeout: float = 5.0):
+    """在 loop 所在线程执行 func 并返回结果，用于从其他线程读取事件循环独占的状态"""
+    if loop is None or loop.is_closed() or not loop.is_running():
+        return func(*args)
+    try:
+        if asyncio.get_running_loop() is loop:
+            return func(*args)
+    except RuntimeError:
+        pass
+
+    async def invoke():
+        return func(*args)
+    return asyncio.run_coroutine_threadsafe(invoke(), loop).result(timeout)
+
+class TokenBucket:
+    """令牌桶"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def allow(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+class WaitStats:
+    """等待时间统计，保留最近的样本用于计算分位数"""
+
+    def __init__(self, samples: int = 4096):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = collections.deque(maxlen=samples)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+class AdmissionFrontend:
+    """
+    准入控制前端
+    每个后端同一时刻只服务 backend_capacity 个连接（cyrene-sr gameserver 为1）
+    """
+
+    def __init__(self, listen: Tuple[str, int], backends: List[Tuple[str, int]],
+                 rate: float = 2.0, burst: float = 5.0, queue_size: int = 64,
+                 queue_timeout: float = 120.0, backend_capacity: int = 1,
+                 backend_retry: float = 5.0):
+        self.listen = listen
+        self.rate = rate
+        self.burst = burst
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.backend_capacity = backend_capacity
+        self.backend_retry = backend_retry
+
+        self._buckets: "collections.OrderedDict[str, TokenBucket]" = collections.OrderedDict()
+        self._waiters: "collections.deque[asyncio.Future]" = collections.deque()
+        # 后端 -> 当前连接数；空闲槽位队列中每个元素代表一个可用槽位
+        self._backends: Dict[Tuple[str, int], int] = {}
+        self._free_slots: "collections.deque[Tuple[str, int]]" = collections.deque()
+        self._configured: set = set()
+        self._draining: set = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.wait_stats = WaitStats()
+        self.counters = collections.Counter()
+        self.max_queue_depth = 0
+        self.set_backends(backends)
+
+    # ---- 后端管理 ----
+
+    def set_backends(self, backends: List[Tuple[str, int]]):
+        """更新后端列表，新增后端立即可用，移除的后端在当前连接结束后下线"""
+        wanted = set(backends)
+        self._configured = wanted
+        for backend in wanted - set(self._backends):
+            self._backends[backend] = 0
+            self._draining.discard(backend)
+            for _ in range(self.backend_capacity):
+                self._release_slot(backend, new=True)
+        for backend in set(self._backends) - wanted:
+            self.drain(backend)
+
+    def drain(self, backend: Tuple[str, int]):
+        """停止向后端分配新连接"""
+        if backend in self._backends:
+            self._draining.add(backend)
+            if self._backends[backend] == 0:
+                self._remove_backend(backend)
+
+    def _restore_backend(self, backend: Tuple[str, int]):
+        """
+        故障后端冷却结束后恢复分配（期间若已被移出配置则忽略）
+        故障时仍有连接的后端处于排空状态而未被移除，此时取消排空并补回空闲槽位
+        """
+        if backend not in self._configured:
+            return
+        if backend not in self._backends:
+            self._backends[backend] = 0
+        elif backend in self._draining:
+            self._draining.discard(backend)
+        else:
+            return
+        idle = self.backend_capacity - self._backends[backend] - self._free_slots.count(backend)
+        for _ in range(idle):
+            self._release_slot(backend, new=True)
+
+    def backend_load(self) -> Dict[str, int]:
+        """各后端当前承载的连接数"""
+        return {f"{host}:{port}": active for (host, port), active in self._backends.items()}
+
+    def _remove_backend(self, backend: Tuple[str, int]):
+        self._backends.pop(backend, None)
+        self._draining.discard(backend)
+        self._free_slots = collections.deque(b for b in self._free_slots if b != backend)
+
+    def _release_slot(self, backend: Tuple[str, int], new: bool = False):
+        """归还后端槽位，有排队连接时直接转交给队首"""
+        if not new:
+            self._backends[backend] -= 1
+        if backend in self._draining:
+            if self._backends.get(backend) == 0:
+                self._remove_backend(backend)
+            return
+        if backend not in self._backends:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._backends[backend] += 1
+                waiter.set_result(backend)
+                return
+        self._free_slots.append(backend)
+
+    def _acquire_slot(self) -> Optional[Tuple[str, int]]:
+        while self._free_slots:
+            backend = self._free_slots.popleft()
+            if backend in self._backends and backend not in self._draining:
+                self._backends[backend] += 1
+                return backend
+        return None
+
+    # ---- 准入控制 ----
+
+    def _allow(self, ip: str) -> bool:
+        now = time.monotonic()
+        bucket = self._buckets.get(ip)
+        if bucket is None:
+            bucket = self._buckets[ip] = TokenBucket(self.rate, self.burst)
+            # 限制记录的IP数量，淘汰最久未出现的
+            if len(self._buckets) > 65536:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(ip)
+        return bucket.allow(now)
+
+    async def _obtain_backend(self) -> Optional[Tuple[str, int]]:
+        """获取空闲后端，没有时进入等待队列；队列已满或超时返回None"""
+        backend = self._acquire_slot()
+        if backend is not None:
+            return backend
+        if len(self._waiters) >= self.queue_size:
+            self.counters["rejected_full"] += 1
+            return None
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            self._abandon_waiter(waiter)
+            return None
+        except asyncio.CancelledError:
+            self._abandon_waiter(waiter)
+            raise
+
+    def _abandon_waiter(self, waiter: asyncio.Future):
+        """放弃排队：移出等待队列，若已被分配后端则归还槽位"""
+        if waiter.done() and not waiter.cancelled():
+            self._release_slot(waiter.result())
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername") or ("?", 0)
+        self.counters["connections"] += 1
+        if not self._allow(peer[0]):
+            self.counters["rejected_rate"] += 1
+            writer.close()
+            return
+
+        # 后端连接失败时将其暂时摘除，并重新获取其他后端
+        queued_at = time.monotonic()
+        while True:
+            backend = await self._obtain_backend()
+            if backend is None:
+                writer.close()
+                return
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_connection(*backend)
+                break
+            except OSError:
+                self.counters["backend_errors"] += 1
+                self._backends[backend] -= 1
+                self._draining.add(backend)
+                if self._backends[backend] == 0:
+                    self._remove_backend(backend)
+                self._loop.call_later(self.backend_retry, self._restore_backend, backend)
+        self.wait_stats.add(time.monotonic() - queued_at)
+
+        self.counters["admitted"] += 1
+        await self._proxy(reader, writer, upstream_reader, upstream_writer, backend)
+
+    async def _proxy(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                     upstream_reader: asyncio.StreamReader, upstream_writer: asyncio.StreamWriter,
+                     backend: Tuple[str, int]):
+        """双向转发，任一方向结束后归还后端槽位"""
+        async def pipe(src: asyncio.StreamReader, dst: asyncio.StreamWriter):
+            try:
+                while True:
+                    data = await src.read(65536)
+                    if not data:
+                        break
+                    dst.write(data)
+                    await dst.drain()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                dst.close()
+
+        try:
+            await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+        finally:
+            self._release_slot(backend)
+
+    # ---- 运行与统计 ----
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_client, *self.listen, backlog=1024)
+        self.listen = self._server.sockets[0].getsockname()[:2]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> threading.Thread:
+        """在后台线程的独立事件循环中运行，监听失败时抛出异常"""
+        return start_server_thread(self, "frontend")
+
+    def call_soon(self, func, *args):
+        """从其他线程安全地调用（如更新后端列表）"""
+        if self._loop:
+            self._loop.call_soon_threadsafe(func, *args)
+        else:
+            func(*args)
+
+    def metrics(self) -> Dict[str, Any]:
+        """返回队列与准入统计（可从任意线程调用，统计在事件循环线程中生成）"""
+        return call_in_loop(self._loop, self._collect_metrics)
+
+    def _collect_metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": sum(1 for w in self._waiters if not w.done()),
+            "max_queue_depth": self.max_queue_depth,
+            "wait_avg_ms": self.wait_stats.total / self.wait_stats.count * 1000 if self.wait_stats.count else 0.0,
+            "wait_p50_ms": self.wait_stats.percentile(0.50) * 1000,
+            "wait_p99_ms": self.wait_stats.percentile(0.99) * 1000,
+            "wait_max_ms": self.wait_stats.max * 1000,
+            "active": sum(self._backends.values()),
+            "backends": self.backend_load(),
+            **dict(self.counters)
+        }
+
+def print_frontend_metrics(metrics: Dict[str, Any]) -> None:
+    """打印前端统计"""
+    print(f"[frontend] 队列 {metrics['queue_depth']} (峰值 {metrics['max_queue_depth']}) "
+          f"活跃 {metrics['active']} 放行 {metrics.get('admitted', 0)} "
+          f"限速拒绝 {metrics.get('rejected_rate', 0)} 队满拒绝 {metrics.get('rejected_full', 0)} "
+          f"超时 {metrics.get('timeouts', 0)} 等待p50/p99 "
+          f"{metrics['wait_p50_ms']:.0f}/{metrics['wait_p99_ms']:.0f}ms")
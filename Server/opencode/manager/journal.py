@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服生命周期日志
+记录状态变化、进程退出码、重启决策与探测失败，追加写入本地 SQLite 文件；
+记录时只放入内存队列，由后台线程按批提交（group commit），管理器线程不做同步磁盘写入。
+每次管理器运行为一个会话，统计在线时长时以会话为边界，异常退出的会话以最后一次提交时间为结束
+
+License: GNU V3 LICENSE
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+# 计入在线时长的状态（DEGRADED 进程仍存活，单独统计）
+UP_STATUSES = ("running", "degraded")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    started REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    ended REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    service TEXT NOT NULL,
+    event TEXT NOT NULL,
+    status TEXT,
+    exit_code INTEGER,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS events_service ON events (service, ts);
+CREATE INDEX IF NOT EXISTS events_kind ON events (event, service, ts);
+CREATE INDEX IF NOT EXISTS sessions_time ON sessions (started, last_seen);
+"""
+
+class LifecycleJournal:
+    """
+    生命周期日志写入端
+    record() 只追加到内存队列；后台线程每 flush_interval 秒或积累 batch_size 条时在一个事务中提交
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, batch_size: int = 256,
+                 heartbeat: float = 10.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.heartbeat = heartbeat
+        self.batches = 0
+        self.rows_written = 0
+        self._pending: List[Tuple] = []
+        self._cond = threading.Condition()
+        self._db_lock = threading.Lock()
+        self._closing = False
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        now = time.time()
+        with self._db:
+            self.session_id = self._db.execute(
+                "INSERT INTO sessions (pid, started, last_seen) VALUES (?, ?, ?)", (os.getpid(), now, now)
+            ).lastrowid
+        self._last_commit = now
+        self._thread = threading.Thread(target=self._writer, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, service_name: str, event: str, status: Optional[str] = None,
+               exit_code: Optional[int] = None, **detail):
+        """追加一条事件，不进行磁盘操作"""
+        row = (self.session_id, time.time(), service_name, event, status, exit_code,
+               json.dumps(detail, ensure_ascii=False) if detail else None)
+        with self._cond:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                if not self._closing and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                rows, self._pending = self._pending, []
+                closing = self._closing
+            if rows or closing or time.time() - self._last_commit >= self.heartbeat:
+                self._commit(rows, ended=closing)
+            if closing:
+                return
+
+    def _commit(self, rows: List[Tuple], ended: bool = False):
+        """在一个事务中写入一批事件并更新会话的最后存活时间"""
+        now = time.time()
+        try:
+            with self._db_lock, self._db:
+                if rows:
+                    self._db.executemany(
+                        "INSERT INTO events (session_id, ts, service, event, status, exit_code, detail) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                    )
+                self._db.execute("UPDATE sessions SET last_seen = ?, ended = ? WHERE id = ?",
+                                 (now, now if ended else None, self.session_id))
+        except sqlite3.Error as e:
+            print(f"写入生命周期日志失败（丢弃 {len(rows)} 条）: {e}")
+            return
+        self._last_commit = now
+        if rows:
+            self.batches += 1
+            self.rows_written += len(rows)
+
+    def maintain(self, retention: Optional[float] = None) -> int:
+        """
+        数据库维护：删除结束早于保留期（秒）的会话及其事件，截断 WAL 文件并更新查询统计
+        按整个会话删除，保留下来的会话在线时长统计不受影响；返回删除的事件数
+        """
+        removed = 0
+        with self._db_lock:
+            if retention:
+                cutoff = time.time() - retention
+                with self._db:
+                    stale = "SELECT id FROM sessions WHERE COALESCE(ended, last_seen) < ? AND id != ?"
+                    removed = self._db.execute(f"DELETE FROM events WHERE session_id IN ({stale})",
+                                               (cutoff, self.session_id)).rowcount
+                    self._db.execute(f"DELETE FROM sessions WHERE id IN ({stale})", (cutoff, self.session_id))
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._db.execute("PRAGMA optimize")
+        return removed
+
+    def close(self):
+        """提交剩余事件并结束会话"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        with self._db_lock:
+            self._db.close()
+
+def _connect_readonly(path: str) -> Optional[sqlite3.Connection]:
+    db_path = Path(path)
+    if not db_path.exists():
+        return None
+    return sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True)
+
+def crash_history(path: str, service: Optional[str] = None, since: Optional[float] = None,
+                  until: Optional[float] = None, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+    """按时间倒序返回异常退出记录"""
+    conn = _connect_readonly(path)
+    if conn is None:
+        return []
+    sql = "SELECT ts, service, exit_code, detail FROM events WHERE event = 'crash' AND ts >= ? AND ts <= ?"
+    params: List[Any] = [since or 0.0, until if until is not None else float("inf")]
+    if service:
+        sql += " AND service = ?"
+        params.append(service)
+    sql += " ORDER BY ts DESC"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return [dict({"ts": ts, "service": name, "exit_code": code}, **json.loads(detail or "{}"))
+            for ts, name, code, detail in rows]
+
+def service_report(path: str, service: Optional[str] = None, since: Optional[float] = None,
+                   until: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    统计各服务在时间窗口内的在线时长、可用率、启动/崩溃/重启次数、MTBF 与平均恢复时间
+    可用率的分母为管理器会话覆盖的时间，管理器未运行的时段不计入
+    """
+    conn = _connect_readonly(path)
+    if conn is None:
+        return []
+    now = time.time()
+    window_start = since or 0.0
+    window_end = until if until is not None else now
+    try:
+        sessions = conn.execute(
+            "SELECT id, started, COALESCE(ended, last_seen) FROM sessions "
+            "WHERE started <= ? AND COALESCE(ended, last_seen) >= ? ORDER BY started",
+            (window_end, window_start)
+        ).fetchall()
+        if service:
+            services = [service]
+        else:
+            services = [row[0] for row in conn.execute("SELECT DISTINCT service FROM events ORDER BY service")]
+        reports = []
+        for name in services:
+            report = {"service": name, "observed": 0.0, "up": 0.0, "degraded": 0.0,
+                      "recoveries": []}
+            for session_id, started, ended in sessions:
+                _accumulate_session(conn, report, name, session_id, started, ended, window_start, window_end)
+            counts = dict(conn.execute(
+                "SELECT event, COUNT(*) FROM events WHERE service = ? AND ts >= ? AND ts <= ? "
+                "AND event IN ('spawn', 'crash', 'restart', 'probe_failed') GROUP BY event",
+                (name, window_start, window_end)
+            ).fetchall())
+            recoveries = report.pop("recoveries")
+            report.update(
+                starts=counts.get("spawn", 0),
+                crashes=counts.get("crash", 0),
+                restarts=counts.get("restart", 0),
+                probe_failures=counts.get("probe_failed", 0),
+                availability=report["up"] / report["observed"] if report["observed"] else None,
+                mtbf=report["up"] / counts["crash"] if counts.get("crash") else None,
+                mttr=sum(recoveries) / len(recoveries) if recoveries else None
+            )
+            reports.append(report)
+        return reports
+    finally:
+        conn.close()
+
+def _accumulate_session(conn: sqlite3.Connection, report: Dict[str, Any], service: str, session_id: int,
+                        started: float, ended: float, window_start: float, window_end: float):
+    """按一个会话内的状态变化累加在线时长；会话开始时所有服务均为停止状态"""
+    rows = conn.execute(
+        "SELECT ts, event, status FROM events WHERE service = ? AND session_id = ? "
+        "AND event IN ('status', 'crash') AND ts <= ? ORDER BY ts, id",
+        (service, session_id, window_end)
+    ).fetchall()
+    lo = max(started, window_start)
+    hi = min(ended, window_end)
+    if hi > lo:
+        report["observed"] += hi - lo
+    status = "stopped"
+    cursor = started
+    crashed_at = None
+    for ts, event, new_status in rows + [(ended, "end", None)]:
+        ts = min(ts, ended)
+        span = min(ts, hi) - max(cursor, lo)
+        if span > 0 and status in UP_STATUSES:
+            report["up"] += span
+            if status == "degraded":
+                report["degraded"] += span
+        cursor = max(cursor, ts)
+        if event == "crash":
+            crashed_at = ts
+        elif event == "status":
+            status = new_status
+            if status == "running" and crashed_at is not None:
+                if ts >= window_start:
+                    report["recoveries"].append(ts - crashed_at)
+                crashed_at = None
+            elif status == "stopped":
+                crashed_at = None
+
+def print_journal_report(reports: List[Dict[str, Any]], crashes: List[Dict[str, Any]]):
+    """打印服务可用性统计与最近的崩溃记录"""
+    from datetime import datetime
+
+    def duration(seconds: Optional[float]) -> str:
+        if seconds is None:
+            return "-"
+        if seconds >= 3600:
+            return f"{seconds / 3600:.1f}h"
+        if seconds >= 60:
+            return f"{seconds / 60:.1f}m"
+        return f"{seconds:.1f}s"
+
+    if not reports:
+        print("生命周期日志中没有记录")
+        return
+    print(f"{'服务':<25}{'在线':>9}{'可用率':>9}{'启动':>6}{'崩溃':>6}{'重启':>6}{'探测失败':>9}{'MTBF':>9}{'MTTR':>9}")
+    print("-" * 87)
+    for r in reports:
+        availability = f"{r['availability'] * 100:.2f}%" if r["availability"] is not None else "-"
+        print(f"{r['service']:<25}{duration(r['up']):>9}{availability:>9}{r['starts']:>6}{r['crashes']:>6}"
+              f"{r['restarts']:>6}{r['probe_failures']:>9}{duration(r['mtbf']):>9}{duration(r['mttr']):>9}")
+    if crashes:
+        print("\n最近的崩溃:")
+        for crash in crashes:
+            stamp = datetime.fromtimestamp(crash["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+            phase = "启动阶段" if crash.get("phase") == "startup" else f"运行 {duration(crash.get('uptime'))} 后"
+            print(f"  {stamp} {crash['service']:<25} 退出码 {crash['exit_code']}（{phase}）")
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服日志归档
+服务输出按段归档：每段分成若干独立压缩的块，压缩在后台进程池中完成；
+SQLite 索引记录每个块的时间范围（稀疏时间索引）以及 cmd_id、日志级别、服务名的倒排表，
+查询时只解压命中的块
+
+块内每行格式：时间戳\\t服务名\\t流\\t内容
+
+License: GNU V3 LICENSE
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+CMD_ID_PATTERN = re.compile(r"cmd_id (\d+)")
+LEVEL_PATTERN = re.compile(r"\b(TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|PANIC)\b")
+LEVEL_ALIASES = {"WARNING": "WARN", "PANIC": "FATAL"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    lines INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    segment_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    key TEXT NOT NULL,
+    block_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_time ON blocks (start_ts, end_ts);
+CREATE INDEX IF NOT EXISTS postings_key ON postings (key, block_id);
+"""
+
+def classify_line(line: str) -> Tuple[Optional[str], Optional[str]]:
+    """提取日志行的级别与 cmd_id"""
+    level_match = LEVEL_PATTERN.search(line)
+    level = LEVEL_ALIASES.get(level_match.group(1), level_match.group(1)) if level_match else None
+    cmd_match = CMD_ID_PATTERN.search(line)
+    return level, cmd_match.group(1) if cmd_match else None
+
+def compress_segment(path: str, records: List[Tuple[float, str, str, str]],
+                     block_lines: int, level: int) -> List[Dict[str, Any]]:
+    """
+    在工作进程中压缩并写出一个段，返回各块的元数据
+    每个块是独立的 zlib 流，可单独定位解压
+    """
+    blocks = []
+    offset = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for start in range(0, len(records), block_lines):
+            chunk = records[start:start + block_lines]
+            keys = set()
+            parts = []
+            for ts, service_name, stream_name, line in chunk:
+                parts.append(f"{ts:.6f}\t{service_name}\t{stream_name}\t{line}\n")
+                keys.add(f"service:{service_name}")
+                line_level, cmd_id = classify_line(line)
+                if line_level:
+                    keys.add(f"level:{line_level}")
+                if cmd_id:
+                    keys.add(f"cmd:{cmd_id}")
+            data = zlib.compress("".join(parts).encode("utf-8"), level)
+            f.write(data)
+            blocks.append({
+                "offset": offset,
+                "length": len(data),
+                "start_ts": chunk[0][0],
+                "end_ts": chunk[-1][0],
+                "keys": sorted(keys),
+            })
+            offset += len(data)
+    os.replace(tmp_path, path)
+    return blocks
+
+class LogArchive:
+    """
+    日志归档写入端，append 可直接注册为 ProcessManager 的输出回调
+    传入调度器时按时间封存段作为周期任务运行，否则使用独立线程
+    """
+
+    def __init__(self, root: str, segment_lines: int = 20000, segment_seconds: float = 300.0,
+                 block_lines: int = 1024, workers: int = 2, compression_level: int = 6, scheduler=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.segment_lines = segment_lines
+        self.segment_seconds = segment_seconds
+        self.block_lines = block_lines
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._buffer: List[Tuple[float, str, str, str]] = []
+        self._segment_started = time.time()
+        self._seq = 0
+        self._pending = []
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._stop = threading.Event()
+        self._scheduler = scheduler
+        if scheduler is not None:
+            scheduler.every("log-seal", min(self.segment_seconds, 5.0), self.seal_if_due, blocking=True)
+        else:
+            threading.Thread(target=self._seal_by_age, daemon=True).start()
+
+    def append(self, service_name: str, stream_name: str, line: str):
+        """追加一行日志"""
+        with self._lock:
+            self._buffer.append((time.time(), service_name, stream_name, line))
+            if len(self._buffer) < self.segment_lines:
+                return
+            records = self._take_locked()
+        self._submit(records)
+
+    def _take_locked(self) -> List[Tuple[float, str, str, str]]:
+        records, self._buffer = self._buffer, []
+        self._segment_started = time.time()
+        return records
+
+    def seal_if_due(self):
+        """当前段超过最长时间时封存"""
+        with self._lock:
+            if not self._buffer or time.time() - self._segment_started < self.segment_seconds:
+                return
+            records = self._take_locked()
+        self._submit(records)
+
+    def _seal_by_age(self):
+        while not self._stop.wait(min(self.segment_seconds, 5.0)):
+            self.seal_if_due()
+
+    def _submit(self, records: List[Tuple[float, str, str, str]]):
+        """将一段日志交给进程池压缩，完成后写入索引"""
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        day = time.strftime("%Y%m%d", time.localtime(records[0][0]))
+        directory = self.root / day
+        directory.mkdir(exist_ok=True)
+        path = directory / f"seg-{int(records[0][0] * 1000)}-{os.getpid()}-{seq}.zlog"
+        future = self._executor.submit(compress_segment, str(path), records,
+                                       self.block_lines, self.compression_level)
+        # 回调在 result() 返回之后才执行，flush 需等待索引写入完成而不只是压缩完成
+        indexed = threading.Event()
+
+        def on_done(f):
+            try:
+                self._index_segment(f, path, records)
+            finally:
+                indexed.set()
+        future.add_done_callback(on_done)
+        with self._lock:
+            self._pending = [event for event in self._pending if not event.is_set()]
+            self._pending.append(indexed)
+
+    def _index_segment(self, future, path: Path, records: List[Tuple[float, str, str, str]]):
+        try:
+            blocks = future.result()
+        except Exception as e:
+            print(f"日志段压缩失败 {path.name}: {e}")
+            return
+        with self._db_lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO segments (path, start_ts, end_ts, lines) VALUES (?, ?, ?, ?)",
+                (str(path.relative_to(self.root)), records[0][0], records[-1][0], len(records))
+            )
+            segment_id = cursor.lastrowid
+            for block in blocks:
+                cursor = self._db.execute(
+                    "INSERT INTO blocks (segment_id, offset, length, start_ts, end_ts) VALUES (?, ?, ?, ?, ?)",
+                    (segment_id, block["offset"], block["length"], block["start_ts"], block["end_ts"])
+                )
+                block_id = cursor.lastrowid
+                self._db.executemany("INSERT INTO postings (key, block_id) VALUES (?, ?)",
+                                     [(key, block_id) for key in block["keys"]])
+
+    def flush(self):
+        """立即封存当前段并等待所有压缩任务完成"""
+        with self._lock:
+            records = self._take_locked() if self._buffer else None
+        if records:
+            self._submit(records)
+        with self._lock:
+            pending = list(self._pending)
+        for indexed in pending:
+            indexed.wait()
+
+    def prune(self, before: float) -> int:
+        """删除结束时间早于 before 的段及其索引，返回删除的段数"""
+        with self._db_lock:
+            rows = self._db.execute("SELECT id, path FROM segments WHERE end_ts < ?", (before,)).fetchall()
+            if not rows:
+                return 0
+            with self._db:
+                for segment_id, _ in rows:
+                    self._db.execute("DELETE FROM postings WHERE block_id IN "
+                                     "(SELECT id FROM blocks WHERE segment_id = ?)", (segment_id,))
+                    self._db.execute("DELETE FROM blocks WHERE segment_id = ?", (segment_id,))
+                    self._db.execute("DELETE FROM segments WHERE id = ?", (segment_id,))
+        for _, path in rows:
+            segment_path = self.root / path
+            try:
+                segment_path.unlink()
+                segment_path.parent.rmdir()
+            except OSError:
+                # 文件已不存在，或同一天的目录中还有其他段
+                pass
+        return len(rows)
+
+    def close(self):
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.cancel("log-seal")
+        self.flush()
+        self._executor.shutdown(wait=True)
+        with self._db_lock:
+            self._db.close()
+
+def query_archive(root: str, since: Optional[float] = None, until: Optional[float] = None,
+                  service: Optional[str] = None, cmd_id: Optional[int] = None,
+                  level: Optional[str] = None, pattern: Optional[str] = None,
+                  limit: Optional[int] = None) -> Iterator[Tuple[float, str, str, str]]:
+    """
+    查询归档日志，按时间顺序返回 (时间戳, 服务名, 流, 内容)
+    先通过索引筛选出时间范围与倒排条件均命中的块，再逐块解压过滤
+    """
+    root_path = Path(root)
+    db_path = root_path / "index.db"
+    if not db_path.exists():
+        return
+    conditions = ["b.end_ts >= ?", "b.start_ts <= ?"]
+    params: List[Any] = [since if since is not None else 0.0, until if until is not None else float("inf")]
+    keys = []
+    if service:
+        keys.append(f"service:{service}")
+    if cmd_id is not None:
+        keys.append(f"cmd:{cmd_id}")
+    if level:
+        level = LEVEL_ALIASES.get(level.upper(), level.upper())
+        keys.append(f"level:{level}")
+    for key in keys:
+        conditions.append("b.id IN (SELECT block_id FROM postings WHERE key = ?)")
+        params.append(key)
+    sql = ("SELECT s.path, b.offset, b.length FROM blocks b JOIN segments s ON s.id = b.segment_id "
+           f"WHERE {' AND '.join(conditions)} ORDER BY b.start_ts, b.id")
+
+    regex = re.compile(pattern) if pattern else None
+    conn = sqlite3.connect(f"file:{db_path.as_posix()}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    emitted = 0
+    for path, offset, length in rows:
+        with open(root_path / path, "rb") as f:
+            f.seek(offset)
+            text = zlib.decompress(f.read(length)).decode("utf-8")
+        for raw in text.splitlines():
+            ts_text, service_name, stream_name, line = raw.split("\t", 3)
+            ts = float(ts_text)
+            if since is not None and ts < since or until is not None and ts > until:
+                continue
+            if service and service_name != service:
+                continue
+            if cmd_id is not None or level:
+                line_level, line_cmd = classify_line(line)
+                if cmd_id is not None and line_cmd != str(cmd_id):
+                    continue
+                if level and line_level != level:
+                    continue
+            if regex and not regex.search(line):
+                continue
+            yield ts, service_name, stream_name, line
+            emitted += 1
+            if limit and emitted >= limit:
+                return
+
+def parse_time_arg(value: Optional[str]) -> Optional[float]:
+    """解析时间参数：相对时间（30m、2h、1d）或 ISO 格式（2024-01-01T12:00:00）"""
+    if not value:
+        return None
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if value[-1] in units and value[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    from datetime import datetime
+    return datetime.fromisoformat(value).timestamp()
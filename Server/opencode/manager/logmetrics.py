@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服日志指标提取
+在服务输出的读取线程中逐行匹配配置的正则，直接累加为计数器与直方图，不保留日志行；
+同一服务适用的全部正则合并为一个带命名分组的正则，每行只匹配一次；
+CPython 的正则引擎对多分支正则会在每个位置逐一尝试各分支，因此先用各正则必需的字面子串
+做一次 in 检查，大部分不相关的行无需进入正则
+
+License: GNU V3 LICENSE
+"""
+
+import bisect
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# 指标正则中的保留分组：label 按取值分别计数，value 为直方图的观测值
+LABEL_GROUP = "label"
+VALUE_GROUP = "value"
+
+_NAMED_GROUP = re.compile(r"\(\?P([<=])(\w+)")
+
+def required_literal(pattern: str, min_length: int = 3) -> Optional[str]:
+    """正则顶层最长的连续字面子串，匹配的行必然包含它；忽略大小写或找不到足够长的子串时返回 None"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    best = current = ""
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            current += chr(value)
+        else:
+            best = max(best, current, key=len)
+            current = ""
+    best = max(best, current, key=len)
+    return best if len(best) >= min_length else None
+
+class _Metric:
+    __slots__ = ("name", "service", "pattern", "buckets", "label_group", "value_group")
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.service = spec.get("service")
+        self.pattern = spec["pattern"]
+        re.compile(self.pattern)  # 单独编译一次，出错时能指出是哪条指标
+        self.buckets = sorted(float(b) for b in spec["buckets"]) if spec.get("buckets") else None
+        self.label_group = None
+        self.value_group = None
+
+class Histogram:
+    """固定桶直方图，counts 比 buckets 多一个溢出桶"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶上界估计分位数，落在溢出桶时返回 inf"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def copy(self) -> "Histogram":
+        other = Histogram(self.buckets)
+        other.counts = list(self.counts)
+        other.sum = self.sum
+        other.count = self.count
+        return other
+
+class LogMetrics:
+    """
+    日志指标提取器，可直接注册为 ProcessManager 的输出回调
+    每行只计入第一个匹配的指标；不同服务的输出在各自的读取线程中调用，计数在锁内更新
+    """
+
+    def __init__(self, specs: Dict[str, Dict[str, Any]]):
+        self.metrics: List[_Metric] = [_Metric(name, spec) for name, spec in specs.items()]
+        # 计数器：{(指标, 服务): {标签: 次数}}，无 label 分组时标签为空字符串
+        self.counters: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.lines = 0
+        self.matched = 0
+        self.started = time.time()
+        self._combined: Dict[str, Optional[Tuple["re.Pattern", Dict[str, _Metric], Optional[Tuple[str, ...]]]]] = {}
+        self._lock = threading.Lock()
+
+    def _compile(self, service_name: str) -> Optional[Tuple["re.Pattern", Dict[str, _Metric], Optional[Tuple[str, ...]]]]:
+        """
+        为某个服务合并全部适用的正则，内部命名分组加前缀避免重名
+        同时收集各正则必需的字面子串用于预筛，任一正则没有可用的子串时不做预筛
+        """
+        parts = []
+        literals: Optional[List[str]] = []
+        by_group: Dict[str, _Metric] = {}
+        for index, metric in enumerate(self.metrics):
+            if metric.service is not None and metric.service != service_name:
+                continue
+            prefix = f"m{index}_"
+            group = f"m{index}"
+            body = _NAMED_GROUP.sub(lambda m: f"(?P{m.group(1)}{prefix}{m.group(2)}", metric.pattern)
+            parts.append(f"(?P<{group}>{body})")
+            compiled = re.compile(metric.pattern)
+            metric.label_group = prefix + LABEL_GROUP if LABEL_GROUP in compiled.groupindex else None
+            metric.value_group = prefix + VALUE_GROUP if VALUE_GROUP in compiled.groupindex and metric.buckets else None
+            by_group[group] = metric
+            literal = required_literal(metric.pattern)
+            if literal is None:
+                literals = None
+            elif literals is not None:
+                literals.append(literal)
+        if not parts:
+            return None
+        return re.compile("|".join(parts)), by_group, tuple(literals) if literals is not None else None
+
+    def __call__(self, service_name: str, stream_name: str, line: str):
+        try:
+            combined = self._combined[service_name]
+        except KeyError:
+            combined = self._combined[service_name] = self._compile(service_name)
+        match = None
+        if combined is not None:
+            literals = combined[2]
+            if literals is None:
+                match = combined[0].search(line)
+            else:
+                for literal in literals:
+                    if literal in line:
+                        match = combined[0].search(line)
+                        break
+        if match is None:
+            with self._lock:
+                self.lines += 1
+            return
+        # 外层分组最后闭合，lastgroup 即为匹配到的指标
+        metric = combined[1][match.lastgroup]
+        key = (metric.name, service_name)
+        label = (match.group(metric.label_group) or "") if metric.label_group else ""
+        with self._lock:
+            self.lines += 1
+            self.matched += 1
+            series = self.counters.get(key)
+            if series is None:
+                series = self.counters[key] = {}
+            series[label] = series.get(label, 0) + 1
+            if metric.value_group:
+                raw = match.group(metric.value_group)
+                if raw:
+                    histogram = self.histograms.get(key)
+                    if histogram is None:
+                        histogram = self.histograms[key] = Histogram(metric.buckets)
+                    histogram.observe(float(raw))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前全部计数的副本，用于计算两次快照之间的速率"""
+        with self._lock:
+            return {
+                "ts": time.time(),
+                "started": self.started,
+                "lines": self.lines,
+                "matched": self.matched,
+                "counters": {key: dict(series) for key, series in self.counters.items()},
+                "histograms": {key: histogram.copy() for key, histogram in self.histograms.items()},
+            }
+
+    def values(self) -> Dict[str, Dict[str, float]]:
+        """告警使用的计数器，格式为 {指标名: {服务名: 累计次数}}"""
+        with self._lock:
+            sample: Dict[str, Dict[str, float]] = {}
+            for (name, service_name), series in self.counters.items():
+                sample.setdefault(name, {})[service_name] = float(sum(series.values()))
+        return sample
+
+def print_log_metrics(current: Dict[str, Any], previous: Optional[Dict[str, Any]] = None,
+                      top: int = 10, names: Optional[Dict[int, str]] = None) -> None:
+    """
+    打印日志指标：每个计数器的累计次数与区间速率，带标签的计数器列出最多的 top 个取值
+    names 为 cmd_id 到消息名的对照表（见 traffic.load_cmd_table），标签为 cmd_id 时显示消息名
+    """
+    if previous is None:
+        # 没有上一次快照时按启动以来的平均速率
+        previous = {"ts": current["started"], "counters": {}}
+    elapsed = max(current["ts"] - previous["ts"], 1e-9)
+    print(f"[log-metrics] 读取 {current['lines']} 行，匹配 {current['matched']} 行，统计区间 {elapsed:.0f}s")
+    for key in sorted(current["counters"]):
+        name, service_name = key
+        series = current["counters"][key]
+        before = previous["counters"].get(key, {})
+        total = sum(series.values())
+        delta = total - sum(before.values())
+        print(f"  {name:<24}{service_name:<24}{total:>10}{delta / elapsed:>10.1f}/s")
+        labels = [label for label in series if label]
+        if labels:
+            labels.sort(key=lambda label: -(series[label] - before.get(label, 0)))
+            for label in labels[:top]:
+                label_delta = series[label] - before.get(label, 0)
+                shown = label
+                if names and label.isdigit() and int(label) in names:
+                    shown = f"{names[int(label)]}({label})"
+                print(f"      {shown:<44}{series[label]:>10}{label_delta / elapsed:>10.1f}/s")
+    for key in sorted(current["histograms"]):
+        histogram = current["histograms"][key]
+        quantiles = "/".join(f"{histogram.quantile(q):g}" for q in (0.5, 0.9, 0.99))
+        print(f"  {key[0]:<24}{key[1]:<24}n={histogram.count} 平均 {histogram.sum / histogram.count:.1f} "
+              f"p50/p90/p99≤{quantiles}")
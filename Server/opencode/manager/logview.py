@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服日志查看组件
+服务输出写入固定容量的环形缓冲区；查看器只绘制可见的行，
+按固定帧间隔批量取入新行，过滤与搜索只作用于行号索引，不重绘全部历史
+
+License: GNU V3 LICENSE
+"""
+
+import collections
+import re
+import threading
+import tkinter as tk
+from typing import List, Optional, Pattern
+
+import customtkinter as ctk
+
+class LogRingBuffer:
+    """
+    线程安全的日志环形缓冲区
+    每行有一个单调递增的序号，写满后覆盖最旧的行
+    """
+
+    def __init__(self, capacity: int = 50000):
+        self.capacity = capacity
+        self._lines: List[Optional[str]] = [None] * capacity
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, line: str):
+        with self._lock:
+            self._lines[self._next_seq % self.capacity] = line
+            self._next_seq += 1
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    @property
+    def first_seq(self) -> int:
+        return max(0, self._next_seq - self.capacity)
+
+    def get(self, seq: int) -> Optional[str]:
+        """按序号取一行，已被覆盖时返回 None"""
+        if seq < self.first_seq or seq >= self._next_seq:
+            return None
+        return self._lines[seq % self.capacity]
+
+    def range(self, start: int, end: int) -> List[str]:
+        """取 [start, end) 区间内仍在缓冲区中的行"""
+        with self._lock:
+            start = max(start, self.first_seq)
+            return [self._lines[seq % self.capacity] for seq in range(start, min(end, self._next_seq))]
+
+class FilteredIndex:
+    """
+    缓冲区上的过滤视图：只保存匹配行的序号
+    新行按批追加判断，切换过滤条件时才整体重建
+    """
+
+    def __init__(self, buffer: LogRingBuffer):
+        self.buffer = buffer
+        self.pattern: Optional[Pattern] = None
+        self.seqs: "collections.deque[int]" = collections.deque()
+        # 视图边界只在 update 时推进，暂停期间视图保持不变
+        self.low = buffer.first_seq
+        self.scanned = buffer.first_seq
+
+    def set_filter(self, pattern: Optional[Pattern]):
+        self.pattern = pattern
+        self.seqs.clear()
+        self.low = self.scanned = self.buffer.first_seq
+        self.update()
+
+    def update(self) -> int:
+        """处理新到达的行并淘汰已被覆盖的序号，返回新增的匹配行数"""
+        end = self.buffer.next_seq
+        first = self.buffer.first_seq
+        start = max(self.scanned, first)
+        self.low = first
+        added = 0
+        if self.pattern is None:
+            # 无过滤时视图即为缓冲区的连续区间，无需保存序号
+            added = end - start
+        else:
+            lines = self.buffer.range(start, end)
+            start = end - len(lines)
+            for offset, line in enumerate(lines):
+                if self.pattern.search(line):
+                    self.seqs.append(start + offset)
+                    added += 1
+            while self.seqs and self.seqs[0] < first:
+                self.seqs.popleft()
+        self.scanned = end
+        return added
+
+    def __len__(self) -> int:
+        if self.pattern is None:
+            return self.scanned - self.low
+        return len(self.seqs)
+
+    def seq_at(self, row: int) -> int:
+        if self.pattern is None:
+            return self.low + row
+        return self.seqs[row]
+
+    def row_of(self, seq: int) -> Optional[int]:
+        """序号对应的行位置，不在视图中时返回 None"""
+        if self.pattern is None:
+            row = seq - self.low
+            return row if 0 <= row < len(self) else None
+        lo, hi = 0, len(self.seqs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.seqs[mid] < seq:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self.seqs) and self.seqs[lo] == seq else None
+
+    def search(self, regex: Pattern, from_row: int, backwards: bool = True) -> Optional[int]:
+        """从 from_row 开始查找下一处匹配，返回行位置"""
+        rows = range(from_row - 1, -1, -1) if backwards else range(from_row + 1, len(self))
+        for row in rows:
+            line = self.buffer.get(self.seq_at(row))
+            if line is not None and regex.search(line):
+                return row
+        return None
+
+class LogViewer(ctk.CTkFrame):
+    """虚拟化日志查看面板，只为可见行创建画布文本项"""
+
+    def __init__(self, parent, buffer: LogRingBuffer, frame_ms: int = 50, height: int = 240,
+                 font_family: str = "Consolas", font_size: int = 11):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.index = FilteredIndex(buffer)
+        self.frame_ms = frame_ms
+        self.font = (font_family, font_size)
+        self.line_height = font_size + 6
+        self.top_row = 0
+        self.follow = True
+        self.paused = False
+        self.highlight_seq: Optional[int] = None
+        self._rendered: List[Optional[str]] = []
+        self._text_items: List[int] = []
+        self._after_id = None
+        self._dirty = True
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self._build_toolbar()
+
+        self.canvas = tk.Canvas(self, height=height, highlightthickness=0, borderwidth=0)
+        self.canvas.grid(row=1, column=0, sticky="nsew", padx=(5, 0), pady=(0, 5))
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", padx=(0, 5), pady=(0, 5))
+        self._highlight = self.canvas.create_rectangle(0, 0, 0, 0, width=0, state="hidden")
+
+        self.canvas.bind("<Configure>", lambda e: self._resize())
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll_rows(-1 if e.delta > 0 else 1, units=3))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.apply_theme()
+        self._schedule()
+
+    def _build_toolbar(self):
+        toolbar = ctk.CTkFrame(self, fg_color="transparent")
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        toolbar.grid_columnconfigure(1, weight=1)
+
+        self.pause_button = ctk.CTkButton(toolbar, text="暂停", width=60, height=26, command=self.toggle_pause)
+        self.pause_button.grid(row=0, column=0, padx=(0, 5))
+
+        self.filter_entry = ctk.CTkEntry(toolbar, placeholder_text="过滤（正则）", height=26)
+        self.filter_entry.grid(row=0, column=1, sticky="ew", padx=5)
+        self.filter_entry.bind("<Return>", lambda e: self.apply_filter())
+
+        self.search_entry = ctk.CTkEntry(toolbar, placeholder_text="查找（正则）", width=160, height=26)
+        self.search_entry.grid(row=0, column=2, padx=5)
+        self.search_entry.bind("<Return>", lambda e: self.find(backwards=True))
+        self.search_entry.bind("<Shift-Return>", lambda e: self.find(backwards=False))
+
+        self.count_label = ctk.CTkLabel(toolbar, text="", font=ctk.CTkFont(size=11), width=110)
+        self.count_label.grid(row=0, column=3, padx=(5, 0))
+
+    def apply_theme(self):
+        dark = ctk.get_appearance_mode() == "Dark"
+        self.canvas.configure(bg="#1A1A1A" if dark else "#FAFAFA")
+        self._fg = "#DDDDDD" if dark else "#2B2B2B"
+        self.canvas.itemconfigure(self._highlight, fill="#3A4F6B" if dark else "#CFE3FA")
+        for item in self._text_items:
+            self.canvas.itemconfigure(item, fill=self._fg)
+
+    # ---- 渲染 ----
+
+    def _visible_rows(self) -> int:
+        return max(1, self.canvas.winfo_height() // self.line_height)
+
+    def _resize(self):
+        rows = self._visible_rows()
+        while len(self._text_items) < rows:
+            y = len(self._text_items) * self.line_height + 2
+            self._text_items.append(self.canvas.create_text(4, y, anchor="nw", font=self.font,
+                                                            fill=self._fg, text=""))
+            self._rendered.append(None)
+        for item in self._text_items[rows:]:
+            self.canvas.itemconfigure(item, text="")
+        del self._text_items[rows:]
+        del self._rendered[rows:]
+        self._dirty = True
+        self._render()
+
+    def _schedule(self):
+        self._after_id = self.after(self.frame_ms, self._tick)
+
+    def _tick(self):
+        """每帧取入新行，只在有变化时重绘可见区域"""
+        if not self.paused:
+            # 以顶行的序号为锚点，旧行被覆盖后视图仍停留在同一内容上
+            anchor = self.index.seq_at(self.top_row) if self.top_row < len(self.index) else None
+            if self.index.update():
+                self._dirty = True
+                if not self.follow and anchor is not None:
+                    row = self.index.row_of(anchor)
+                    self.top_row = row if row is not None else 0
+            if self.follow:
+                self.top_row = max(0, len(self.index) - self._visible_rows())
+        if self._dirty:
+            self._render()
+        self._schedule()
+
+    def _render(self):
+        self._dirty = False
+        total = len(self.index)
+        rows = len(self._text_items)
+        self.top_row = max(0, min(self.top_row, total - rows))
+        for i, item in enumerate(self._text_items):
+            row = self.top_row + i
+            text = self.buffer.get(self.index.seq_at(row)) if row < total else ""
+            text = text or ""
+            if self._rendered[i] != text:
+                self.canvas.itemconfigure(item, text=text)
+                self._rendered[i] = text
+        highlight_row = self.index.row_of(self.highlight_seq) if self.highlight_seq is not None else None
+        if highlight_row is not None and self.top_row <= highlight_row < self.top_row + rows:
+            y = (highlight_row - self.top_row) * self.line_height + 1
+            self.canvas.coords(self._highlight, 0, y, self.canvas.winfo_width(), y + self.line_height)
+            self.canvas.itemconfigure(self._highlight, state="normal")
+        else:
+            self.canvas.itemconfigure(self._highlight, state="hidden")
+        if total:
+            self.scrollbar.set(self.top_row / total, min(1.0, (self.top_row + rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        state = "已暂停 " if self.paused else ""
+        self.count_label.configure(text=f"{state}{total} 行")
+
+    # ---- 交互 ----
+
+    def scroll_rows(self, delta: int, units: int = 1):
+        self.top_row = max(0, self.top_row + delta * units)
+        self.follow = self.top_row + self._visible_rows() >= len(self.index)
+        self._dirty = True
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.top_row = int(float(args[1]) * len(self.index))
+        elif args[0] == "scroll":
+            step = self._visible_rows() if args[2] == "pages" else 1
+            self.top_row = max(0, self.top_row + int(args[1]) * step)
+        self.follow = self.top_row + self._visible_rows() >= len(self.index)
+        self._dirty = True
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.pause_button.configure(text="继续" if self.paused else "暂停")
+        self._dirty = True
+
+    def apply_filter(self):
+        text = self.filter_entry.get().strip()
+        try:
+            pattern = re.compile(text) if text else None
+        except re.error:
+            self.count_label.configure(text="过滤表达式无效")
+            return
+        self.index.set_filter(pattern)
+        self.highlight_seq = None
+        self.follow = True
+        self._dirty = True
+
+    def find(self, backwards: bool = True):
+        text = self.search_entry.get().strip()
+        if not text:
+            return
+        try:
+            regex = re.compile(text)
+        except re.error:
+            self.count_label.configure(text="查找表达式无效")
+            return
+        current = self.index.row_of(self.highlight_seq) if self.highlight_seq is not None else None
+        if current is None:
+            current = len(self.index) if backwards else self.top_row - 1
+        row = self.index.search(regex, current, backwards)
+        if row is None:
+            self.count_label.configure(text="未找到")
+            return
+        self.highlight_seq = self.index.seq_at(row)
+        self.follow = False
+        self.top_row = max(0, row - self._visible_rows() // 2)
+        self._dirty = True
+
+    def destroy(self):
+        if self._after_id:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        super().destroy()
@@ -11,15 +11,34 @@ License: GNU V3 LICENSE
 import os
 import sys
 import json
+import shutil
 import time
 import threading
 import subprocess
 import argparse
+import heapq
+import socket
+import selectors
+import itertools
+import copy
+import re
+import collections
+import multiprocessing
+import queue
 from datetime import datetime
 from enum import Enum
 from typing import Dict, Any, Optional, Callable
 from pathlib import Path
 
+from logview import LogRingBuffer, LogViewer
+from telemetry import METRICS, Sparkline, TelemetrySampler
+from preflight import PreflightEngine, has_failures, print_preflight_report
+from scheduler import Scheduler
+from protocol import (
+    CMD_PLAYER_HEART_BEAT_SC_RSP, DISPATCH_PORT, GAMESERVER_PORT, SDK_PORT,
+    PacketReader, heartbeat_request,
+)
+
 import customtkinter as ctk
 import psutil
 try:
@@ -55,24 +74,291 @@ def get_base_path():
         # 默认情况，假设在 Server/manager 目录下
         return "../"
 
-def get_service_paths():
-    """根据运行环境动态生成服务路径配置"""
+def get_base_dir() -> Path:
+    """返回管理器所在目录，服务路径均相对于此目录解析"""
+    if getattr(sys, 'frozen', False):
+        # 打包后的可执行文件
+        return Path(sys.executable).parent
+    # 开发环境中的Python脚本
+    return Path(__file__).parent
+
+def get_launch_mode(mode: str = "auto") -> str:
+    """
+    解析服务启动模式
+    - native: 直接运行 ELF 与原生 hoyo-sdk（仅Linux）
+    - emulated: 通过 pexecvelf.exe 模拟运行 ELF（Windows；其他平台需安装 wine）
+    - auto: 按当前平台自动选择
+    """
+    if mode == "auto":
+        return "native" if sys.platform.startswith("linux") else "emulated"
+    return mode
+
+def get_service_paths(launch_mode: str = "auto"):
+    """根据运行环境与启动模式动态生成服务路径配置"""
     base_path = get_base_path()
+    if get_launch_mode(launch_mode) == "native":
+        # 发布包中未附带原生 hoyo-sdk 时回退到 hoyo-sdk.exe（非 Windows 平台经由 wine 启动）
+        sdk_executable = f"{base_path}releases/hoyo-sdk/hoyo-sdk"
+        if not (get_base_dir() / sdk_executable).exists():
+            sdk_executable += ".exe"
+        # Linux下 cyrene-sr 本身就是静态链接的ELF，无需经过模拟器
+        return {
+            "cyrene-sr-gameserver": {
+                "executable": f"{base_path}releases/cyrene-sr/gameserver",
+                "args": [],
+                "port": GAMESERVER_PORT
+            },
+            "cyrene-sr-dispatch": {
+                "executable": f"{base_path}releases/cyrene-sr/dispatch",
+                "args": [],
+                "port": DISPATCH_PORT
+            },
+            "hoyo-sdk": {
+                "executable": sdk_executable,
+                "args": [],
+                "port": SDK_PORT
+            }
+        }
     return {
         "cyrene-sr-gameserver": {
             "executable": f"{base_path}releases/pexecvelf/pexecvelf.exe",
-            "args": [f"{base_path}releases/cyrene-sr/gameserver"]
+            "args": [f"{base_path}releases/cyrene-sr/gameserver"],
+            "port": GAMESERVER_PORT
         },
         "cyrene-sr-dispatch": {
             "executable": f"{base_path}releases/pexecvelf/pexecvelf.exe", 
-            "args": [f"{base_path}releases/cyrene-sr/dispatch"]
+            "args": [f"{base_path}releases/cyrene-sr/dispatch"],
+            "port": DISPATCH_PORT
         },
         "hoyo-sdk": {
             "executable": f"{base_path}releases/hoyo-sdk/hoyo-sdk.exe",
-            "args": []
+            "args": [],
+            "port": SDK_PORT
         }
     }
 
+def resolve_service_command(service_config) -> tuple:
+    """
+    将服务配置解析为 (可执行文件绝对路径, 命令行列表)
+    支持新的配置格式（包含executable和args）和旧格式（直接路径）
+    """
+    if isinstance(service_config, dict):
+        executable_path = service_config.get("executable", "")
+        args = service_config.get("args", [])
+    else:
+        # 兼容旧格式
+        executable_path = service_config
+        args = []
+    
+    base_dir = get_base_dir()
+    abs_executable_path = base_dir / executable_path
+    
+    cmd = [str(abs_executable_path)]
+    # 将相对路径转换为绝对路径
+    for arg in args:
+        if arg.startswith("../") or arg.startswith("./"):
+            cmd.append(str(base_dir / arg))
+        else:
+            cmd.append(arg)
+    return abs_executable_path, cmd
+
+def get_wine_command() -> Optional[str]:
+    """非 Windows 平台上运行 .exe 使用的 wine（可用环境变量 SR_WINE 指定），不可用时返回 None"""
+    if sys.platform == "win32":
+        return None
+    return shutil.which(os.environ.get("SR_WINE") or "wine")
+
+def wrap_emulator(cmd: list) -> list:
+    """
+    非 Windows 平台上为 .exe 命令行加上 wine 前缀（wine 会把绝对路径参数映射到 Z: 盘）
+    只在启动进程时使用，resolve_service_command 返回的命令行保持不变
+    """
+    if sys.platform == "win32" or not cmd[0].lower().endswith(".exe"):
+        return cmd
+    wine = get_wine_command()
+    return [wine] + cmd if wine else cmd
+
+def ensure_executable(path: Path) -> None:
+    """确保ELF文件具有可执行权限（仓库中的发布文件不带执行位）"""
+    if os.name == "posix" and not os.access(path, os.X_OK):
+        os.chmod(path, path.stat().st_mode | 0o111)
+
+# 优先级类别与POSIX nice值的对应关系
+PRIORITY_CLASSES = {
+    "idle": 19,
+    "below_normal": 10,
+    "normal": 0,
+    "above_normal": -5,
+    "high": -10,
+    "realtime": -20
+}
+
+_WINDOWS_PRIORITY_CLASSES = {
+    "idle": "IDLE_PRIORITY_CLASS",
+    "below_normal": "BELOW_NORMAL_PRIORITY_CLASS",
+    "normal": "NORMAL_PRIORITY_CLASS",
+    "above_normal": "ABOVE_NORMAL_PRIORITY_CLASS",
+    "high": "HIGH_PRIORITY_CLASS",
+    "realtime": "REALTIME_PRIORITY_CLASS"
+}
+
+def _profile_nice(profile: Dict[str, Any]) -> Optional[int]:
+    """获取资源配置对应的nice值"""
+    if profile.get("nice") is not None:
+        return int(profile["nice"])
+    if profile.get("priority_class") in PRIORITY_CLASSES:
+        return PRIORITY_CLASSES[profile["priority_class"]]
+    return None
+
+def _profile_ionice(profile: Dict[str, Any]) -> Optional[tuple]:
+    """获取资源配置对应的psutil.ionice参数"""
+    level = profile.get("io_priority")
+    if level not in ("low", "normal", "high"):
+        return None
+    if sys.platform == "win32":
+        return ({"low": psutil.IOPRIO_LOW, "normal": psutil.IOPRIO_NORMAL,
+                 "high": psutil.IOPRIO_HIGH}[level],)
+    if hasattr(psutil, "IOPRIO_CLASS_BE"):
+        return {"low": (psutil.IOPRIO_CLASS_IDLE,), "normal": (psutil.IOPRIO_CLASS_BE, 4),
+                "high": (psutil.IOPRIO_CLASS_BE, 0)}[level]
+    return None
+
+def _assign_job_memory_limit(pid: int, memory_limit_mb: int):
+    """通过Windows Job Object限制进程内存，返回Job句柄"""
+    import ctypes
+    from ctypes import wintypes
+    
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in (
+            "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+            "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+    
+    class JOBOBJECT_BASIC_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("PerProcessUserTimeLimit", ctypes.c_int64),
+            ("PerJobUserTimeLimit", ctypes.c_int64),
+            ("LimitFlags", wintypes.DWORD),
+            ("MinimumWorkingSetSize", ctypes.c_size_t),
+            ("MaximumWorkingSetSize", ctypes.c_size_t),
+            ("ActiveProcessLimit", wintypes.DWORD),
+            ("Affinity", ctypes.c_size_t),
+            ("PriorityClass", wintypes.DWORD),
+            ("SchedulingClass", wintypes.DWORD)
+        ]
+    
+    class JOBOBJECT_EXTENDED_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("BasicLimitInformation", JOBOBJECT_BASIC_LIMIT_INFORMATION),
+            ("IoInfo", IO_COUNTERS),
+            ("ProcessMemoryLimit", ctypes.c_size_t),
+            ("JobMemoryLimit", ctypes.c_size_t),
+            ("PeakProcessMemoryUsed", ctypes.c_size_t),
+            ("PeakJobMemoryUsed", ctypes.c_size_t)
+        ]
+    
+    JOB_OBJECT_LIMIT_PROCESS_MEMORY = 0x100
+    JobObjectExtendedLimitInformation = 9
+    PROCESS_SET_QUOTA = 0x0100
+    PROCESS_TERMINATE = 0x0001
+    
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    # 句柄是指针宽度，默认的 c_int 返回值在64位系统上会被截断
+    kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+    kernel32.CreateJobObjectW.argtypes = (wintypes.LPVOID, wintypes.LPCWSTR)
+    kernel32.SetInformationJobObject.argtypes = (wintypes.HANDLE, ctypes.c_int, wintypes.LPVOID, wintypes.DWORD)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.AssignProcessToJobObject.argtypes = (wintypes.HANDLE, wintypes.HANDLE)
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    job = kernel32.CreateJobObjectW(None, None)
+    if not job:
+        raise ctypes.WinError(ctypes.get_last_error())
+    
+    info = JOBOBJECT_EXTENDED_LIMIT_INFORMATION()
+    info.BasicLimitInformation.LimitFlags = JOB_OBJECT_LIMIT_PROCESS_MEMORY
+    info.ProcessMemoryLimit = int(memory_limit_mb) * 1024 * 1024
+    if not kernel32.SetInformationJobObject(job, JobObjectExtendedLimitInformation,
+                                            ctypes.byref(info), ctypes.sizeof(info)):
+        raise ctypes.WinError(ctypes.get_last_error())
+    
+    handle = kernel32.OpenProcess(PROCESS_SET_QUOTA | PROCESS_TERMINATE, False, pid)
+    if not handle:
+        raise ctypes.WinError(ctypes.get_last_error())
+    try:
+        if not kernel32.AssignProcessToJobObject(job, handle):
+            raise ctypes.WinError(ctypes.get_last_error())
+    finally:
+        kernel32.CloseHandle(handle)
+    return job
+
+def apply_resource_profile(pid: int, profile: Dict[str, Any]) -> list:
+    """
+    通过psutil对运行中的进程应用资源配置
+    返回未能应用的项目说明列表
+    """
+    errors = []
+    if not profile:
+        return errors
+    try:
+        proc = psutil.Process(pid)
+    except psutil.NoSuchProcess as e:
+        return [str(e)]
+    
+    cpus = profile.get("cpu_affinity")
+    if cpus and hasattr(proc, "cpu_affinity"):
+        try:
+            proc.cpu_affinity(list(cpus))
+        except (psutil.Error, ValueError, OSError) as e:
+            errors.append(f"cpu_affinity: {e}")
+    
+    try:
+        if sys.platform == "win32" and profile.get("priority_class") in _WINDOWS_PRIORITY_CLASSES:
+            proc.nice(getattr(psutil, _WINDOWS_PRIORITY_CLASSES[profile["priority_class"]]))
+        elif sys.platform != "win32" and _profile_nice(profile) is not None:
+            proc.nice(_profile_nice(profile))
+    except (psutil.Error, OSError) as e:
+        errors.append(f"priority: {e}")
+    
+    ionice = _profile_ionice(profile)
+    if ionice and hasattr(proc, "ionice"):
+        try:
+            proc.ionice(*ionice)
+        except (psutil.Error, OSError, ValueError) as e:
+            errors.append(f"io_priority: {e}")
+    
+    if profile.get("memory_limit_mb") and sys.platform != "win32" and hasattr(proc, "rlimit"):
+        # 通过 prlimit 设置运行中进程的上限，不需要在子进程 fork 后、exec 前执行任何代码
+        limit = int(profile["memory_limit_mb"]) * 1024 * 1024
+        try:
+            proc.rlimit(psutil.RLIMIT_AS, (limit, limit))
+        except (psutil.Error, OSError, ValueError) as e:
+            errors.append(f"memory_limit_mb: {e}")
+    return errors
+
+def verify_resource_profile(pid: int, profile: Dict[str, Any]) -> list:
+    """检查进程的实际资源设置是否与配置一致，返回不一致项列表"""
+    mismatches = []
+    if not profile:
+        return mismatches
+    try:
+        proc = psutil.Process(pid)
+        cpus = profile.get("cpu_affinity")
+        if cpus and hasattr(proc, "cpu_affinity") and sorted(proc.cpu_affinity()) != sorted(cpus):
+            mismatches.append("cpu_affinity")
+        if sys.platform == "win32":
+            expected = _WINDOWS_PRIORITY_CLASSES.get(profile.get("priority_class"))
+            if expected and proc.nice() != getattr(psutil, expected):
+                mismatches.append("priority_class")
+        elif _profile_nice(profile) is not None and proc.nice() != _profile_nice(profile):
+            mismatches.append("nice")
+        if profile.get("memory_limit_mb") and sys.platform != "win32" and hasattr(proc, "rlimit"):
+            limit = int(profile["memory_limit_mb"]) * 1024 * 1024
+            if proc.rlimit(psutil.RLIMIT_AS)[1] != limit:
+                mismatches.append("memory_limit_mb")
+    except (psutil.Error, OSError):
+        pass
+    return mismatches
+
 # 硬编码配置，动态适应运行环境
 HARDCODED_CONFIG = {
     "version": "1.0.0",
@@ -84,12 +370,258 @@ HARDCODED_CONFIG = {
     "service_config": {
         "startup_timeout": 10,
         "auto_restart": False,
-        "service_paths": get_service_paths()
+        "launch_mode": "auto",
+        "service_paths": get_service_paths(),
+        # 资源隔离配置，可用键：cpu_affinity（核心列表）、nice（POSIX）、
+        # priority_class（idle/below_normal/normal/above_normal/high/realtime）、
+        # io_priority（low/normal/high）、memory_limit_mb
+        "resource_profiles": {
+            "cyrene-sr-gameserver": {},
+            "cyrene-sr-dispatch": {},
+            "hoyo-sdk": {}
+        }
+    },
+    "watchdog_config": {
+        "enabled": True,
+        "interval": 5.0,       # 探测周期（秒），最低可设为1秒
+        "deadline": 2.0,       # 单次探测的截止时间（秒）
+        "max_misses": 3,       # 连续失败N次后标记为DEGRADED
+        "auto_restart": False, # DEGRADED后是否自动重启
+        "spin_threshold": 0.9, # 探测失败时CPU占用高于此比例视为空转，否则视为阻塞
+        "probes": {
+            "cyrene-sr-gameserver": {"type": "gameserver", "port": GAMESERVER_PORT},
+            "cyrene-sr-dispatch": {"type": "http", "port": DISPATCH_PORT, "path": "/query_dispatch"},
+            "hoyo-sdk": {"type": "http", "port": SDK_PORT, "path": "/account/register"}
+        }
+    },
+    "preflight_config": {
+        "enabled": True,
+        "workers": 8,
+        "min_free_disk_mb": 200,
+        # 各服务的额外检查，路径相对于服务可执行文件所在目录
+        "services": {
+            "hoyo-sdk": {
+                "config_file": "sdk_server.toml",
+                "required": ["http_addr", "db_file"],
+                "database": "sdk.db"
+            }
+        }
+    },
+    "frontend_config": {
+        "enabled": False,
+        "listen": "0.0.0.0:23311",         # 前端监听地址，客户端应连接此端口
+        "backends": ["127.0.0.1:23301"],   # gameserver 实例列表
+        "rate_per_ip": 2.0,                # 每个IP每秒允许的新连接数
+        "burst": 5,                        # 令牌桶容量
+        "queue_size": 64,                  # 等待队列上限，超出后直接拒绝
+        "queue_timeout": 120,              # 排队超时（秒）
+        "metrics_interval": 30             # 命令行模式下打印统计的间隔（秒）
+    },
+    "autoscale_config": {
+        "enabled": False,
+        "template": "cyrene-sr-gameserver", # 副本模板服务，副本以 "模板名@序号" 注册
+        "port_base": 23330,                 # 副本N监听 port_base + N
+        "min_replicas": 0,                  # 副本数下限（不含 frontend_config.backends 中的固定后端）
+        "max_replicas": 4,                  # 副本数上限
+        "interval": 5,                      # 采样与决策间隔（秒）
+        "target_utilization": 0.8,          # (活跃连接 + 排队) / 总容量 超过该值时扩容
+        "scale_down_utilization": 0.5,      # 低于该值才缩容，两者之间为滞回区间
+        "latency_high_ms": 200,             # 任一实例探测延迟超过该值时至少扩容一个，0 为不使用
+        "latency_samples": 5,               # 探测延迟取各实例最近N次成功探测的中位数
+        "up_cooldown": 30,                  # 两次扩容的最短间隔（秒）
+        "down_cooldown": 300,               # 距上次扩缩容多久后才允许缩容（秒）
+        "down_window": 300,                 # 缩容取该窗口内的最高建议值，避免负载波动时反复增减（秒）
+        "max_step_up": 2,                   # 单次最多新增的副本数
+        "drain_timeout": 600,               # 排空等待上限（秒），超时后强制停止
+        "report_interval": 60               # 命令行模式下打印副本状态的间隔（秒）
+    },
+    "dispatch_cache_config": {
+        "enabled": False,
+        "listen": "0.0.0.0:10110",         # 缓存前端监听地址，客户端的 dispatch 地址应指向此端口
+        "upstream": "127.0.0.1:10100",     # 真实 dispatch 地址
+        "ttl": 300,                        # 缓存有效期（秒）
+        "stale_ttl": 3600,                 # dispatch 不可用时，过期缓存还能继续使用的时长（秒）
+        "ignore_params": [],               # 不参与缓存键的查询参数，如客户端附带的时间戳 ["t"]
+        # 将响应中内嵌的 query_gateway 地址替换为前端地址，两者长度必须相同
+        "rewrite_from": "127.0.0.1:10100",
+        "rewrite_to": "127.0.0.1:10110",
+        # 非0时把 query_gateway 下发的网关端口（dispatch 中固定为 23301）改写为该端口，
+        # 如准入控制前端的 23311 或抓包代理的 23321，客户端才会经过它们
+        "gateway_port": 0,
+        "check_interval": 2,               # 检查 dispatch 可执行文件是否变化的间隔（秒），变化后清空缓存
+        "metrics_interval": 30             # 命令行模式下打印统计的间隔（秒）
+    },
+    "traffic_config": {
+        "listen": "0.0.0.0:23321",         # 抓包代理监听地址，需借助 dispatch_cache_config.gateway_port 把客户端引到此端口
+        "upstream": "127.0.0.1:23301",     # 真实 gameserver 地址
+        "capture": "captures/traffic.bin", # 抓包文件，相对于管理器所在目录；为空则只做实时分析
+        "window": 300,                     # 实时分析覆盖最近多少秒的流量
+        "report_interval": 60,             # 抓包时打印实时报告的间隔（秒）
+        "top": 20,                         # 报告中每个方向显示的消息数
+        "proto_dir": ""                    # cyrene-sr 汇编源码目录，为空时使用源码树中的 cyrene-sr/src
+    },
+    "agent_config": {
+        "listen": "127.0.0.1:23400",  # 代理模式监听地址，跨主机管理时改为 0.0.0.0:23400
+        "token": "",                  # 认证令牌，也可通过环境变量 SR_AGENT_TOKEN 设置
+        "token_file": "",             # 存放令牌的文件，优先于上面两项；令牌不应出现在命令行中
+        "nodes": []                   # 协调端管理的代理节点列表，如 ["10.0.0.2:23400"]
+    },
+    "fault_config": {
+        "seed": None,                 # 随机种子，固定后故障序列可复现
+        "report_interval": 30,        # 打印统计的间隔（秒）
+        # 每条路由：listen 为代理监听地址，upstream 为真实服务地址
+        # mode: tcp 原样转发；gameserver 按封包解析以支持 drop_cmd_ids；http 支持 http_error_rate
+        # jitter.dist: uniform/normal/exponential/pareto，jitter.ms 为分布尺度
+        "routes": [
+            {"listen": "127.0.0.1:33301", "upstream": "127.0.0.1:23301", "mode": "gameserver",
+             "latency_ms": 40, "jitter": {"dist": "normal", "ms": 10}, "bandwidth_kbps": 0,
+             "reset_rate": 0.0, "partial_write_rate": 0.05, "drop_cmd_ids": {}},
+            {"listen": "127.0.0.1:30100", "upstream": "127.0.0.1:10100", "mode": "http",
+             "latency_ms": 80, "jitter": {"dist": "pareto", "ms": 20, "alpha": 2.0},
+             "bandwidth_kbps": 512, "reset_rate": 0.0, "http_error_rate": 0.0},
+            {"listen": "127.0.0.1:40100", "upstream": "127.0.0.1:20100", "mode": "http",
+             "latency_ms": 80, "jitter": {"dist": "uniform", "ms": 20},
+             "bandwidth_kbps": 512, "reset_rate": 0.0, "http_error_rate": 0.0}
+        ]
+    },
+    "dashboard_config": {
+        "enabled": False,
+        "listen": "127.0.0.1:23380",   # 仪表盘地址，远程查看时改为 0.0.0.0:23380
+        "telemetry_interval": 2.0,     # 资源占用采集间隔（秒）
+        "log_batch_ms": 250,           # 日志合批推送的时间窗口（毫秒）
+        "history": 2048,               # 保留的事件数，用于断线重连后补发
+        "log_tail": 200                # 每个服务保留的最近日志行数
+    },
+    "log_archive_config": {
+        "enabled": False,
+        "root": "logs",             # 归档目录，相对于管理器所在目录
+        "segment_lines": 20000,     # 每段最多行数，写满后封存压缩
+        "segment_seconds": 300,     # 每段最长时间（秒）
+        "block_lines": 1024,        # 每个独立压缩块的行数，决定查询时的定位粒度
+        "workers": 2,               # 后台压缩进程数
+        "retention_days": 30        # 数据库维护时删除早于该天数的日志段，0表示不删除
+    },
+    "journal_config": {
+        "enabled": True,
+        "path": "journal.db",     # 生命周期日志文件，相对于管理器所在目录
+        "flush_interval": 1.0,    # 后台批量提交的间隔（秒）
+        "batch_size": 256,        # 积累到该条数时立即提交
+        "retention_days": 90      # 数据库维护时删除早于该天数的会话，0表示不删除
+    },
+    "alert_config": {
+        "enabled": False,
+        "interval": 10,          # 采样与规则求值间隔（秒）
+        "cooldown": 1800,        # 告警持续期间重复提醒的最短间隔（秒）
+        # 规则类型：threshold（当前值）、rate（window 秒内的增量，aggregate 为 rate 时按每秒）、
+        # burn_rate（bad/total 两个计数器的错误预算消耗速率）；for 为越限持续多久后触发，service 为 "*" 时逐服务求值
+        # 可用指标：up、failed、starts、crashes、restarts、rss_mb、probes、probe_failures、probe_p99_ms、
+        # journal_wal_mb，以及 log_counters 与 log_metrics_config 中定义的计数器
+        "rules": [
+            {"name": "gameserver_probe_slow", "type": "threshold", "metric": "probe_p99_ms",
+             "service": "cyrene-sr-gameserver", "op": ">", "value": 200, "for": 60, "severity": "warning"},
+            {"name": "service_failed", "type": "threshold", "metric": "failed", "op": ">=", "value": 1,
+             "for": 30, "severity": "critical"},
+            {"name": "crash_loop", "type": "rate", "metric": "crashes", "window": 900, "op": ">=", "value": 3,
+             "severity": "critical"},
+            # hoyo-sdk 不记录登录日志，SDK 的可用性用看门狗对其 HTTP 接口的探测结果计算
+            {"name": "sdk_availability", "type": "burn_rate", "bad": "probe_failures", "total": "probes",
+             "service": "hoyo-sdk", "objective": 0.99, "severity": "critical"},
+            {"name": "sdk_database_errors", "type": "rate", "metric": "sdk_db_errors", "service": "hoyo-sdk",
+             "window": 300, "op": ">=", "value": 5, "severity": "warning"},
+            {"name": "journal_wal_large", "type": "threshold", "metric": "journal_wal_mb", "op": ">", "value": 64,
+             "for": 600, "severity": "warning"},
+            {"name": "protocol_errors", "type": "rate", "metric": "head_magic_mismatch",
+             "service": "cyrene-sr-gameserver", "window": 300, "op": ">=", "value": 20, "severity": "warning"}
+        ],
+        # 通知端：{"type": "file", "path": ...}、{"type": "webhook", "url": ..., "headers": {}}、
+        # {"type": "command", "command": ["notify.sh"]}（通知 JSON 写入标准输入）
+        "sinks": [
+            {"type": "file", "path": "alerts.log"}
+        ],
+        # 按正则统计服务输出得到的计数器，需按实际日志格式调整
+        # hoyo-sdk 只在数据库出错时输出日志（"database error: ..."），登录成功与失败都不会记录
+        "log_counters": {
+            "sdk_db_errors": {"service": "hoyo-sdk", "pattern": "database error"}
+        }
+    },
+    "log_metrics_config": {
+        "enabled": True,
+        "report_interval": 0,      # 命令行模式下打印统计的间隔（秒），0表示只在退出时打印
+        "top": 10,                 # 带标签的指标（如 cmd_id）打印的取值个数
+        # 每条指标：pattern 为正则，service 限定服务（省略表示全部服务）
+        # 正则含命名分组 label 时按其取值分别计数；含命名分组 value 且给出 buckets 时同时记为直方图
+        # 每行只计入第一个匹配的指标
+        "metrics": {
+            "packets": {"pattern": r"received packet with cmd_id (?P<label>\d+)"},
+            "connections": {"pattern": r"INFO: new connection from"},
+            "disconnects": {"pattern": r"INFO: client from .* disconnected"},
+            "head_magic_mismatch": {"pattern": r"head magic mismatch"},
+            "short_reads": {"pattern": r"WARN: expected at least \d+ bytes"},
+            "socket_errors": {"pattern": r"ERROR: (?P<label>socket|bind|listen|accept|write)\(\) returned"},
+            "dispatch_request_bytes": {"service": "cyrene-sr-dispatch", "pattern": r"received (?P<value>\d+) bytes from client",
+                                       "buckets": [128, 256, 512, 1024, 2048, 4096]}
+        }
+    },
+    "schedule_config": {
+        "resolution": 0.05,               # 调度精度（秒），该窗口内到期的任务合并为一次唤醒
+        "workers": 4,                     # 执行耗时任务（进程检查、采样、维护）的线程数
+        "report_interval": 0,             # 命令行模式下打印调度延迟统计的间隔（秒），0表示只在退出时打印
+        "maintenance_cron": "30 4 * * *", # 数据库维护时间（cron：分 时 日 月 周），空字符串表示不维护
+        "maintenance_jitter": 300,        # 维护时间的随机延迟上限（秒），避免多台主机同时执行
+        # 定时重启（只重启正在运行的服务），如 {"service": "cyrene-sr-gameserver", "cron": "0 5 * * *"}，
+        # service 为 "*" 表示全部服务
+        "restarts": []
+    },
+    "profiling_config": {
+        "output_dir": "profiles",     # 分析结果目录，相对于管理器所在目录
+        "sample_interval_ms": 5,      # 采样式CPU分析的采样间隔
+        "tracemalloc_frames": 10,     # 内存分配记录的调用栈深度
+        "top": 30,                    # 摘要中列出的条目数
+        "signals": True               # POSIX下 SIGUSR1 转储线程栈，SIGUSR2 开关采样分析
+    },
+    "bench_config": {
+        "store": "bench.db",          # 基准结果库，相对于管理器所在目录
+        "iterations": 2000,           # 自助法重抽次数
+        "confidence": 0.95,           # 置信水平
+        "threshold": 0.03             # 判定回归的最小变化幅度（3%）
+    },
+    "soak_config": {
+        "duration": 3600,             # 默认测试时长（秒）
+        "rate": 5.0,                  # 每个服务每秒新建的连接数
+        "heartbeats_per_conn": 5,     # gameserver 每个连接发送的心跳数
+        "warmup": 120,                # 开始采样前的预热时间（秒），避开启动期的正常增长
+        "sample_interval": 5.0,       # RSS与句柄数采样间隔（秒）
+        "check_interval": 60,         # 测试期间检查趋势的间隔（秒）
+        "rss_kb_per_hour": 2048,      # RSS每小时增长（KB）超过该值且趋势显著时判定为泄漏
+        "handles_per_hour": 5.0,      # 句柄每小时增长阈值
+        "min_t": 3.0                  # 趋势显著性要求（斜率/标准误）
+    },
+    "simulation_config": {
+        "base_port": 42000,    # 替身服务绑定的起始端口，0表示不绑定
+        "log_rate": 10.0,      # 每个替身服务每秒输出的日志行数
+        "crash_every": 10,     # 每N个替身服务中有一个定时崩溃，0表示不崩溃
+        "crash_after": 5.0,    # 崩溃时间（秒）
+        "hang_every": 0,       # 每N个替身服务中有一个定时卡死
+        "hang_after": 5.0,     # 卡死时间（秒）
+        "leak_every": 0,       # 每N个替身服务中有一个按连接泄漏内存与套接字，用于验证稳定性测试
+        "leak_kb": 64,         # 每个连接泄漏的内存（KB）
+        "startup_timeout": 2   # 模拟模式下的启动判定时间（秒）
+    },
+    "trace_config": {
+        "capacity": 65536,     # 预分配的事件槽位数，写满后循环覆盖最旧事件
+        "export_path": ""      # 非空时管理器退出时自动导出Chrome Trace JSON
     },
     "ui_config": {
         "window_width": 800,
         "window_height": 600,
         "font_size": 14,
+        "log_buffer_lines": 20000,   # 每个服务在GUI中保留的日志行数
+        "log_frame_ms": 50,          # 日志面板刷新间隔（毫秒）
+        "show_telemetry": True,      # 在服务卡片上显示资源曲线
+        "telemetry_interval": 1.0,   # 资源采样间隔（秒）
+        "telemetry_history": 300,    # 曲线保留的采样数
+        "telemetry_refresh_ms": 1000,  # 曲线重绘间隔（毫秒）
+        "telemetry_conn_every": 5,   # 每N次采样统计一次连接数（开销较大）
         "remember_position": True,
         "last_position": {
             "x": 759,
@@ -103,6 +635,7 @@ class ServiceStatus(Enum):
     STOPPED = "stopped"      # 红色指示灯
     STARTING = "starting"    # 黄色指示灯  
     RUNNING = "running"      # 绿色指示灯
+    DEGRADED = "degraded"    # 橙色指示灯，进程存活但探测无响应
     ERROR = "error"          # 红色闪烁指示灯
 
 class ThemeMode(Enum):
@@ -116,7 +649,8 @@ class ConfigManager:
     
     def __init__(self, config_path: str = None):
         # 使用硬编码配置，不再依赖外部配置文件
-        self.config = HARDCODED_CONFIG.copy()
+        # 深拷贝，运行时的修改（如自动扩缩容增减副本）不会写回模块级默认配置
+        self.config = copy.deepcopy(HARDCODED_CONFIG)
     
     def save_config(self) -> bool:
         """保存配置文件 - 现在只是一个占位符，因为使用硬编码配置"""
@@ -144,6 +678,17 @@ class ConfigManager:
             config = config[k]
         config[keys[-1]] = value
 
+def apply_launch_overrides(config_manager: ConfigManager, launch_mode: Optional[str] = None,
+                           simulate: Optional[int] = None) -> None:
+    """在配置实例上应用命令行指定的启动模式与模拟模式（模拟模式的替身服务优先）"""
+    if launch_mode:
+        config_manager.set_setting("service_config.launch_mode", launch_mode)
+        config_manager.set_setting("service_config.service_paths", get_service_paths(launch_mode))
+    if simulate is not None:
+        config_manager.set_setting("service_config.service_paths", build_simulated_service_paths(simulate))
+        config_manager.set_setting("service_config.startup_timeout",
+                                   config_manager.get_setting("simulation_config.startup_timeout"))
+
 class ThemeManager:
     """主题管理器"""
     
@@ -212,6 +757,367 @@ class ThemeManager:
         """获取主题颜色"""
         return self.colors.get(self.current_theme, {}).get(color_name, "#000000")
 
+class LifecycleTracer:
+    """
+    生命周期追踪器
+    将各服务的生命周期阶段记录到预分配的环形缓冲区，
+    可导出为 Chrome Trace Event 格式，在 Perfetto / chrome://tracing 中查看
+    """
+    
+    def __init__(self, capacity: int = 65536):
+        self.capacity = max(1, int(capacity))
+        self._events: list = [None] * self.capacity
+        # itertools.count 的 next() 在CPython中是原子操作，记录事件无需加锁
+        self._counter = itertools.count()
+        self._lanes: Dict[str, int] = {}
+        self._origin_ns = time.perf_counter_ns()
+        self._origin_wall = time.time()
+    
+    @staticmethod
+    def now() -> int:
+        """返回当前时间戳（纳秒），用于 span() 的起止时间"""
+        return time.perf_counter_ns()
+    
+    def _lane(self, service_name: str) -> int:
+        lane = self._lanes.get(service_name)
+        if lane is None:
+            lane = self._lanes.setdefault(service_name, len(self._lanes) + 1)
+        return lane
+    
+    def instant(self, service_name: str, name: str, **args):
+        """记录一个瞬时事件"""
+        self._events[next(self._counter) % self.capacity] = (
+            "i", name, self._lane(service_name), time.perf_counter_ns(), 0, args or None)
+    
+    def span(self, service_name: str, name: str, start_ns: int, end_ns: Optional[int] = None, **args):
+        """记录一个完整区间事件"""
+        end_ns = end_ns if end_ns is not None else time.perf_counter_ns()
+        self._events[next(self._counter) % self.capacity] = (
+            "X", name, self._lane(service_name), start_ns, end_ns - start_ns, args or None)
+    
+    def snapshot(self) -> list:
+        """按时间顺序返回缓冲区中的全部事件"""
+        events = [event for event in self._events if event is not None]
+        events.sort(key=lambda event: event[3])
+        return events
+    
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """转换为 Chrome Trace Event 格式"""
+        pid = os.getpid()
+        trace_events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "SR私服管理器"}}
+        ]
+        for service_name, lane in self._lanes.items():
+            trace_events.append(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": lane, "args": {"name": service_name}})
+        for ph, name, lane, ts_ns, dur_ns, args in self.snapshot():
+            event = {
+                "name": name,
+                "cat": "lifecycle",
+                "ph": ph,
+                "pid": pid,
+                "tid": lane,
+                "ts": (ts_ns - self._origin_ns) / 1000.0
+            }
+            if ph == "X":
+                event["dur"] = dur_ns / 1000.0
+            else:
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            trace_events.append(event)
+        return {
+            "traceEvents": trace_events,
+            "displayTimeUnit": "ms",
+            "otherData": {"start_time": datetime.fromtimestamp(self._origin_wall).isoformat()}
+        }
+    
+    def export(self, path: str) -> int:
+        """导出为JSON文件，返回事件数量"""
+        trace = self.to_chrome_trace()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False)
+        return len(trace["traceEvents"])
+
+class _LivenessProbe:
+    """单次非阻塞应用层探测"""
+    
+    def __init__(self, service_name: str, spec: Dict[str, Any], deadline: float):
+        self.service_name = service_name
+        self.deadline = deadline
+        self.started = time.monotonic()
+        self.buffer = b""
+        self.reader = None
+        
+        if spec.get("type") == "gameserver":
+            # 发送一个带帧的 PlayerHeartBeat，等待 PlayerHeartBeatScRsp
+            self.request = heartbeat_request(int(time.time() * 1000))
+            self.reader = PacketReader()
+        else:
+            path = spec.get("path", "/")
+            self.request = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode()
+        
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.sock.connect_ex((spec.get("host", "127.0.0.1"), spec["port"]))
+    
+    def on_writable(self) -> bool:
+        """连接建立后发送请求，连接失败返回False"""
+        if self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+            return False
+        self.sock.sendall(self.request)
+        return True
+    
+    def on_readable(self) -> Optional[bool]:
+        """读取响应，完成返回True，失败返回False，未完成返回None"""
+        data = self.sock.recv(65536)
+        if not data:
+            return False
+        if self.reader is not None:
+            packets = self.reader.feed(data)
+            if any(cmd_id == CMD_PLAYER_HEART_BEAT_SC_RSP for cmd_id, _ in packets):
+                return True
+            return None
+        # 收到状态行即认为HTTP服务存活
+        self.buffer += data
+        if b"\r\n" in self.buffer:
+            return self.buffer.startswith(b"HTTP/")
+        return None
+    
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+class LivenessWatchdog:
+    """
+    存活看门狗
+    单线程通过 selectors 并发执行所有服务的应用层探测，
+    连续失败达到阈值后将服务标记为DEGRADED，并可选自动重启
+    """
+    
+    def __init__(self, process_manager: "ProcessManager"):
+        self.process_manager = process_manager
+        self.config_manager = process_manager.config_manager
+        self.liveness: Dict[str, Dict[str, Any]] = {}
+        self._cpu_samples: Dict[str, tuple] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        # 探测表只由看门狗线程读写，运行时的增删经队列传入，不修改共享的配置
+        self._probes: Optional[Dict[str, Dict[str, Any]]] = None
+        self._probe_updates: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+    
+    def _setting(self, key: str, default: Any) -> Any:
+        value = self.config_manager.get_setting(f"watchdog_config.{key}")
+        return default if value is None else value
+    
+    def start(self):
+        """启动看门狗线程（重复调用无副作用）"""
+        if not self._setting("enabled", True):
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self, wait: bool = False):
+        """停止看门狗线程，wait=True 时等待线程退出"""
+        self._stop_event.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+    
+    def get_liveness(self, service_name: str) -> Dict[str, Any]:
+        """获取服务的最近探测结果"""
+        return self.liveness.get(service_name, {})
+    
+    def add_probe(self, service_name: str, spec: Dict[str, Any]):
+        """运行时加入探测（可从任意线程调用）"""
+        self._probe_updates.put((service_name, dict(spec)))
+    
+    def remove_probe(self, service_name: str):
+        """运行时停止探测并丢弃探测结果（可从任意线程调用）"""
+        self._probe_updates.put((service_name, None))
+    
+    def _apply_probe_updates(self, probes: Dict[str, Dict[str, Any]]):
+        while True:
+            try:
+                service_name, spec = self._probe_updates.get_nowait()
+            except queue.Empty:
+                return
+            if spec is None:
+                probes.pop(service_name, None)
+                self.liveness.pop(service_name, None)
+            else:
+                probes[service_name] = spec
+    
+    def _run(self):
+        selector = selectors.DefaultSelector()
+        if self._probes is None:
+            self._probes = dict(self._setting("probes", {}))
+        probes = self._probes
+        self._apply_probe_updates(probes)
+        interval = max(0.1, float(self._setting("interval", 5.0)))
+        deadline = float(self._setting("deadline", 2.0))
+        
+        # (下次探测时间, 服务名) 组成的最小堆
+        schedule = [(time.monotonic(), name) for name in probes]
+        heapq.heapify(schedule)
+        scheduled = set(probes)
+        in_flight: Dict[str, _LivenessProbe] = {}
+        
+        try:
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                # 运行时注册的服务（如自动扩容的副本）加入探测，注销的在出堆时丢弃
+                self._apply_probe_updates(probes)
+                for service_name in set(probes) - scheduled:
+                    scheduled.add(service_name)
+                    heapq.heappush(schedule, (now, service_name))
+                while schedule and schedule[0][0] <= now:
+                    _, service_name = heapq.heappop(schedule)
+                    spec = probes.get(service_name)
+                    if spec is None:
+                        scheduled.discard(service_name)
+                        continue
+                    heapq.heappush(schedule, (now + interval, service_name))
+                    if service_name in in_flight or not self._should_probe(service_name):
+                        continue
+                    try:
+                        probe = _LivenessProbe(service_name, spec, now + deadline)
+                    except OSError:
+                        self._record(service_name, False, None)
+                        continue
+                    in_flight[service_name] = probe
+                    selector.register(probe.sock, selectors.EVENT_WRITE, probe)
+                
+                wake_at = [schedule[0][0]] if schedule else [now + 1.0]
+                wake_at.extend(probe.deadline for probe in in_flight.values())
+                timeout = min(1.0, max(0.0, min(wake_at) - time.monotonic()))
+                
+                if in_flight:
+                    events = selector.select(timeout)
+                else:
+                    # Windows下select()不接受空集合，没有进行中的探测时直接等待
+                    self._stop_event.wait(timeout)
+                    events = []
+                for key, mask in events:
+                    probe = key.data
+                    try:
+                        if mask & selectors.EVENT_WRITE:
+                            ok = probe.on_writable()
+                            if ok:
+                                selector.modify(probe.sock, selectors.EVENT_READ, probe)
+                                continue
+                        else:
+                            ok = probe.on_readable()
+                            if ok is None:
+                                continue
+                    except OSError:
+                        ok = False
+                    self._finish(selector, in_flight, probe, ok)
+                
+                now = time.monotonic()
+                for probe in [p for p in in_flight.values() if p.deadline <= now]:
+                    self._finish(selector, in_flight, probe, False)
+        finally:
+            for probe in in_flight.values():
+                probe.close()
+            selector.close()
+    
+    def _should_probe(self, service_name: str) -> bool:
+        """仅对启动完成且进程存活的服务进行探测"""
+        status = self.process_manager.get_service_status(service_name)
+        return (status in (ServiceStatus.RUNNING, ServiceStatus.DEGRADED)
+                and self.process_manager.is_service_running(service_name))
+    
+    def _finish(self, selector, in_flight: Dict[str, _LivenessProbe], probe: _LivenessProbe, ok: bool):
+        selector.unregister(probe.sock)
+        probe.close()
+        del in_flight[probe.service_name]
+        latency_ms = (time.monotonic() - probe.started) * 1000 if ok else None
+        self._record(probe.service_name, ok, latency_ms)
+    
+    def _cpu_ratio(self, service_name: str) -> Optional[float]:
+        """计算自上次探测以来进程的CPU时间占比，用于区分空转与阻塞"""
+        process = self.process_manager.service_processes.get(service_name)
+        if not process:
+            return None
+        try:
+            cpu = psutil.Process(process.pid).cpu_times()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        total, now = cpu.user + cpu.system, time.monotonic()
+        previous = self._cpu_samples.get(service_name)
+        self._cpu_samples[service_name] = (total, now)
+        if not previous or now <= previous[1]:
+            return None
+        return (total - previous[0]) / (now - previous[1])
+    
+    def _has_client(self, service_name: str, port: int) -> bool:
+        """检查服务进程是否持有已建立的客户端连接"""
+        process = self.process_manager.service_processes.get(service_name)
+        if not process:
+            return False
+        try:
+            proc = psutil.Process(process.pid)
+            connections = getattr(proc, "net_connections", proc.connections)(kind="tcp")
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        return any(conn.status == psutil.CONN_ESTABLISHED and conn.laddr and conn.laddr.port == port
+                   for conn in connections)
+    
+    def _record(self, service_name: str, ok: bool, latency_ms: Optional[float]):
+        """记录探测结果并更新服务状态"""
+        state = self.liveness.setdefault(service_name, {
+            "misses": 0, "probes": 0, "failures": 0, "recent_ms": collections.deque(maxlen=128)
+        })
+        cpu_ratio = self._cpu_ratio(service_name)
+        state["probes"] += 1
+        state["cpu_ratio"] = cpu_ratio
+        state["last_probe"] = time.time()
+        
+        if ok:
+            if state.get("verdict") != "alive":
+                self.process_manager.tracer.instant(service_name, "probe_passed", latency_ms=latency_ms)
+                if state["misses"]:
+                    self.process_manager.journal_event(service_name, "probe_recovered", latency_ms=latency_ms)
+            state.update(misses=0, latency_ms=latency_ms, verdict="alive")
+            state["recent_ms"].append(latency_ms)
+            if self.process_manager.get_service_status(service_name) == ServiceStatus.DEGRADED:
+                print(f"[watchdog] {service_name} 探测恢复")
+                self.process_manager._notify_status_change(service_name, ServiceStatus.RUNNING)
+            return
+        
+        state["latency_ms"] = None
+        spec = (self._probes or {}).get(service_name, {})
+        if spec.get("type") == "gameserver" and self._has_client(service_name, spec["port"]):
+            # 游戏服务器一次只服务一个连接，正在服务玩家时探测排队属正常现象
+            state["verdict"] = "busy"
+            return
+        state["misses"] += 1
+        state["failures"] += 1
+        self.process_manager.tracer.instant(service_name, "probe_failed", misses=state["misses"])
+        spin_threshold = float(self._setting("spin_threshold", 0.9))
+        state["verdict"] = "spin" if cpu_ratio is not None and cpu_ratio >= spin_threshold else "stall"
+        self.process_manager.journal_event(service_name, "probe_failed", misses=state["misses"],
+                                           verdict=state["verdict"])
+        
+        if state["misses"] < int(self._setting("max_misses", 3)):
+            return
+        if self.process_manager.get_service_status(service_name) != ServiceStatus.DEGRADED:
+            reason = "CPU空转" if state["verdict"] == "spin" else "阻塞无响应"
+            print(f"[watchdog] {service_name} 连续 {state['misses']} 次探测失败（{reason}），标记为DEGRADED")
+            self.process_manager._notify_status_change(service_name, ServiceStatus.DEGRADED)
+            if self._setting("auto_restart", False):
+                state["misses"] = 0
+                threading.Thread(
+                    target=self.process_manager.restart_service,
+                    args=(service_name, "watchdog"),
+                    daemon=True
+                ).start()
+
 class ProcessManager:
     """进程管理器"""
     
@@ -220,6 +1126,40 @@ class ProcessManager:
         self.service_processes: Dict[str, subprocess.Popen] = {}
         self.service_status: Dict[str, ServiceStatus] = {}
         self.status_callbacks: Dict[str, Callable] = {}
+        self.watchdog = LivenessWatchdog(self)
+        self._job_handles: Dict[str, Any] = {}
+        self.frontend = None
+        self.autoscaler = None
+        self.dispatch_cache = None
+        self.dashboard = None
+        self.dashboard_hub = None
+        self.log_archive = None
+        self.journal = None
+        self._stopping_pids: set = set()
+        # 各采集方（界面曲线、网页仪表盘）独立缓存 psutil.Process，互不打断 cpu_percent 的采样区间
+        self._telemetry_procs: Dict[str, Dict[str, psutil.Process]] = {}
+        self._telemetry_lock = threading.Lock()
+        self.start_counts: Dict[str, int] = {}
+        self.crash_counts: Dict[str, int] = {}
+        self.restart_counts: Dict[str, int] = {}
+        self.alerts = None
+        self.log_counters = None
+        self.log_metrics = None
+        self.profiler = None
+        self.output_callbacks: list = []
+        self.scheduler = Scheduler(
+            resolution=float(self.config_manager.get_setting("schedule_config.resolution") or 0.05),
+            workers=int(self.config_manager.get_setting("schedule_config.workers") or 4)
+        )
+        self._running_watch: Dict[int, tuple] = {}
+        self._watch_lock = threading.Lock()
+        self.tracer = LifecycleTracer(
+            self.config_manager.get_setting("trace_config.capacity") or 65536
+        )
+        self.preflight = PreflightEngine(
+            workers=self.config_manager.get_setting("preflight_config.workers") or 8,
+            min_free_disk_mb=self.config_manager.get_setting("preflight_config.min_free_disk_mb") or 0
+        )
         
         # 初始化服务状态
         service_paths = self.config_manager.get_setting("service_config.service_paths") or {}
@@ -230,9 +1170,484 @@ class ProcessManager:
         """注册状态变化回调"""
         self.status_callbacks[service_name] = callback
     
+    def register_output_callback(self, callback: Callable):
+        """注册服务输出回调，callback(service_name, stream_name, line)"""
+        self.output_callbacks.append(callback)
+    
+    def export_trace(self, path: str) -> int:
+        """导出生命周期追踪数据为 Chrome Trace JSON"""
+        return self.tracer.export(path)
+    
+    def start_frontend(self):
+        """按配置启动准入控制前端（在独立线程的事件循环中运行）"""
+        from agent import parse_address
+        from frontend import AdmissionFrontend
+        config = self.config_manager.get_setting("frontend_config") or {}
+        if self.frontend is not None:
+            return self.frontend
+        self.frontend = AdmissionFrontend(
+            listen=parse_address(config.get("listen", "0.0.0.0:23311")),
+            backends=[parse_address(b, GAMESERVER_PORT) for b in config.get("backends", [])],
+            rate=float(config.get("rate_per_ip", 2.0)),
+            burst=float(config.get("burst", 5)),
+            queue_size=int(config.get("queue_size", 64)),
+            queue_timeout=float(config.get("queue_timeout", 120))
+        )
+        try:
+            self.frontend.start_in_thread()
+        except (OSError, TimeoutError) as e:
+            print(f"准入控制前端启动失败: {e}")
+            self.frontend = None
+            return None
+        host, port = self.frontend.listen
+        print(f"准入控制前端已启动，监听 {host}:{port}")
+        return self.frontend
+    
+    def start_autoscaler(self):
+        """按配置启动 gameserver 副本自动扩缩容（依赖准入控制前端，会一并启动）"""
+        from agent import parse_address
+        from autoscale import Autoscaler
+        if self.autoscaler is not None:
+            return self.autoscaler
+        config = self.config_manager.get_setting("autoscale_config") or {}
+        template = config.get("template", "cyrene-sr-gameserver")
+        service_paths = self.config_manager.get_setting("service_config.service_paths") or {}
+        if template not in service_paths or not self.get_service_port(template):
+            print(f"自动扩缩容的模板服务不存在或未配置端口: {template}")
+            return None
+        frontend = self.start_frontend()
+        if frontend is None:
+            print("准入控制前端未能启动，自动扩缩容未启用")
+            return None
+        static_backends = [parse_address(b, GAMESERVER_PORT)
+                           for b in self.config_manager.get_setting("frontend_config.backends") or []]
+        self.autoscaler = Autoscaler(
+            self, config, static_backends,
+            startup_timeout=float(self.config_manager.get_setting("service_config.startup_timeout") or 10)
+        )
+        self.start_scheduler().every("autoscale", float(config.get("interval", 5)), self.autoscaler.tick,
+                                     blocking=True)
+        print(f"自动扩缩容已启用：模板 {template}，副本 {self.autoscaler.policy.min_replicas}~"
+              f"{self.autoscaler.policy.max_replicas} 个，前端 {frontend.listen[0]}:{frontend.listen[1]}")
+        return self.autoscaler
+    
+    def stop_autoscaler(self):
+        """停止扩缩容决策并停止全部副本（退出时调用，不再等待排空）"""
+        if self.autoscaler is None:
+            return
+        self.scheduler.cancel("autoscale")
+        self.autoscaler.stop()
+        for service_name in list(self.autoscaler.replicas):
+            self.stop_service(service_name)
+            self.remove_service(service_name)
+        self.autoscaler.replicas.clear()
+    
+    def build_replica_config(self, template: str, port: int) -> Dict[str, Any]:
+        """
+        按模板服务生成监听 port 的副本配置
+        参数中带有模板端口的（如替身服务）直接替换参数，否则生成改写了监听端口的 ELF 副本
+        """
+        from autoscale import prepare_replica_binary
+        service_paths = self.config_manager.get_setting("service_config.service_paths") or {}
+        service_config = dict(service_paths[template])
+        template_port = service_config["port"]
+        args = list(service_config.get("args", []))
+        if str(template_port) in args:
+            service_config["args"] = [str(port) if arg == str(template_port) else arg for arg in args]
+        else:
+            # 模拟器模式下可执行文件是 pexecvelf，真正的 gameserver 在参数里
+            executable, cmd = resolve_service_command(service_config)
+            binary = Path(cmd[-1]) if len(cmd) > 1 else executable
+            replica = prepare_replica_binary(binary, template_port, port, get_base_dir() / "replicas")
+            if len(cmd) > 1:
+                service_config["args"] = args[:-1] + [str(replica)]
+            else:
+                service_config["executable"] = str(replica)
+        service_config["port"] = port
+        return service_config
+    
+    def add_service(self, service_name: str, service_config: Dict[str, Any],
+                    probe: Optional[Dict[str, Any]] = None):
+        """
+        运行时注册服务（如自动扩容的副本），probe 为看门狗探测配置
+        服务表整体替换而不是原地修改，其他线程持有的旧表在遍历时不受影响
+        """
+        service_paths = dict(self.config_manager.get_setting("service_config.service_paths") or {})
+        service_paths[service_name] = service_config
+        self.config_manager.set_setting("service_config.service_paths", service_paths)
+        if probe:
+            self.watchdog.add_probe(service_name, probe)
+        self.service_status.setdefault(service_name, ServiceStatus.STOPPED)
+    
+    def remove_service(self, service_name: str):
+        """注销运行时注册的服务，调用前应先停止"""
+        service_paths = dict(self.config_manager.get_setting("service_config.service_paths") or {})
+        service_paths.pop(service_name, None)
+        self.config_manager.set_setting("service_config.service_paths", service_paths)
+        self.watchdog.remove_probe(service_name)
+        self.service_status.pop(service_name, None)
+    
+    def start_dispatch_cache(self):
+        """按配置启动 dispatch 缓存前端（在独立线程的事件循环中运行）"""
+        from agent import parse_address
+        from dispatchcache import DispatchCache
+        config = self.config_manager.get_setting("dispatch_cache_config") or {}
+        if self.dispatch_cache is not None:
+            return self.dispatch_cache
+        # 模拟器模式下可执行文件是 pexecvelf，真正的 dispatch 在参数里
+        service_paths = self.config_manager.get_setting("service_config.service_paths") or {}
+        binary = None
+        if "cyrene-sr-dispatch" in service_paths:
+            executable, cmd = resolve_service_command(service_paths["cyrene-sr-dispatch"])
+            binary = Path(cmd[-1]) if len(cmd) > 1 else executable
+        self.dispatch_cache = DispatchCache(
+            listen=parse_address(config.get("listen", "0.0.0.0:10110")),
+            upstream=parse_address(config.get("upstream", "127.0.0.1:10100"), DISPATCH_PORT),
+            ttl=float(config.get("ttl", 300)),
+            stale_ttl=float(config.get("stale_ttl", 3600)),
+            binary=binary,
+            check_interval=float(config.get("check_interval", 2)),
+            ignore_params=config.get("ignore_params", []),
+            rewrite_from=config.get("rewrite_from", ""),
+            rewrite_to=config.get("rewrite_to", ""),
+            gateway_port=int(config.get("gateway_port", 0))
+        )
+        try:
+            self.dispatch_cache.start_in_thread()
+        except (OSError, TimeoutError) as e:
+            print(f"dispatch 缓存前端启动失败: {e}")
+            self.dispatch_cache = None
+            return None
+        host, port = self.dispatch_cache.listen
+        print(f"dispatch 缓存前端已启动，监听 {host}:{port}")
+        return self.dispatch_cache
+    
+    def start_dashboard(self):
+        """按配置启动网页仪表盘"""
+        from agent import parse_address
+        from dashboard import DashboardHub, DashboardServer
+        if self.dashboard is not None:
+            return self.dashboard
+        config = self.config_manager.get_setting("dashboard_config") or {}
+        self.dashboard_hub = DashboardHub(
+            history=int(config.get("history", 2048)),
+            log_tail=int(config.get("log_tail", 200)),
+            log_batch=float(config.get("log_batch_ms", 250)) / 1000
+        )
+        for service_name, status in self.service_status.items():
+            self._publish_service_state(service_name, status)
+        self.register_output_callback(self.dashboard_hub.add_log)
+        self.dashboard = DashboardServer(
+            self.dashboard_hub,
+            parse_address(config.get("listen", "127.0.0.1:23380"), 23380),
+            telemetry_source=lambda: self.collect_telemetry(consumer="dashboard"),
+            telemetry_interval=float(config.get("telemetry_interval", 2.0)),
+            scheduler=self.start_scheduler()
+        ).start()
+        host, port = self.dashboard.listen
+        print(f"网页仪表盘已启动: http://{host}:{port}/")
+        return self.dashboard
+    
+    def get_profiler(self):
+        """获取自身分析器（首次使用时创建，创建本身不安装任何钩子）"""
+        if self.profiler is None:
+            from selfprofile import SelfProfiler
+            config = self.config_manager.get_setting("profiling_config") or {}
+            output_dir = Path(config.get("output_dir") or "profiles")
+            if not output_dir.is_absolute():
+                output_dir = get_base_dir() / output_dir
+            self.profiler = SelfProfiler(
+                str(output_dir),
+                sample_interval=float(config.get("sample_interval_ms", 5)) / 1000,
+                tracemalloc_frames=int(config.get("tracemalloc_frames", 10)),
+                top=int(config.get("top", 30))
+            )
+        return self.profiler
+    
+    def install_profile_signals(self):
+        """POSIX下注册信号：SIGUSR1 转储线程栈，SIGUSR2 开关采样式CPU分析"""
+        import signal
+        if not self.config_manager.get_setting("profiling_config.signals") or not hasattr(signal, "SIGUSR1"):
+            return
+        from selfprofile import print_profile_result
+        
+        def handler(action):
+            def handle(signum, frame):
+                try:
+                    print_profile_result(self.get_profiler().control(action))
+                except Exception as e:
+                    print(f"自身分析失败: {e}")
+            return handle
+        
+        signal.signal(signal.SIGUSR1, handler("stacks"))
+        signal.signal(signal.SIGUSR2, handler("cpu-toggle"))
+    
+    def start_scheduler(self) -> Scheduler:
+        """启动调度器（首次调用时），注册进程存活轮询、数据库维护与定时重启"""
+        if not self.scheduler.start():
+            return self.scheduler
+        config = self.config_manager.get_setting("schedule_config") or {}
+        self.scheduler.every("monitor", 1.0, self._poll_running, blocking=True)
+        if config.get("maintenance_cron"):
+            self.scheduler.cron("maintenance", config["maintenance_cron"], self.run_maintenance,
+                                jitter=float(config.get("maintenance_jitter", 0)))
+        for entry in config.get("restarts") or []:
+            service = entry.get("service", "*")
+            names = list(self.service_status) if service == "*" else [service]
+            self.scheduler.cron(f"restart:{service}", entry["cron"],
+                                lambda names=names: self.scheduled_restart(names))
+        return self.scheduler
+    
+    def stop_scheduler(self):
+        """停止调度器，等待正在执行的任务结束"""
+        self.scheduler.stop()
+    
+    def close(self):
+        """
+        停止看门狗、调度器与预检线程池并等待其退出（不停止服务）
+        用于同一进程内先后创建多个管理器的场景，如规模测试的各个用例
+        """
+        self.watchdog.stop(wait=True)
+        self.stop_scheduler()
+        self.preflight.close()
+    
+    def scheduled_restart(self, service_names: list):
+        """定时重启：只重启正在运行的服务"""
+        for service_name in service_names:
+            if self.is_service_running(service_name):
+                print(f"定时重启 {service_name}")
+                self.restart_service(service_name, reason="scheduled")
+    
+    def run_maintenance(self):
+        """数据库维护：按保留期清理生命周期日志与日志归档，并整理数据库文件"""
+        if self.journal is not None:
+            days = float(self.config_manager.get_setting("journal_config.retention_days") or 0)
+            removed = self.journal.maintain(days * 86400 if days else None)
+            if removed:
+                print(f"生命周期日志维护完成，删除 {removed} 条过期事件")
+        days = float(self.config_manager.get_setting("log_archive_config.retention_days") or 0)
+        if self.log_archive is not None and days:
+            removed = self.log_archive.prune(time.time() - days * 86400)
+            if removed:
+                print(f"日志归档维护完成，删除 {removed} 个过期日志段")
+    
+    def start_alerting(self):
+        """按配置编译告警规则，注册日志计数器，并由调度器定期采样求值"""
+        from alerting import AlertEngine, LogCounters, build_sinks, compile_rules
+        if self.alerts is not None:
+            return self.alerts
+        config = self.config_manager.get_setting("alert_config") or {}
+        try:
+            rules = compile_rules(config.get("rules") or [])
+            sinks = build_sinks(config.get("sinks") or [], get_base_dir())
+        except (ValueError, KeyError) as e:
+            print(f"告警配置无效: {e}")
+            return None
+        if config.get("log_counters"):
+            self.log_counters = LogCounters(config["log_counters"])
+            self.register_output_callback(self.log_counters)
+        self.alerts = AlertEngine(rules, sinks, cooldown=float(config.get("cooldown", 1800)))
+        self.start_scheduler().every("alerts", float(config.get("interval", 10)), self.evaluate_alerts,
+                                     blocking=True)
+        print(f"告警已启用：{len(rules)} 条规则，{len(sinks)} 个通知端")
+        return self.alerts
+    
+    def evaluate_alerts(self):
+        """采样一次并求值告警规则"""
+        from alerting import print_notification
+        for notification in self.alerts.evaluate(self.collect_alert_metrics()):
+            print_notification(notification)
+    
+    def collect_alert_metrics(self) -> Dict[str, Dict[str, float]]:
+        """告警规则使用的指标，格式为 {指标名: {服务名: 值}}，全局指标的服务名为空字符串"""
+        names = ("up", "failed", "starts", "crashes", "restarts", "rss_mb", "probes", "probe_failures", "probe_p99_ms")
+        metrics: Dict[str, Dict[str, float]] = {name: {} for name in names}
+        for service_name, status in list(self.service_status.items()):
+            process = self.service_processes.get(service_name)
+            running = process is not None and process.poll() is None
+            metrics["up"][service_name] = 1.0 if running else 0.0
+            metrics["failed"][service_name] = 1.0 if status in (ServiceStatus.ERROR, ServiceStatus.DEGRADED) else 0.0
+            metrics["starts"][service_name] = float(self.start_counts.get(service_name, 0))
+            metrics["crashes"][service_name] = float(self.crash_counts.get(service_name, 0))
+            metrics["restarts"][service_name] = float(self.restart_counts.get(service_name, 0))
+            if running:
+                try:
+                    metrics["rss_mb"][service_name] = psutil.Process(process.pid).memory_info().rss / (1024 * 1024)
+                except psutil.Error:
+                    pass
+            liveness = self.watchdog.liveness.get(service_name)
+            if liveness:
+                metrics["probes"][service_name] = float(liveness["probes"])
+                metrics["probe_failures"][service_name] = float(liveness["failures"])
+                recent = sorted(liveness["recent_ms"])
+                if recent and running:
+                    metrics["probe_p99_ms"][service_name] = recent[min(len(recent) - 1, int(len(recent) * 0.99))]
+        wal = self.get_journal_path().with_name(self.get_journal_path().name + "-wal")
+        if wal.exists():
+            metrics["journal_wal_mb"] = {"": wal.stat().st_size / (1024 * 1024)}
+        if self.log_counters is not None:
+            metrics.update(self.log_counters.values())
+        if self.log_metrics is not None:
+            metrics.update(self.log_metrics.values())
+        return metrics
+    
+    def start_log_metrics(self):
+        """按配置注册日志指标提取器，需在服务启动前调用才能统计到启动阶段的输出"""
+        from logmetrics import LogMetrics
+        if self.log_metrics is not None:
+            return self.log_metrics
+        try:
+            self.log_metrics = LogMetrics(self.config_manager.get_setting("log_metrics_config.metrics") or {})
+        except (re.error, KeyError) as e:
+            print(f"日志指标配置无效: {e}")
+            return None
+        self.register_output_callback(self.log_metrics)
+        return self.log_metrics
+    
+    def print_log_metrics(self, previous: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """打印日志指标（与上一次快照相比的速率），返回本次快照"""
+        from logmetrics import print_log_metrics
+        if self.log_metrics is None:
+            return None
+        names = None
+        try:
+            from traffic import load_cmd_table
+            names = load_cmd_table().names
+        except ImportError:
+            pass
+        snapshot = self.log_metrics.snapshot()
+        print_log_metrics(snapshot, previous, int(self.config_manager.get_setting("log_metrics_config.top") or 10), names)
+        return snapshot
+    
+    def get_log_archive_root(self) -> Path:
+        """日志归档目录"""
+        root = Path(self.config_manager.get_setting("log_archive_config.root") or "logs")
+        return root if root.is_absolute() else get_base_dir() / root
+    
+    def start_log_archive(self):
+        """按配置启动日志归档"""
+        from logarchive import LogArchive
+        if self.log_archive is not None:
+            return self.log_archive
+        config = self.config_manager.get_setting("log_archive_config") or {}
+        self.log_archive = LogArchive(
+            str(self.get_log_archive_root()),
+            segment_lines=int(config.get("segment_lines", 20000)),
+            segment_seconds=float(config.get("segment_seconds", 300)),
+            block_lines=int(config.get("block_lines", 1024)),
+            workers=int(config.get("workers", 2)),
+            scheduler=self.start_scheduler()
+        )
+        self.register_output_callback(self.log_archive.append)
+        return self.log_archive
+    
+    def close_log_archive(self):
+        """封存未写出的日志并关闭归档"""
+        if self.log_archive is not None:
+            self.output_callbacks.remove(self.log_archive.append)
+            self.log_archive.close()
+            self.log_archive = None
+    
+    def start_journal(self):
+        """按配置打开生命周期日志，开始一个新会话"""
+        from journal import LifecycleJournal
+        if self.journal is not None:
+            return self.journal
+        config = self.config_manager.get_setting("journal_config") or {}
+        try:
+            self.journal = LifecycleJournal(
+                str(self.get_journal_path()),
+                flush_interval=float(config.get("flush_interval", 1.0)),
+                batch_size=int(config.get("batch_size", 256))
+            )
+        except Exception as e:
+            print(f"打开生命周期日志失败: {e}")
+        return self.journal
+    
+    def get_journal_path(self) -> Path:
+        """生命周期日志文件路径"""
+        path = Path(self.config_manager.get_setting("journal_config.path") or "journal.db")
+        return path if path.is_absolute() else get_base_dir() / path
+    
+    def close_journal(self):
+        """提交剩余事件并关闭生命周期日志"""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+    
+    def journal_event(self, service_name: str, event: str, **kwargs):
+        """记录生命周期事件（只进入内存队列）"""
+        if self.journal is not None:
+            self.journal.record(service_name, event, **kwargs)
+    
+    def _publish_service_state(self, service_name: str, status: ServiceStatus):
+        process = self.service_processes.get(service_name)
+        pid = process.pid if process and process.poll() is None else None
+        self.dashboard_hub.update_service(service_name, status=status.value, pid=pid)
+    
+    def collect_telemetry(self, connections: bool = False, consumer: str = "gui") -> Dict[str, Dict[str, Any]]:
+        """
+        采集运行中服务的CPU、内存占用与重启次数，connections 为真时同时统计TCP连接数
+        CPU占用为同一 consumer 两次采集之间的平均值
+        """
+        with self._telemetry_lock:
+            return self._collect_telemetry(self._telemetry_procs.setdefault(consumer, {}), connections)
+    
+    def _collect_telemetry(self, procs: Dict[str, psutil.Process], connections: bool) -> Dict[str, Dict[str, Any]]:
+        samples = {}
+        for service_name, process in list(self.service_processes.items()):
+            if process.poll() is not None:
+                continue
+            proc = procs.get(service_name)
+            if proc is None or proc.pid != process.pid:
+                try:
+                    proc = procs[service_name] = psutil.Process(process.pid)
+                except psutil.Error:
+                    continue
+            try:
+                samples[service_name] = {
+                    "cpu": round(proc.cpu_percent(None), 1),
+                    "rss_mb": round(proc.memory_info().rss / (1024 * 1024), 1),
+                    "restarts": max(0, self.start_counts.get(service_name, 1) - 1)
+                }
+                if connections:
+                    conns = getattr(proc, "net_connections", proc.connections)(kind="tcp")
+                    samples[service_name]["conns"] = sum(
+                        1 for conn in conns if conn.status == psutil.CONN_ESTABLISHED)
+            except psutil.Error:
+                continue
+        for service_name in set(procs) - set(samples):
+            del procs[service_name]
+        return samples
+    
+    def export_configured_trace(self):
+        """若配置了导出路径，则导出生命周期追踪数据"""
+        path = self.config_manager.get_setting("trace_config.export_path")
+        if not path:
+            return
+        try:
+            count = self.export_trace(path)
+            print(f"生命周期追踪已导出: {path} ({count} 个事件)")
+        except OSError as e:
+            print(f"导出生命周期追踪失败: {e}")
+    
+    def get_service_port(self, service_name: str) -> Optional[int]:
+        """获取服务监听端口"""
+        service_paths = self.config_manager.get_setting("service_config.service_paths") or {}
+        service_config = service_paths.get(service_name)
+        if isinstance(service_config, dict):
+            return service_config.get("port")
+        return None
+    
     def _notify_status_change(self, service_name: str, status: ServiceStatus):
         """通知状态变化"""
+        previous = self.service_status.get(service_name)
         self.service_status[service_name] = status
+        if status != previous:
+            self.journal_event(service_name, "status", status=status.value)
+        self.tracer.instant(service_name, f"status:{status.value}")
+        if self.dashboard_hub:
+            self._publish_service_state(service_name, status)
         if service_name in self.status_callbacks:
             self.status_callbacks[service_name](status)
     
@@ -244,25 +1659,7 @@ class ProcessManager:
                 return False
             
             service_config = service_paths[service_name]
-            
-            # 支持新的配置格式（包含executable和args）和旧格式（直接路径）
-            if isinstance(service_config, dict):
-                executable_path = service_config.get("executable", "")
-                args = service_config.get("args", [])
-            else:
-                # 兼容旧格式
-                executable_path = service_config
-                args = []
-            
-            # 使用智能路径解析
-            if getattr(sys, 'frozen', False):
-                # 打包后的可执行文件
-                base_dir = Path(sys.executable).parent
-            else:
-                # 开发环境中的Python脚本
-                base_dir = Path(__file__).parent
-            
-            abs_executable_path = base_dir / executable_path
+            abs_executable_path, cmd = resolve_service_command(service_config)
             
             if not abs_executable_path.exists():
                 print(f"可执行文件不存在: {abs_executable_path}")
@@ -273,23 +1670,28 @@ class ProcessManager:
             if self.is_service_running(service_name):
                 return True
             
+            # 启动前检查，失败时立即报告而不必等待启动超时
+            if self.config_manager.get_setting("preflight_config.enabled"):
+                preflight_start = self.tracer.now()
+                results = self.run_preflight(service_name)
+                self.tracer.span(service_name, "preflight", preflight_start)
+                if has_failures(results):
+                    print(f"启动前检查未通过 {service_name}:")
+                    print_preflight_report(service_name, [r for r in results if r["level"] != "ok"])
+                    self.journal_event(service_name, "preflight_failed",
+                                       checks=[r["check"] for r in results if r["level"] == "fail"])
+                    self._notify_status_change(service_name, ServiceStatus.ERROR)
+                    return False
+            
             # 设置启动状态
             self._notify_status_change(service_name, ServiceStatus.STARTING)
-            
-            # 构建命令行参数
-            cmd = [str(abs_executable_path)]
-            if args:
-                # 将相对路径转换为绝对路径
-                for arg in args:
-                    if arg.startswith("../") or arg.startswith("./"):
-                        abs_arg_path = base_dir / arg
-                        cmd.append(str(abs_arg_path))
-                    else:
-                        cmd.append(arg)
+            ensure_executable(abs_executable_path)
             
             # 启动进程
+            profile = self.get_resource_profile(service_name)
+            spawn_start = self.tracer.now()
             process = subprocess.Popen(
-                cmd,
+                wrap_emulator(cmd),
                 cwd=abs_executable_path.parent,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
@@ -297,13 +1699,31 @@ class ProcessManager:
             )
             
             self.service_processes[service_name] = process
+            self.start_counts[service_name] = self.start_counts.get(service_name, 0) + 1
+            self.tracer.span(service_name, "spawn", spawn_start, pid=process.pid)
+            self.journal_event(service_name, "spawn", pid=process.pid)
+            # 资源配置在启动后通过psutil应用：start_service 会在调度器、代理等多个线程中调用，
+            # 多线程进程中使用 preexec_fn 可能使子进程在 fork 时继承被占用的锁而死锁
+            self._apply_resource_profile(service_name, process.pid, profile)
+            self.watchdog.start()
+            scheduler = self.start_scheduler()
             
-            # 启动监控线程
-            threading.Thread(
-                target=self._monitor_service,
-                args=(service_name, process),
-                daemon=True
-            ).start()
+            # 启动输出读取线程，避免管道写满阻塞服务进程
+            first_output = threading.Event()
+            for stream_name, stream in (("stdout", process.stdout), ("stderr", process.stderr)):
+                threading.Thread(
+                    target=self._drain_output,
+                    args=(service_name, stream_name, stream, first_output),
+                    daemon=True
+                ).start()
+            
+            # 由调度器检查启动过程，启动完成后转入统一的存活轮询
+            startup = {"started": time.monotonic(), "port": self.get_service_port(service_name)}
+            scheduler.call_later(
+                f"startup:{service_name}:{process.pid}", 0,
+                lambda: self._check_startup(service_name, process, spawn_start, startup),
+                blocking=True
+            )
             
             return True
             
@@ -318,15 +1738,29 @@ class ProcessManager:
             if service_name in self.service_processes:
                 process = self.service_processes[service_name]
                 if process and process.poll() is None:
+                    stop_start = self.tracer.now()
+                    self.tracer.instant(service_name, "stop_requested")
+                    # 进程监控据此区分主动停止与崩溃
+                    self._stopping_pids.add(process.pid)
                     process.terminate()
                     # 等待进程结束
                     try:
                         process.wait(timeout=5)
                     except subprocess.TimeoutExpired:
                         process.kill()
+                        process.wait()
+                    self.tracer.span(service_name, "stop", stop_start, exit_code=process.returncode)
+                    self.journal_event(service_name, "exit", exit_code=process.returncode,
+                                       stop_ms=round((self.tracer.now() - stop_start) / 1e6, 1))
                 
                 del self.service_processes[service_name]
             
+            job = self._job_handles.pop(service_name, None)
+            if job:
+                import ctypes
+                from ctypes import wintypes
+                ctypes.windll.kernel32.CloseHandle(wintypes.HANDLE(job))
+            
             self._notify_status_change(service_name, ServiceStatus.STOPPED)
             return True
             
@@ -334,12 +1768,79 @@ class ProcessManager:
             print(f"停止服务失败 {service_name}: {e}")
             return False
     
-    def restart_service(self, service_name: str) -> bool:
-        """重启服务"""
+    def restart_service(self, service_name: str, reason: str = "manual") -> bool:
+        """重启服务，reason 记录重启决策的来源（manual/watchdog/remote/scheduled）"""
+        self.journal_event(service_name, "restart", reason=reason)
+        self.restart_counts[service_name] = self.restart_counts.get(service_name, 0) + 1
         self.stop_service(service_name)
         time.sleep(1)  # 等待进程完全停止
         return self.start_service(service_name)
     
+    def build_preflight_checks(self, service_name: str) -> list:
+        """根据服务配置生成启动前检查列表"""
+        service_paths = self.config_manager.get_setting("service_config.service_paths") or {}
+        service_config = service_paths.get(service_name)
+        if service_config is None:
+            return []
+        abs_executable_path, cmd = resolve_service_command(service_config)
+        service_dir = abs_executable_path.parent
+        expected_hash = service_config.get("sha256") if isinstance(service_config, dict) else None
+        
+        checks = [("binary", {"path": str(abs_executable_path), "sha256": expected_hash})]
+        # pexecvelf 模式下参数中的ELF文件同样需要检查
+        args = service_config.get("args", []) if isinstance(service_config, dict) else []
+        for arg, abs_arg in zip(args, cmd[1:]):
+            if arg.startswith("../") or arg.startswith("./"):
+                checks.append(("binary", {"path": abs_arg}))
+        
+        port = self.get_service_port(service_name)
+        if port:
+            checks.append(("port", {"port": port}))
+        
+        extra = (self.config_manager.get_setting("preflight_config.services") or {}).get(service_name, {})
+        if extra.get("config_file"):
+            checks.append(("config", {
+                "path": str(service_dir / extra["config_file"]),
+                "required": extra.get("required", [])
+            }))
+        if extra.get("database"):
+            checks.append(("database", {"path": str(service_dir / extra["database"])}))
+        
+        checks.append(("disk", {"path": str(service_dir if service_dir.exists() else get_base_dir())}))
+        return checks
+    
+    def run_preflight(self, service_name: str) -> list:
+        """并发执行服务的启动前检查"""
+        return self.preflight.run(self.build_preflight_checks(service_name))
+    
+    def get_resource_profile(self, service_name: str) -> Dict[str, Any]:
+        """获取服务的资源隔离配置"""
+        profiles = self.config_manager.get_setting("service_config.resource_profiles") or {}
+        return profiles.get(service_name) or {}
+    
+    def _apply_resource_profile(self, service_name: str, pid: int, profile: Dict[str, Any]):
+        """在进程启动后应用资源配置（亲和性、优先级、IO优先级、内存上限）"""
+        for error in apply_resource_profile(pid, profile):
+            print(f"应用资源配置失败 {service_name}: {error}")
+        if sys.platform == "win32" and profile.get("memory_limit_mb"):
+            try:
+                self._job_handles[service_name] = _assign_job_memory_limit(pid, profile["memory_limit_mb"])
+            except OSError as e:
+                print(f"应用内存上限失败 {service_name}: {e}")
+    
+    def check_resource_profile(self, service_name: str) -> list:
+        """复核运行中服务的资源配置，发现偏差时重新应用"""
+        process = self.service_processes.get(service_name)
+        profile = self.get_resource_profile(service_name)
+        if not process or not profile or process.poll() is not None:
+            return []
+        mismatches = verify_resource_profile(process.pid, profile)
+        if mismatches:
+            print(f"{service_name} 资源配置与预期不一致: {', '.join(mismatches)}，重新应用")
+            for error in apply_resource_profile(process.pid, profile):
+                print(f"应用资源配置失败 {service_name}: {error}")
+        return mismatches
+    
     def get_service_status(self, service_name: str) -> ServiceStatus:
         """获取服务状态"""
         return self.service_status.get(service_name, ServiceStatus.STOPPED)
@@ -351,40 +1852,103 @@ class ProcessManager:
             return process and process.poll() is None
         return False
     
-    def _monitor_service(self, service_name: str, process: subprocess.Popen):
-        """监控服务进程"""
+    def _drain_output(self, service_name: str, stream_name: str, stream, first_output: threading.Event):
+        """持续读取服务输出并分发给已注册的回调"""
+        try:
+            for raw_line in iter(stream.readline, b""):
+                if not first_output.is_set():
+                    first_output.set()
+                    self.tracer.instant(service_name, "first_output", stream=stream_name)
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+                for callback in self.output_callbacks:
+                    try:
+                        callback(service_name, stream_name, line)
+                    except Exception as e:
+                        print(f"输出回调出错 {service_name}: {e}")
+        except (OSError, ValueError):
+            pass
+        finally:
+            stream.close()
+    
+    def _is_port_bound(self, process: subprocess.Popen, port: int) -> bool:
+        """检查服务进程是否已在指定端口上监听"""
+        try:
+            proc = psutil.Process(process.pid)
+            connections = getattr(proc, "net_connections", proc.connections)(kind="tcp")
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        return any(conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port
+                   for conn in connections)
+    
+    def _check_startup(self, service_name: str, process: subprocess.Popen, spawn_start: int,
+                       startup: Dict[str, Any]) -> Optional[float]:
+        """
+        启动阶段的一次检查，返回下次检查的间隔（秒），None 表示启动阶段结束
+        端口绑定前以较短间隔轮询以便准确记录绑定时间
+        """
+        if process.poll() is not None:
+            # 进程已退出
+            self.tracer.span(service_name, "startup", spawn_start, failed=True)
+            self.tracer.instant(service_name, "exited", exit_code=process.returncode)
+            self._handle_exit(service_name, process, "startup", startup["started"])
+            return None
         timeout = self.config_manager.get_setting("service_config.startup_timeout") or 10
-        start_time = time.time()
-        
-        # 等待进程启动
-        while time.time() - start_time < timeout:
-            if process.poll() is not None:
-                # 进程已退出
-                self._notify_status_change(service_name, ServiceStatus.ERROR)
-                return
-            time.sleep(0.5)
+        if time.monotonic() - startup["started"] < timeout:
+            port = startup["port"]
+            if port and self._is_port_bound(process, port):
+                self.tracer.span(service_name, "bind", spawn_start, port=port)
+                startup["port"] = port = None
+            return 0.05 if port else 0.5
         
         # 启动成功
+        self.tracer.span(service_name, "startup", spawn_start)
         self._notify_status_change(service_name, ServiceStatus.RUNNING)
-        
-        # 继续监控进程
-        while process.poll() is None:
-            time.sleep(1)
-        
+        self.check_resource_profile(service_name)
+        with self._watch_lock:
+            self._running_watch[process.pid] = (service_name, process, time.monotonic())
+        return None
+    
+    def _poll_running(self):
+        """统一轮询所有已启动完成的服务进程（每秒一次），发现退出时交给 _handle_exit"""
+        with self._watch_lock:
+            watched = list(self._running_watch.items())
+        for pid, (service_name, process, running_since) in watched:
+            if process.poll() is None:
+                continue
+            with self._watch_lock:
+                self._running_watch.pop(pid, None)
+            self.tracer.instant(service_name, "exited", exit_code=process.returncode)
+            self._handle_exit(service_name, process, "running", running_since)
+    
+    def _handle_exit(self, service_name: str, process: subprocess.Popen, phase: str, since: float):
+        """处理进程退出：主动停止的由 stop_service 记录，其余视为崩溃"""
+        if process.pid in self._stopping_pids:
+            self._stopping_pids.discard(process.pid)
+            return
+        self.journal_event(service_name, "crash", exit_code=process.returncode, phase=phase,
+                           uptime=round(time.monotonic() - since, 1))
+        self.crash_counts[service_name] = self.crash_counts.get(service_name, 0) + 1
         # 进程异常退出
-        if service_name in self.service_processes:
+        if self.service_processes.get(service_name) is process:
             self._notify_status_change(service_name, ServiceStatus.ERROR)
 
 class ServiceCard(ctk.CTkFrame):
     """服务状态卡片"""
     
-    def __init__(self, parent, service_name: str, process_manager: ProcessManager, theme_manager: ThemeManager):
+    def __init__(self, parent, service_name: str, process_manager: ProcessManager, theme_manager: ThemeManager,
+                 log_buffer: Optional[LogRingBuffer] = None, log_frame_ms: int = 50,
+                 show_telemetry: bool = False):
         super().__init__(parent)
         
         self.service_name = service_name
         self.process_manager = process_manager
         self.theme_manager = theme_manager
         self.status = ServiceStatus.STOPPED
+        self.log_buffer = log_buffer
+        self.log_frame_ms = log_frame_ms
+        self.log_viewer: Optional[LogViewer] = None
+        self.show_telemetry = show_telemetry
+        self.sparklines: Dict[str, Sparkline] = {}
         
         self.setup_ui()
         self.update_status(self.process_manager.get_service_status(service_name))
@@ -421,9 +1985,18 @@ class ServiceCard(ctk.CTkFrame):
         )
         self.status_label.grid(row=1, column=1, padx=5, pady=(0, 10), sticky="w")
         
+        # 资源曲线
+        if self.show_telemetry:
+            self.telemetry_frame = ctk.CTkFrame(self, fg_color="transparent")
+            self.telemetry_frame.grid(row=0, column=2, rowspan=2, padx=5, pady=10, sticky="e")
+            for column, (key, title, fmt) in enumerate(METRICS):
+                sparkline = Sparkline(self.telemetry_frame, title, fmt)
+                sparkline.grid(row=0, column=column, padx=2)
+                self.sparklines[key] = sparkline
+        
         # 控制按钮
         self.button_frame = ctk.CTkFrame(self)
-        self.button_frame.grid(row=0, column=2, rowspan=2, padx=10, pady=10, sticky="e")
+        self.button_frame.grid(row=0, column=3, rowspan=2, padx=10, pady=10, sticky="e")
         
         self.start_button = ctk.CTkButton(
             self.button_frame,
@@ -457,6 +2030,38 @@ class ServiceCard(ctk.CTkFrame):
             command=self.restart_service
         )
         self.restart_button.grid(row=0, column=2, padx=2, pady=2)
+        
+        if self.log_buffer is not None:
+            self.log_button = ctk.CTkButton(
+                self.button_frame,
+                text="日志",
+                width=60,
+                height=32,
+                command=self.toggle_log_viewer
+            )
+            self.log_button.grid(row=0, column=3, padx=2, pady=2)
+    
+    def toggle_log_viewer(self):
+        """展开或收起日志面板，收起时销毁组件以停止刷新"""
+        if self.log_viewer is None:
+            self.log_viewer = LogViewer(self, self.log_buffer, frame_ms=self.log_frame_ms)
+            self.log_viewer.grid(row=2, column=0, columnspan=4, padx=10, pady=(0, 10), sticky="nsew")
+        else:
+            self.log_viewer.destroy()
+            self.log_viewer = None
+    
+    def apply_theme(self):
+        """主题切换后更新日志面板与资源曲线配色"""
+        if self.log_viewer is not None:
+            self.log_viewer.apply_theme()
+        dark = self.theme_manager.get_current_theme() == "dark"
+        for sparkline in self.sparklines.values():
+            sparkline.apply_theme(dark)
+    
+    def draw_sparklines(self, history):
+        """按最新采样重绘资源曲线（数据未变化的曲线不会重绘）"""
+        for key, sparkline in self.sparklines.items():
+            sparkline.draw(history, key)
     
     def update_status(self, status: ServiceStatus):
         """更新状态显示"""
@@ -481,6 +2086,12 @@ class ServiceCard(ctk.CTkFrame):
             self.start_button.configure(state="disabled")
             self.stop_button.configure(state="normal")
             self.restart_button.configure(state="normal")
+        elif status == ServiceStatus.DEGRADED:
+            self.status_indicator.configure(text_color="#FF9800")
+            self.status_label.configure(text="无响应")
+            self.start_button.configure(state="disabled")
+            self.stop_button.configure(state="normal")
+            self.restart_button.configure(state="normal")
         elif status == ServiceStatus.ERROR:
             self.status_indicator.configure(text_color="#F44336")
             self.status_label.configure(text="错误")
@@ -632,13 +2243,28 @@ class ErrorDialog(ctk.CTkToplevel):
 class MainWindow(ctk.CTk):
     """主窗口"""
     
-    def __init__(self):
+    def __init__(self, launch_mode: Optional[str] = None, simulate: Optional[int] = None):
         super().__init__()
         
         # 初始化管理器
         self.config_manager = ConfigManager()
+        apply_launch_overrides(self.config_manager, launch_mode, simulate)
         self.theme_manager = ThemeManager(self.config_manager)
         self.process_manager = ProcessManager(self.config_manager)
+        if self.config_manager.get_setting("journal_config.enabled"):
+            self.process_manager.start_journal()
+        if self.config_manager.get_setting("log_metrics_config.enabled"):
+            self.process_manager.start_log_metrics()
+        if self.config_manager.get_setting("dispatch_cache_config.enabled"):
+            self.process_manager.start_dispatch_cache()
+        if self.config_manager.get_setting("autoscale_config.enabled"):
+            self.process_manager.start_autoscaler()
+        if self.config_manager.get_setting("dashboard_config.enabled"):
+            self.process_manager.start_dashboard()
+        if self.config_manager.get_setting("log_archive_config.enabled"):
+            self.process_manager.start_log_archive()
+        if self.config_manager.get_setting("alert_config.enabled"):
+            self.process_manager.start_alerting()
         
         self.setup_window()
         self.setup_ui()
@@ -646,6 +2272,8 @@ class MainWindow(ctk.CTk):
         
         # 应用主题
         self.theme_manager.set_theme(self.theme_manager.mode)
+        for card in self.service_cards.values():
+            card.apply_theme()
     
     def setup_window(self):
         """设置窗口"""
@@ -713,16 +2341,38 @@ class MainWindow(ctk.CTk):
         self.service_cards = {}
         service_paths = self.config_manager.get_setting("service_config.service_paths") or {}
         
+        # 服务输出在读取线程中写入环形缓冲区，日志面板按帧取用
+        capacity = self.config_manager.get_setting("ui_config.log_buffer_lines") or 20000
+        self.log_buffers = {name: LogRingBuffer(capacity) for name in service_paths.keys()}
+        self.process_manager.register_output_callback(self.on_service_output)
+        
         for i, service_name in enumerate(service_paths.keys()):
             card = ServiceCard(
                 self.services_frame,
                 service_name,
                 self.process_manager,
-                self.theme_manager
+                self.theme_manager,
+                log_buffer=self.log_buffers[service_name],
+                log_frame_ms=self.config_manager.get_setting("ui_config.log_frame_ms") or 50,
+                show_telemetry=bool(self.config_manager.get_setting("ui_config.show_telemetry"))
             )
             card.pack(fill="x", padx=5, pady=5)
             self.service_cards[service_name] = card
         
+        # 资源曲线：后台线程采样，界面按固定周期重绘
+        self.telemetry_sampler = None
+        if self.config_manager.get_setting("ui_config.show_telemetry"):
+            conn_every = self.config_manager.get_setting("ui_config.telemetry_conn_every") or 5
+            ticks = itertools.count()
+            self.telemetry_sampler = TelemetrySampler(
+                lambda: self.process_manager.collect_telemetry(connections=next(ticks) % conn_every == 0),
+                list(service_paths.keys()),
+                interval=self.config_manager.get_setting("ui_config.telemetry_interval") or 1.0,
+                history=self.config_manager.get_setting("ui_config.telemetry_history") or 300
+            ).start(self.process_manager.start_scheduler())
+            self.after(self.config_manager.get_setting("ui_config.telemetry_refresh_ms") or 1000,
+                       self.refresh_telemetry)
+        
         # 底部控制框架
         self.bottom_frame = ctk.CTkFrame(self.main_frame)
         self.bottom_frame.pack(fill="x", padx=10, pady=(5, 10))
@@ -777,13 +2427,42 @@ class MainWindow(ctk.CTk):
         self.bind("<Control-s>", lambda e: self.stop_all_services())
         self.bind("<Control-t>", lambda e: self.toggle_theme())
         self.bind("<F5>", lambda e: self.refresh_status())
+        self.bind("<F9>", lambda e: self.run_profiler("cprofile-toggle"))
+        self.bind("<F10>", lambda e: self.run_profiler("stacks"))
+        self.bind("<F11>", lambda e: self.run_profiler("mem-snapshot"))
+        self.bind("<F12>", lambda e: self.run_profiler("cpu-toggle"))
         
         # 窗口关闭事件
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    def refresh_telemetry(self):
+        """按固定周期重绘资源曲线（单次重绘出错不影响后续刷新）"""
+        try:
+            for service_name, card in self.service_cards.items():
+                card.draw_sparklines(self.telemetry_sampler.histories[service_name])
+        finally:
+            self.after(self.config_manager.get_setting("ui_config.telemetry_refresh_ms") or 1000,
+                       self.refresh_telemetry)
+    
+    def on_service_output(self, service_name: str, stream_name: str, line: str):
+        """服务输出回调（在读取线程中调用，只写入缓冲区）"""
+        buffer = self.log_buffers.get(service_name)
+        if buffer is not None:
+            buffer.append(line)
+    
+    def run_profiler(self, action: str):
+        """在GUI主线程上执行自身分析操作，结果输出到控制台"""
+        from selfprofile import print_profile_result
+        try:
+            print_profile_result(self.process_manager.get_profiler().control(action))
+        except Exception as e:
+            print(f"自身分析失败: {e}")
+    
     def change_theme(self, theme: str):
         """切换主题"""
         self.theme_manager.set_theme(theme)
+        for card in self.service_cards.values():
+            card.apply_theme()
     
     def toggle_theme(self):
         """切换主题（快捷键）"""
@@ -791,6 +2470,8 @@ class MainWindow(ctk.CTk):
         new_theme = "dark" if current == "light" else "light"
         self.theme_var.set(new_theme)
         self.theme_manager.set_theme(new_theme)
+        for card in self.service_cards.values():
+            card.apply_theme()
     
     def start_all_services(self):
         """启动全部服务"""
@@ -850,20 +2531,39 @@ class MainWindow(ctk.CTk):
             self.config_manager.save_config()
         
         # 停止所有服务
+        self.process_manager.stop_autoscaler()
         for service_name in self.service_cards.keys():
             self.process_manager.stop_service(service_name)
+        if self.telemetry_sampler:
+            self.telemetry_sampler.stop()
+        self.process_manager.stop_scheduler()
+        self.process_manager.export_configured_trace()
+        self.process_manager.close_log_archive()
+        self.process_manager.close_journal()
         
         self.destroy()
 
 def run_cli_command(args):
     """运行命令行命令"""
     config_manager = ConfigManager()
+    apply_launch_overrides(config_manager, args.launch_mode, args.simulate)
     process_manager = ProcessManager(config_manager)
     
     if args.command == 'run':
         print("正在启动所有服务端...")
         service_paths = config_manager.get_setting("service_config.service_paths") or {}
         success_count = 0
+        if config_manager.get_setting("journal_config.enabled"):
+            process_manager.start_journal()
+        if config_manager.get_setting("log_metrics_config.enabled"):
+            process_manager.start_log_metrics()
+        # 仪表盘、日志归档与告警需在启动服务前就绪，才能收到服务的启动输出
+        if config_manager.get_setting("dashboard_config.enabled"):
+            process_manager.start_dashboard()
+        if config_manager.get_setting("log_archive_config.enabled"):
+            process_manager.start_log_archive()
+        if config_manager.get_setting("alert_config.enabled"):
+            process_manager.start_alerting()
         
         for service_name in service_paths.keys():
             print(f"启动 {service_name}...")
@@ -875,23 +2575,71 @@ def run_cli_command(args):
         
         print(f"\n启动完成: {success_count}/{len(service_paths)} 个服务启动成功")
         
+        if config_manager.get_setting("frontend_config.enabled"):
+            process_manager.start_frontend()
+        if config_manager.get_setting("autoscale_config.enabled"):
+            process_manager.start_autoscaler()
+        if config_manager.get_setting("dispatch_cache_config.enabled"):
+            process_manager.start_dispatch_cache()
+        process_manager.install_profile_signals()
+        
         if success_count > 0:
+            from scheduler import print_scheduler_report
             print("服务正在后台运行，可以安全关闭此命令行窗口。")
-            # 保持进程运行，让服务在后台继续
+            # 周期性工作均注册到调度器，主线程只等待退出
+            scheduler = process_manager.start_scheduler()
+            finished = threading.Event()
+            
+            def check_running():
+                # 检查是否还有服务在运行
+                if not any(process_manager.is_service_running(name) for name in list(service_paths)):
+                    print("所有服务已停止，退出管理器。")
+                    finished.set()
+            
+            scheduler.every("supervise", 5.0, check_running)
+            if process_manager.frontend:
+                from frontend import print_frontend_metrics
+                scheduler.every("frontend-metrics",
+                                float(config_manager.get_setting("frontend_config.metrics_interval") or 30),
+                                lambda: print_frontend_metrics(process_manager.frontend.metrics()))
+            autoscale_interval = config_manager.get_setting("autoscale_config.report_interval")
+            if process_manager.autoscaler and autoscale_interval:
+                from autoscale import print_autoscale_status
+                scheduler.every("autoscale-report", float(autoscale_interval),
+                                lambda: print_autoscale_status(process_manager.autoscaler.status()))
+            if process_manager.dispatch_cache:
+                from dispatchcache import print_dispatch_cache_metrics
+                scheduler.every("dispatch-cache-metrics",
+                                float(config_manager.get_setting("dispatch_cache_config.metrics_interval") or 30),
+                                lambda: print_dispatch_cache_metrics(process_manager.dispatch_cache.metrics()))
+            log_metrics_interval = config_manager.get_setting("log_metrics_config.report_interval")
+            if process_manager.log_metrics and log_metrics_interval:
+                last_log_metrics = [None]
+                
+                def report_log_metrics():
+                    last_log_metrics[0] = process_manager.print_log_metrics(last_log_metrics[0])
+                
+                scheduler.every("log-metrics", float(log_metrics_interval), report_log_metrics, blocking=True)
+            report_interval = config_manager.get_setting("schedule_config.report_interval")
+            if report_interval:
+                scheduler.every("schedule-report", float(report_interval), lambda: print_scheduler_report(scheduler))
             try:
-                while True:
-                    time.sleep(60)  # 每分钟检查一次
-                    # 检查是否还有服务在运行
-                    running_count = sum(1 for name in service_paths.keys() 
-                                      if process_manager.is_service_running(name))
-                    if running_count == 0:
-                        print("所有服务已停止，退出管理器。")
-                        break
+                # 带超时等待，Windows 下 Ctrl+C 才能打断
+                while not finished.wait(1.0):
+                    pass
             except KeyboardInterrupt:
                 print("\n收到中断信号，停止所有服务...")
-                for service_name in service_paths.keys():
+                process_manager.stop_autoscaler()
+                for service_name in list(service_paths):
                     process_manager.stop_service(service_name)
                 print("所有服务已停止。")
+            process_manager.stop_autoscaler()
+            process_manager.stop_scheduler()
+            print_scheduler_report(scheduler)
+            process_manager.print_log_metrics()
+        process_manager.export_configured_trace()
+        process_manager.close_log_archive()
+        process_manager.close_journal()
     
     elif args.command == 'status':
         print("服务端运行状态:")
@@ -925,9 +2673,400 @@ def run_cli_command(args):
                 print(f"✗ {service_name} 停止失败")
         
         print("所有服务已停止。")
+    
+    elif args.command == 'preflight':
+        print("正在执行启动前检查...")
+        service_paths = config_manager.get_setting("service_config.service_paths") or {}
+        failed = []
+        for service_name in service_paths.keys():
+            started = time.perf_counter()
+            results = process_manager.run_preflight(service_name)
+            print_preflight_report(service_name, results)
+            print(f"  {service_name} 检查耗时 {(time.perf_counter() - started) * 1000:.1f}ms")
+            if has_failures(results):
+                failed.append(service_name)
+        if failed:
+            print(f"\n检查未通过: {', '.join(failed)}")
+            sys.exit(1)
+        print("\n所有检查通过")
+    
+    elif args.command == 'agent':
+        import asyncio
+        from agent import SupervisorAgent, parse_address
+        host, port = parse_address(config_manager.get_setting("agent_config.listen"))
+        token = config_manager.get_setting("agent_config.token")
+        if not token:
+            import secrets
+            token = secrets.token_urlsafe(24)
+            print(f"未设置认证令牌，已生成临时令牌: {token}")
+        agent = SupervisorAgent(process_manager, token, host, port)
+        process_manager.install_profile_signals()
+        if config_manager.get_setting("journal_config.enabled"):
+            process_manager.start_journal()
+        if config_manager.get_setting("log_metrics_config.enabled"):
+            process_manager.start_log_metrics()
+        if config_manager.get_setting("alert_config.enabled"):
+            process_manager.start_alerting()
+        if config_manager.get_setting("dispatch_cache_config.enabled"):
+            process_manager.start_dispatch_cache()
+        if config_manager.get_setting("autoscale_config.enabled"):
+            process_manager.start_autoscaler()
+        print(f"代理模式已启动，监听 {host}:{port}")
+        try:
+            asyncio.run(agent.serve_forever())
+        except KeyboardInterrupt:
+            print("\n收到中断信号，停止所有服务...")
+            process_manager.stop_autoscaler()
+            for service_name in list(process_manager.service_status):
+                process_manager.stop_service(service_name)
+        process_manager.stop_autoscaler()
+        process_manager.stop_scheduler()
+        process_manager.close_journal()
+    
+    elif args.command == 'remote':
+        from agent import run_remote_command
+        nodes = config_manager.get_setting("agent_config.nodes") or []
+        if not nodes:
+            print("未配置代理节点，请使用 --nodes 指定")
+            sys.exit(1)
+        services = args.remote_services.split(",") if args.remote_services else None
+        ok = run_remote_command(nodes, config_manager.get_setting("agent_config.token"),
+                                args.remote_action, services)
+        sys.exit(0 if ok else 1)
+    
+    elif args.command == 'profile':
+        from agent import run_profile_command
+        nodes = config_manager.get_setting("agent_config.nodes") or [config_manager.get_setting("agent_config.listen")]
+        options = {"interval_ms": args.profile_interval} if args.profile_interval else None
+        ok = run_profile_command(nodes, config_manager.get_setting("agent_config.token"),
+                                 args.profile_action, options)
+        sys.exit(0 if ok else 1)
+    
+    elif args.command == 'frontend':
+        from frontend import print_frontend_metrics
+        frontend = process_manager.start_frontend()
+        if frontend is None:
+            sys.exit(1)
+        interval = config_manager.get_setting("frontend_config.metrics_interval") or 30
+        try:
+            while True:
+                time.sleep(interval)
+                print_frontend_metrics(frontend.metrics())
+        except KeyboardInterrupt:
+            print_frontend_metrics(frontend.metrics())
+    
+    elif args.command == 'dispatch-cache':
+        from dispatchcache import print_dispatch_cache_metrics
+        cache = process_manager.start_dispatch_cache()
+        if cache is None:
+            sys.exit(1)
+        interval = config_manager.get_setting("dispatch_cache_config.metrics_interval") or 30
+        try:
+            while True:
+                time.sleep(interval)
+                print_dispatch_cache_metrics(cache.metrics())
+        except KeyboardInterrupt:
+            print_dispatch_cache_metrics(cache.metrics())
+    
+    elif args.command in ('traffic-tap', 'traffic-report'):
+        try:
+            from traffic import TrafficTap, analyze_traffic, load_cmd_table, print_traffic_report, read_capture
+        except ImportError as e:
+            print(f"流量分析需要 NumPy，请先执行 pip install numpy（{e}）")
+            sys.exit(2)
+        from agent import parse_address
+        config = config_manager.get_setting("traffic_config") or {}
+        table = load_cmd_table(config.get("proto_dir") or None)
+        top = args.traffic_top or int(config.get("top", 20))
+        capture = Path(config.get("capture") or "")
+        if config.get("capture") and not capture.is_absolute():
+            capture = get_base_dir() / capture
+        if args.command == 'traffic-report':
+            import numpy as np
+            paths = args.traffic_report or ([capture] if config.get("capture") else [])
+            try:
+                records = np.concatenate([read_capture(path) for path in paths]) if paths else np.empty(0)
+            except (OSError, ValueError) as e:
+                print(f"读取抓包文件失败: {e}")
+                sys.exit(1)
+            print_traffic_report(analyze_traffic(records, table), top)
+        else:
+            tap = TrafficTap(parse_address(config.get("listen", "0.0.0.0:23321")),
+                             parse_address(config.get("upstream", "127.0.0.1:23301"), GAMESERVER_PORT),
+                             capture=capture if config.get("capture") else None,
+                             window=float(config.get("window", 300)))
+            try:
+                tap.start_in_thread()
+            except (OSError, TimeoutError) as e:
+                print(f"抓包代理启动失败: {e}")
+                sys.exit(1)
+            host, port = tap.listen
+            print(f"抓包代理已启动，监听 {host}:{port}，按 Ctrl+C 停止")
+            interval = float(config.get("report_interval", 60))
+            try:
+                while True:
+                    time.sleep(interval)
+                    print_traffic_report(analyze_traffic(tap.recent(), table), top)
+            except KeyboardInterrupt:
+                print_traffic_report(analyze_traffic(tap.recent(), table), top)
+                if config.get("capture"):
+                    print(f"抓包已写入 {capture}")
+    
+    elif args.command == 'fault':
+        from faultproxy import load_fault_routes, run_fault_proxy
+        routes = load_fault_routes(args.fault_config, config_manager.get_setting("fault_config.routes") or [])
+        print(f"故障注入代理已启动 ({len(routes)} 条路由)，按 Ctrl+C 停止")
+        run_fault_proxy(routes, config_manager.get_setting("fault_config.seed"),
+                        config_manager.get_setting("fault_config.report_interval") or 30)
+    
+    elif args.command == 'logs':
+        from logarchive import parse_time_arg, query_archive
+        try:
+            results = query_archive(
+                str(process_manager.get_log_archive_root()),
+                since=parse_time_arg(args.since),
+                until=parse_time_arg(args.until),
+                service=args.service,
+                cmd_id=args.cmd_id,
+                level=args.level,
+                pattern=args.grep,
+                limit=args.limit
+            )
+            for ts, service_name, stream_name, line in results:
+                stamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                print(f"{stamp} [{service_name}] {line}")
+        except ValueError as e:
+            print(f"查询参数无效: {e}")
+            sys.exit(1)
+    
+    elif args.command == 'journal':
+        from journal import crash_history, print_journal_report, service_report
+        from logarchive import parse_time_arg
+        path = str(process_manager.get_journal_path())
+        try:
+            since, until = parse_time_arg(args.since), parse_time_arg(args.until)
+        except ValueError as e:
+            print(f"查询参数无效: {e}")
+            sys.exit(1)
+        print_journal_report(
+            service_report(path, service=args.service, since=since, until=until),
+            crash_history(path, service=args.service, since=since, until=until, limit=args.limit or 10)
+        )
+    
+    elif args.command == 'alert-test':
+        from alerting import AlertEngine, AlertReceiver, WebhookSink, build_sinks, send_test_alert
+        try:
+            sinks = build_sinks(config_manager.get_setting("alert_config.sinks") or [], get_base_dir())
+        except (ValueError, KeyError) as e:
+            print(f"告警配置无效: {e}")
+            sys.exit(2)
+        # 同时向本地接收端替身投递一次（首次返回503以验证重试），确认 webhook 通道可用
+        receiver = AlertReceiver(statuses=[503]).start()
+        sinks.append(WebhookSink(receiver.url, backoff=0.2))
+        engine = AlertEngine([], sinks)
+        delivered = send_test_alert(engine)
+        received = receiver.wait_for(1, timeout=5)
+        receiver.stop()
+        print(f"测试告警已发送到 {delivered}/{len(sinks)} 个通知端"
+              f"（本地接收端{'已收到' if received else '未收到'}，共 {receiver.requests} 次请求）")
+        sys.exit(0 if delivered == len(sinks) and received else 1)
+    
+    elif args.command == 'alert-receiver':
+        from agent import parse_address
+        from alerting import AlertReceiver
+        receiver = AlertReceiver(parse_address(args.alert_receiver_listen, 23390), echo=True).start()
+        print(f"告警接收端已启动: {receiver.url}，按 Ctrl+C 停止")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            receiver.stop()
+            print(f"\n共收到 {len(receiver.received)} 条告警")
+    
+    elif args.command == 'soak':
+        try:
+            from soak import SoakRunner, has_leaks, parse_duration, print_soak_report
+        except ImportError as e:
+            print(f"稳定性测试需要 NumPy，请先执行 pip install numpy（{e}）")
+            sys.exit(2)
+        config = dict(config_manager.get_setting("soak_config") or {})
+        if args.soak_rate:
+            config["rate"] = args.soak_rate
+        duration = parse_duration(args.soak_duration) if args.soak_duration else float(config.get("duration", 3600))
+        config["warmup"] = min(float(config.get("warmup", 120)), duration / 4)
+        targets = build_soak_targets(process_manager)
+        if not targets:
+            print("没有可施加流量的服务（需要配置端口）")
+            sys.exit(2)
+        print(f"启动服务，稳定性测试时长 {duration / 60:.0f} 分钟，每个服务每秒 {config['rate']} 个连接...")
+        for service_name in targets:
+            if not process_manager.start_service(service_name):
+                print(f"✗ {service_name} 启动失败")
+        timeout = float(config_manager.get_setting("service_config.startup_timeout") or 10)
+        deadline = time.monotonic() + timeout + 5
+        while time.monotonic() < deadline and any(
+                process_manager.get_service_status(name) == ServiceStatus.STARTING for name in targets):
+            time.sleep(0.5)
+        
+        def current_pid(service_name):
+            process = process_manager.service_processes.get(service_name)
+            return process.pid if process and process.poll() is None else None
+        
+        runner = SoakRunner(current_pid, targets, config)
+        report = runner.run(duration)
+        for service_name in targets:
+            process_manager.stop_service(service_name)
+        print_soak_report(report, duration)
+        sys.exit(1 if has_leaks(report) else 0)
+    
+    elif args.command == 'bench-scale':
+        from simulate import run_scale_benchmark, print_scale_report, scale_regressions
+        config = HARDCODED_CONFIG["simulation_config"]
+        counts = [int(c) for c in args.scale_counts.split(",") if c.strip()]
+        if config["crash_every"] and args.scale_duration < config["crash_after"] + 1:
+            print(f"--scale-duration 须比替身崩溃时间 crash_after ({config['crash_after']} 秒) 至少长 1 秒，"
+                  f"否则崩溃发生前测试已结束")
+            sys.exit(2)
+        results = run_scale_benchmark(
+            build_simulation_manager,
+            ServiceStatus.RUNNING,
+            ServiceStatus.ERROR,
+            counts=counts,
+            duration=args.scale_duration,
+            log_rate=config["log_rate"],
+            crash_every=config["crash_every"],
+            crash_after=config["crash_after"]
+        )
+        print_scale_report(results)
+        problems = scale_regressions(results)
+        for problem in problems:
+            print(f"✗ {problem}")
+        sys.exit(1 if problems else 0)
+    
+    elif args.command == 'bench':
+        from bench import run_launch_benchmark, print_benchmark_report
+        print(f"正在对比原生与pexecvelf模拟运行的吞吐 (每项 {args.bench_requests} 个请求)...")
+        store = None
+        if args.bench_save:
+            from benchstore import BenchmarkStore
+            store = BenchmarkStore(str(get_bench_store_path()))
+        for round_index in range(max(1, args.bench_repeat)):
+            if args.bench_repeat > 1:
+                print(f"\n第 {round_index + 1}/{args.bench_repeat} 轮")
+            results = run_launch_benchmark(
+                build_benchmark_commands(),
+                requests=args.bench_requests,
+                pipeline=args.bench_pipeline
+            )
+            print_benchmark_report(results)
+            if store:
+                saved = store.save_results(results, args.bench_label)
+                print(f"已保存 {saved} 条结果（主机 {store.host}）")
+        if store:
+            store.close()
+    
+    elif args.command == 'bench-compare':
+        from benchstore import BenchmarkStore, compare_builds, has_regressions, print_comparison
+        config = config_manager.get_setting("bench_config") or {}
+        confidence = float(config.get("confidence", 0.95))
+        store = BenchmarkStore(str(get_bench_store_path()))
+        try:
+            reports = compare_builds(
+                store,
+                mode=args.bench_mode or get_launch_mode(config_manager.get_setting("service_config.launch_mode")),
+                services=["cyrene-sr-gameserver", "cyrene-sr-dispatch", "hoyo-sdk"],
+                baseline_ref=args.baseline,
+                candidate_ref=args.candidate,
+                pipeline=args.bench_pipeline,
+                iterations=int(config.get("iterations", 2000)),
+                confidence=confidence,
+                threshold=args.bench_threshold if args.bench_threshold is not None else float(config.get("threshold", 0.03))
+            )
+        except RuntimeError as e:
+            print(e)
+            sys.exit(2)
+        finally:
+            store.close()
+        print(f"主机 {store.host}")
+        print_comparison(reports, confidence)
+        if has_regressions(reports):
+            print("\n✗ 存在统计显著的性能回归")
+            sys.exit(1)
+        if not any("metrics" in report for report in reports):
+            print("\n没有可比较的结果")
+            sys.exit(2)
+        print("\n✓ 未发现显著回归")
+
+def build_simulated_service_paths(count: int) -> Dict[str, Dict[str, Any]]:
+    """按 simulation_config 生成替身服务配置"""
+    from simulate import build_simulated_services
+    config = HARDCODED_CONFIG["simulation_config"]
+    return build_simulated_services(
+        count,
+        base_port=config["base_port"],
+        log_rate=config["log_rate"],
+        crash_every=config["crash_every"],
+        crash_after=config["crash_after"],
+        hang_every=config["hang_every"],
+        hang_after=config["hang_after"],
+        leak_every=config["leak_every"],
+        leak_kb=config["leak_kb"]
+    )
+
+def build_simulation_manager(service_paths: Dict[str, Dict[str, Any]]) -> ProcessManager:
+    """创建一个以替身服务为 service_paths 的独立 ProcessManager"""
+    config_manager = ConfigManager()
+    config_manager.set_setting("service_config.service_paths", service_paths)
+    config_manager.set_setting("service_config.startup_timeout",
+                               HARDCODED_CONFIG["simulation_config"]["startup_timeout"])
+    return ProcessManager(config_manager)
+
+def build_soak_targets(process_manager: ProcessManager) -> Dict[str, Dict[str, Any]]:
+    """
+    稳定性测试的流量目标：有看门狗探测配置的服务按其协议施加流量，
+    其余有端口的服务（如替身服务）建立裸TCP连接
+    """
+    probes = process_manager.config_manager.get_setting("watchdog_config.probes") or {}
+    service_paths = process_manager.config_manager.get_setting("service_config.service_paths") or {}
+    targets = {}
+    for service_name in service_paths:
+        if service_name in probes:
+            targets[service_name] = dict(probes[service_name])
+        elif process_manager.get_service_port(service_name):
+            targets[service_name] = {"type": "tcp", "port": process_manager.get_service_port(service_name)}
+    return targets
+
+def get_bench_store_path() -> Path:
+    """基准结果库路径"""
+    path = Path(HARDCODED_CONFIG["bench_config"]["store"])
+    return path if path.is_absolute() else get_base_dir() / path
+
+def build_benchmark_commands() -> Dict[str, Dict[str, Optional[tuple]]]:
+    """
+    为原生与模拟两种启动模式生成压测用的 (命令行, 工作目录)
+    Linux 上安装 wine 后可在同一台主机上同时测试两种模式
+    """
+    platforms = {
+        "native": sys.platform.startswith("linux"),
+        "emulated": sys.platform == "win32" or get_wine_command() is not None,
+    }
+    commands = {}
+    for mode, supported in platforms.items():
+        commands[mode] = {}
+        for service_name, service_config in get_service_paths(mode).items():
+            abs_executable_path, cmd = resolve_service_command(service_config)
+            # 原生模式下回退使用的 hoyo-sdk.exe 并非原生运行，不参与对比
+            fallback = mode == "native" and abs_executable_path.suffix == ".exe"
+            if not supported or fallback or not abs_executable_path.exists():
+                commands[mode][service_name] = None
+                continue
+            ensure_executable(abs_executable_path)
+            commands[mode][service_name] = (wrap_emulator(cmd), abs_executable_path.parent)
+    return commands
 
 def main():
     """主函数"""
+    # 打包后的可执行文件中使用日志归档进程池需要此调用
+    multiprocessing.freeze_support()
     parser = argparse.ArgumentParser(description='SR私服管理器')
     parser.add_argument('--run', dest='command', action='store_const', const='run',
                        help='启动所有服务端')
@@ -935,16 +3074,166 @@ def main():
                        help='查看当前服务端运行状态')
     parser.add_argument('--stop', dest='command', action='store_const', const='stop',
                        help='停止所有服务端')
+    parser.add_argument('--preflight', dest='command', action='store_const', const='preflight',
+                       help='执行启动前检查（文件、端口、数据库、配置、磁盘空间）')
+    parser.add_argument('--frontend', dest='command', action='store_const', const='frontend',
+                       help='仅运行准入控制前端（限速、等待队列）')
+    parser.add_argument('--dispatch-cache', dest='command', action='store_const', const='dispatch-cache',
+                       help='仅运行 dispatch 缓存前端（缓存 query_dispatch/query_gateway 响应）')
+    parser.add_argument('--traffic-tap', dest='command', action='store_const', const='traffic-tap',
+                       help='运行 gameserver 抓包代理，按消息名实时统计流量并写入抓包文件')
+    parser.add_argument('--traffic-report', nargs='*', default=None, metavar='FILE',
+                       help='分析抓包文件（默认为配置中的抓包文件）：各消息次数、字节量、到达间隔与响应延迟')
+    parser.add_argument('--traffic-top', type=int, default=None,
+                       help='流量报告中每个方向显示的消息数')
+    parser.add_argument('--with-dispatch-cache', action='store_true',
+                       help='启用 dispatch 缓存前端（与 --run、--agent 或GUI配合使用）')
+    parser.add_argument('--autoscale', action='store_true',
+                       help='按前端排队、连接数与探测延迟自动增减 gameserver 副本（与 --run、--agent 或GUI配合使用）')
+    parser.add_argument('--fault-proxy', dest='command', action='store_const', const='fault',
+                       help='运行网络故障注入代理（延迟、抖动、限速、重置、分段写入、按cmd_id丢包）')
+    parser.add_argument('--fault-config', default=None,
+                       help='故障注入路由配置文件（JSON），默认使用内置配置')
+    parser.add_argument('--archive-logs', action='store_true',
+                       help='将服务输出写入带索引的压缩归档')
+    parser.add_argument('--logs', dest='command', action='store_const', const='logs',
+                       help='查询归档日志，可配合 --since/--until/--service/--cmd-id/--level/--grep')
+    parser.add_argument('--journal', dest='command', action='store_const', const='journal',
+                       help='查看生命周期日志统计：在线时长、可用率、MTBF与崩溃记录，可配合 --since/--until/--service')
+    parser.add_argument('--since', default=None,
+                       help='查询起始时间，相对时间（30m、2h、1d）或ISO格式')
+    parser.add_argument('--until', default=None,
+                       help='查询结束时间，格式同 --since')
+    parser.add_argument('--service', default=None,
+                       help='只查询指定服务的日志或生命周期记录')
+    parser.add_argument('--cmd-id', type=int, default=None,
+                       help='只查询包含指定 cmd_id 的日志')
+    parser.add_argument('--level', default=None,
+                       help='只查询指定级别的日志，如 WARN、ERROR')
+    parser.add_argument('--grep', default=None,
+                       help='按正则表达式过滤日志内容')
+    parser.add_argument('--limit', type=int, default=None,
+                       help='最多输出的行数')
+    parser.add_argument('--dashboard', action='store_true',
+                       help='启用网页仪表盘（通过SSE推送状态、日志与资源占用）')
+    parser.add_argument('--dashboard-listen', default=None,
+                       help='网页仪表盘监听地址，格式 host:port')
+    parser.add_argument('--agent', dest='command', action='store_const', const='agent',
+                       help='以代理模式运行，供协调端远程管理本机服务')
+    parser.add_argument('--agent-listen', default=None,
+                       help='代理模式监听地址，格式 host:port')
+    parser.add_argument('--agent-token-file', default=None,
+                       help='存放代理认证令牌的文件（也可用环境变量 SR_AGENT_TOKEN 提供令牌）')
+    parser.add_argument('--remote', dest='remote_action', choices=['status', 'start', 'stop', 'restart'],
+                       default=None, help='对 --nodes 指定的所有代理节点执行操作')
+    parser.add_argument('--nodes', default=None,
+                       help='代理节点列表，逗号分隔，如 10.0.0.2:23400,10.0.0.3:23400')
+    parser.add_argument('--remote-services', default=None,
+                       help='远程操作的服务名，逗号分隔，默认全部服务')
+    parser.add_argument('--profile', dest='profile_action',
+                       choices=['cpu-start', 'cpu-stop', 'mem-start', 'mem-snapshot', 'mem-stop', 'stacks', 'status'],
+                       default=None, help='通过代理通道对运行中的管理器执行自身分析（默认本机代理）')
+    parser.add_argument('--profile-interval', type=float, default=None,
+                       help='采样式CPU分析的采样间隔（毫秒）')
+    parser.add_argument('--bench-native', dest='command', action='store_const', const='bench',
+                       help='对比原生与pexecvelf模拟运行的系统调用吞吐')
+    parser.add_argument('--bench-requests', type=int, default=5000,
+                       help='基准测试中每项的请求数')
+    parser.add_argument('--bench-pipeline', type=int, default=1,
+                       help='基准测试中游戏服务器单次批量发送的请求数')
+    parser.add_argument('--bench-save', action='store_true',
+                       help='将基准测试结果（含延迟样本与可执行文件哈希）存入结果库')
+    parser.add_argument('--bench-repeat', type=int, default=1,
+                       help='基准测试重复的轮数，多轮结果可反映运行之间的波动')
+    parser.add_argument('--bench-label', default=None,
+                       help='保存结果时附加的版本标签，比较时可代替哈希')
+    parser.add_argument('--bench-compare', dest='command', action='store_const', const='bench-compare',
+                       help='用自助法比较两个版本的基准结果，存在显著回归时以非零状态退出')
+    parser.add_argument('--baseline', default=None,
+                       help='比较的基线版本（哈希前缀或标签），默认为候选之前最近测试的版本')
+    parser.add_argument('--candidate', default=None,
+                       help='比较的候选版本（哈希前缀或标签），默认为最近测试的版本')
+    parser.add_argument('--bench-mode', choices=['native', 'emulated'], default=None,
+                       help='比较哪种启动模式下的结果，默认按当前平台')
+    parser.add_argument('--bench-threshold', type=float, default=None,
+                       help='判定回归的最小变化幅度，如 0.05 表示 5%%')
+    parser.add_argument('--bench-scale', dest='command', action='store_const', const='bench-scale',
+                       help='使用替身服务测试管理器在不同服务数量下的开销（无需游戏文件）')
+    parser.add_argument('--scale-counts', default='3,50,500',
+                       help='规模测试的服务数量，逗号分隔')
+    parser.add_argument('--scale-duration', type=float, default=15.0,
+                       help='每个规模的测试时长（秒）')
+    parser.add_argument('--soak', dest='command', action='store_const', const='soak',
+                       help='长时间稳定性测试：持续施加流量并检测内存与句柄泄漏，发现泄漏时以非零状态退出')
+    parser.add_argument('--soak-duration', default=None,
+                       help='稳定性测试时长，如 3600、90m、8h')
+    parser.add_argument('--soak-rate', type=float, default=None,
+                       help='每个服务每秒新建的连接数')
+    parser.add_argument('--alert-test', dest='command', action='store_const', const='alert-test',
+                       help='向已配置的告警通知端及本地接收端替身发送一条测试告警')
+    parser.add_argument('--alert-receiver', dest='command', action='store_const', const='alert-receiver',
+                       help='运行本地 webhook 告警接收端（替身），打印收到的告警')
+    parser.add_argument('--alert-receiver-listen', default='127.0.0.1:23390',
+                       help='告警接收端监听地址')
+    parser.add_argument('--alerts', action='store_true',
+                       help='启用告警规则（与 --run、--agent 或GUI配合使用）')
+    parser.add_argument('--simulate', type=int, default=None, metavar='N',
+                       help='模拟模式：用N个替身服务代替真实服务（可与 --run 或GUI配合使用）')
+    parser.add_argument('--trace-out', default=None,
+                       help='退出时将服务生命周期追踪导出为Chrome Trace JSON文件')
+    parser.add_argument('--launch-mode', choices=['auto', 'native', 'emulated'], default=None,
+                       help='服务启动模式：auto按平台选择，native直接运行ELF，emulated通过pexecvelf运行')
     
     args = parser.parse_args()
     
+    agent_config = HARDCODED_CONFIG["agent_config"]
+    if args.agent_listen:
+        agent_config["listen"] = args.agent_listen
+    token_file = args.agent_token_file or agent_config.get("token_file")
+    if token_file:
+        from agent import read_token_file
+        try:
+            agent_config["token"] = read_token_file(token_file)
+        except OSError as e:
+            parser.error(f"无法读取令牌文件 {token_file}: {e}")
+    else:
+        agent_config["token"] = os.environ.get("SR_AGENT_TOKEN") or agent_config["token"]
+    if args.nodes:
+        agent_config["nodes"] = [node.strip() for node in args.nodes.split(",") if node.strip()]
+    if args.remote_action:
+        args.command = 'remote'
+    if args.profile_action:
+        args.command = 'profile'
+    if args.traffic_report is not None:
+        args.command = 'traffic-report'
+    
+    if args.archive_logs:
+        HARDCODED_CONFIG["log_archive_config"]["enabled"] = True
+    
+    if args.alerts:
+        HARDCODED_CONFIG["alert_config"]["enabled"] = True
+    
+    if args.with_dispatch_cache:
+        HARDCODED_CONFIG["dispatch_cache_config"]["enabled"] = True
+    
+    if args.autoscale:
+        HARDCODED_CONFIG["autoscale_config"]["enabled"] = True
+    
+    if args.dashboard or args.dashboard_listen:
+        HARDCODED_CONFIG["dashboard_config"]["enabled"] = True
+        if args.dashboard_listen:
+            HARDCODED_CONFIG["dashboard_config"]["listen"] = args.dashboard_listen
+    
+    if args.trace_out:
+        HARDCODED_CONFIG["trace_config"]["export_path"] = args.trace_out
+    
     if args.command:
         # 命令行模式
         run_cli_command(args)
     else:
         # GUI模式
         try:
-            app = MainWindow()
+            app = MainWindow(args.launch_mode, args.simulate)
             app.mainloop()
         except Exception as e:
             print(f"应用程序启动失败: {e}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服启动前检查
+并发执行可执行文件、端口、数据库、配置与磁盘空间检查，
+与文件内容相关的检查结果按 mtime 缓存
+
+License: GNU V3 LICENSE
+"""
+
+import hashlib
+import shutil
+import socket
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import psutil
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+# 结果级别：fail 会阻止服务启动，warn 仅提示
+OK = "ok"
+WARN = "warn"
+FAIL = "fail"
+
+def _result(check: str, level: str, message: str, **extra) -> Dict[str, Any]:
+    result = {"check": check, "level": level, "message": message}
+    result.update(extra)
+    return result
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    """返回文件的 (mtime_ns, size)，不存在时返回 None"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def parse_simple_toml(text: str) -> Dict[str, Any]:
+    """解析 sdk_server.toml 这类仅含顶层 key = value 的简单TOML（Python 3.11 以下的后备方案）"""
+    result = {}
+    for lineno, raw_line in enumerate(text.splitlines(), 1):
+        line = raw_line.strip()
+        if not line or line.startswith("#") or line.startswith("["):
+            continue
+        if "=" not in line:
+            raise ValueError(f"第 {lineno} 行无法解析: {raw_line}")
+        key, value = (part.strip() for part in line.split("=", 1))
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            result[key] = value[1:-1]
+        elif value in ("true", "false"):
+            result[key] = value == "true"
+        else:
+            result[key] = int(value)
+    return result
+
+class PreflightEngine:
+    """启动前检查引擎"""
+
+    def __init__(self, workers: int = 8, min_free_disk_mb: int = 200):
+        self.min_free_disk_mb = min_free_disk_mb
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preflight")
+        # (检查类型, 路径) -> (文件戳, 结果)
+        self._cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+
+    def close(self):
+        """关闭检查线程池"""
+        self._executor.shutdown(wait=True)
+
+    def run(self, checks: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        并发执行检查列表并返回结果
+        checks: [(检查类型, 参数), ...]，检查类型为 binary/port/config/database/disk
+        """
+        futures = [self._executor.submit(self._timed, kind, params) for kind, params in checks]
+        return [future.result() for future in futures]
+
+    def _timed(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = getattr(self, f"check_{kind}")(**params)
+        except Exception as e:
+            result = _result(kind, FAIL, f"检查出错: {e}")
+        result = dict(result)
+        result["elapsed_ms"] = (time.perf_counter() - started) * 1000
+        return result
+
+    def _cached(self, kind: str, path: Path, compute) -> Dict[str, Any]:
+        """按文件 mtime 与大小缓存检查结果"""
+        stamp = _file_stamp(path)
+        key = (kind, str(path))
+        if stamp is not None:
+            cached = self._cache.get(key)
+            if cached and cached[0] == stamp:
+                return dict(cached[1], cached=True)
+        result = compute()
+        if stamp is not None:
+            self._cache[key] = (stamp, result)
+        return dict(result, cached=False)
+
+    def check_binary(self, path: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """检查可执行文件存在并计算哈希"""
+        file_path = Path(path)
+        if not file_path.is_file():
+            return _result("binary", FAIL, f"文件不存在: {file_path}")
+
+        def compute():
+            digest = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            return _result("binary", OK, f"{file_path.name} sha256={digest.hexdigest()[:16]}",
+                           sha256=digest.hexdigest())
+
+        result = self._cached("binary", file_path, compute)
+        if sha256 and result.get("sha256") != sha256.lower():
+            return dict(result, level=FAIL, message=f"{file_path.name} 哈希不匹配: {result.get('sha256')}")
+        return result
+
+    def check_port(self, port: int, host: str = "0.0.0.0") -> Dict[str, Any]:
+        """检查端口是否空闲，被占用时找出占用进程"""
+        try:
+            connections = psutil.net_connections(kind="tcp")
+        except (psutil.AccessDenied, OSError):
+            connections = None
+
+        if connections is not None:
+            for conn in connections:
+                if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port:
+                    owner = f"PID {conn.pid}" if conn.pid else "未知进程"
+                    if conn.pid:
+                        try:
+                            owner += f" ({psutil.Process(conn.pid).name()})"
+                        except psutil.Error:
+                            pass
+                    return _result("port", FAIL, f"端口 {port} 已被 {owner} 占用", port=port, pid=conn.pid)
+            return _result("port", OK, f"端口 {port} 可用", port=port)
+
+        # 无权枚举连接时退回到尝试绑定
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            if sys.platform == "win32":
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+            else:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                sock.bind((host, port))
+            except OSError:
+                return _result("port", FAIL, f"端口 {port} 已被占用", port=port)
+        return _result("port", OK, f"端口 {port} 可用", port=port)
+
+    def check_config(self, path: str, required: List[str] = ()) -> Dict[str, Any]:
+        """解析配置文件并检查必需项"""
+        file_path = Path(path)
+        if not file_path.is_file():
+            return _result("config", FAIL, f"配置文件不存在: {file_path}")
+
+        def compute():
+            text = file_path.read_text(encoding="utf-8")
+            try:
+                values = tomllib.loads(text) if tomllib else parse_simple_toml(text)
+            except ValueError as e:
+                return _result("config", FAIL, f"{file_path.name} 解析失败: {e}")
+            missing = [key for key in required if values.get(key) in (None, "")]
+            if missing:
+                return _result("config", FAIL, f"{file_path.name} 缺少配置项: {', '.join(missing)}", values=values)
+            return _result("config", OK, f"{file_path.name} 解析通过", values=values)
+
+        return self._cached("config", file_path, compute)
+
+    def check_database(self, path: str) -> Dict[str, Any]:
+        """
+        检查SQLite数据库可以读取且没有被其他进程打开
+        只读且不加锁：以 immutable 方式打开不会触及 -wal/-shm，也不会在关闭时做检查点
+        """
+        file_path = Path(path)
+        if not file_path.exists():
+            return _result("database", WARN, f"{file_path.name} 不存在，服务首次启动时将创建")
+        holder = self._find_holder(file_path)
+        if holder:
+            return _result("database", FAIL, f"{file_path.name} 已被进程 {holder} 打开", holder=holder)
+        try:
+            with open(file_path, "rb") as f:
+                header = f.read(16)
+        except OSError as e:
+            return _result("database", FAIL, f"{file_path.name} 无法读取: {e}")
+        if header and header != b"SQLite format 3\x00":
+            return _result("database", FAIL, f"{file_path.name} 不是SQLite数据库")
+        try:
+            conn = sqlite3.connect(f"file:{file_path.as_posix()}?mode=ro&immutable=1", uri=True)
+        except sqlite3.Error as e:
+            return _result("database", FAIL, f"{file_path.name} 无法打开: {e}")
+        try:
+            conn.execute("PRAGMA schema_version").fetchone()
+        except sqlite3.DatabaseError as e:
+            return _result("database", FAIL, f"{file_path.name} 已损坏: {e}")
+        finally:
+            conn.close()
+        return _result("database", OK, f"{file_path.name} 可正常打开")
+
+    @staticmethod
+    def _find_holder(file_path: Path) -> Optional[str]:
+        """查找打开了该文件的其他进程，返回 "PID (进程名)"；无权查看的进程跳过"""
+        target = str(file_path.resolve())
+        if sys.platform == "win32":
+            target = target.lower()
+        for proc in psutil.process_iter(["pid", "name"]):
+            try:
+                for opened in proc.open_files():
+                    opened_path = opened.path.lower() if sys.platform == "win32" else opened.path
+                    if opened_path == target:
+                        return f"{proc.info['pid']} ({proc.info['name']})"
+            except psutil.Error:
+                continue
+        return None
+
+    def check_disk(self, path: str, min_free_mb: Optional[int] = None) -> Dict[str, Any]:
+        """检查磁盘剩余空间"""
+        min_free_mb = self.min_free_disk_mb if min_free_mb is None else min_free_mb
+        free_mb = shutil.disk_usage(path).free // (1024 * 1024)
+        if free_mb < min_free_mb:
+            return _result("disk", FAIL, f"磁盘剩余空间不足: {free_mb} MB < {min_free_mb} MB", free_mb=free_mb)
+        return _result("disk", OK, f"磁盘剩余 {free_mb} MB", free_mb=free_mb)
+
+def has_failures(results: List[Dict[str, Any]]) -> bool:
+    """检查结果中是否存在失败项"""
+    return any(result["level"] == FAIL for result in results)
+
+def print_preflight_report(service_name: str, results: List[Dict[str, Any]]) -> None:
+    """打印检查结果"""
+    marks = {OK: "✓", WARN: "!", FAIL: "✗"}
+    for result in results:
+        cached = " (缓存)" if result.get("cached") else ""
+        print(f"  {marks[result['level']]} [{service_name}] {result['check']:<8} "
+              f"{result['message']}{cached} {result['elapsed_ms']:.1f}ms")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cyrene-sr 游戏服务器数据包工具
+与 cyrene-sr/src/gameserver.asm 中的封包格式保持一致
+
+License: GNU V3 LICENSE
+"""
+
+import struct
+from typing import List, Optional, Tuple
+
+# 封包常量（见 gameserver.asm）
+# 汇编中以小端写入 HEAD_MAGIC/TAIL_MAGIC，因此线上字节序为下列大端值
+HEAD_MAGIC = 0x9D74C714
+TAIL_MAGIC = 0xD7A152C8
+PACKET_OVERHEAD_SIZE = 16
+
+# 监听端口（见 gameserver.asm / dispatch.asm / sdk_server.toml）
+GAMESERVER_PORT = 23301
+DISPATCH_PORT = 10100
+SDK_PORT = 20100
+
+# 常用命令号（见 gameserver.pb.asm）
+CMD_PLAYER_HEART_BEAT_CS_REQ = 66
+CMD_PLAYER_HEART_BEAT_SC_RSP = 39
+
+_HEADER = struct.Struct(">IHHI")
+_TAIL = struct.Struct(">I")
+
+def encode_varint(value: int) -> bytes:
+    """编码protobuf varint"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def encode_packet(cmd_id: int, body: bytes = b"", head: bytes = b"") -> bytes:
+    """编码一个完整的游戏封包"""
+    return (_HEADER.pack(HEAD_MAGIC, cmd_id, len(head), len(body))
+            + head + body + _TAIL.pack(TAIL_MAGIC))
+
+def heartbeat_request(client_time_ms: int = 0) -> bytes:
+    """构造 PlayerHeartBeatCsReq 封包（client_time_ms 字段号为3）"""
+    body = b""
+    if client_time_ms:
+        body = encode_varint((3 << 3) | 0) + encode_varint(client_time_ms)
+    return encode_packet(CMD_PLAYER_HEART_BEAT_CS_REQ, body)
+
+def peek_packet(buffer) -> Optional[Tuple[int, int]]:
+    """
+    检查缓冲区开头是否为完整封包
+    返回 (cmd_id, 封包总长度)；数据不足时返回 None，魔数错误时抛出 ValueError
+    """
+    if len(buffer) < PACKET_OVERHEAD_SIZE - 4:
+        return None
+    magic, cmd_id, head_size, body_size = _HEADER.unpack_from(buffer, 0)
+    if magic != HEAD_MAGIC:
+        raise ValueError(f"head magic mismatch: {magic:#x}")
+    total = PACKET_OVERHEAD_SIZE + head_size + body_size
+    if len(buffer) < total:
+        return None
+    return cmd_id, total
+
+class PacketReader:
+    """流式封包解析器，从TCP字节流中切出完整封包"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """追加数据并返回已完整的 (cmd_id, 封包) 列表"""
+        self.buffer += data
+        packets = []
+        while True:
+            info = peek_packet(self.buffer)
+            if info is None:
+                return packets
+            cmd_id, total = info
+            packets.append((cmd_id, bytes(self.buffer[:total])))
+            del self.buffer[:total]
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服管理器统一调度器
+所有周期性工作（进程监控、资源采样、日志段封存、数据库维护、定时重启）注册到同一个最小堆上，
+由一个调度线程按最早的到期时间唤醒，并顺带执行随后一个精度窗口内到期的任务；固定周期任务对齐到周期整数倍，
+因此数百个周期任务每秒只需少量唤醒，而不是每个任务一个线程。
+耗时任务交给小型线程池执行；每次执行记录实际开始时间与计划时间之差（调度延迟）。
+堆按单调时钟排序，系统时间回拨不会让周期任务停摆；只有 cron 任务按系统时间计算下次执行时间
+
+License: GNU V3 LICENSE
+"""
+
+import collections
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional
+
+class IntervalSchedule:
+    """固定周期；jitter 为每次附加的随机延迟上限（秒），未设置时对齐到周期的整数倍以便合并唤醒"""
+
+    wall_clock = False
+
+    def __init__(self, seconds: float, jitter: float = 0.0):
+        if seconds <= 0:
+            raise ValueError(f"周期必须大于0: {seconds}")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def describe(self) -> str:
+        text = f"每 {self.seconds:g}s"
+        return f"{text} ±{self.jitter:g}s" if self.jitter else text
+
+    def first(self, now: float, delay: Optional[float] = None) -> float:
+        if delay is not None:
+            return now + delay
+        return math.ceil(now / self.seconds) * self.seconds
+
+    def next(self, nominal: float, now: float) -> float:
+        """下一个计划时间；错过的周期直接跳过，不补跑"""
+        nominal += self.seconds
+        if nominal <= now:
+            nominal += math.ceil((now - nominal) / self.seconds) * self.seconds
+        return nominal
+
+class CronSchedule:
+    """
+    五段式 cron 表达式（分 时 日 月 周），按本地时间计算
+    每段支持 *、*/n、a、a-b、a-b/n 及逗号分隔的组合；周日可写作 0 或 7；
+    日与周同时受限时满足其一即可（与 cron 一致）
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    wall_clock = True
+
+    def __init__(self, expr: str, jitter: float = 0.0):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式需要5段: {expr}")
+        self.expr = expr
+        self.jitter = jitter
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self._RANGES)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.day_restricted = fields[2] != "*"
+        self.weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                step = int(step_text)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+            else:
+                start = end = int(part)
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f"cron 字段超出范围: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def describe(self) -> str:
+        return f"cron {self.expr}"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def first(self, now: float, delay: Optional[float] = None) -> float:
+        return self.next(now, now)
+
+    def next(self, nominal: float, now: float) -> float:
+        """晚于 now 的下一个匹配分钟；按月、日、时逐级跳过不匹配的范围"""
+        moment = datetime.fromtimestamp(max(nominal, now)).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        raise ValueError(f"cron 表达式在5年内没有匹配时间: {self.expr}")
+
+class _TaskStats:
+    """一组任务的累计执行统计，任务结束后仍保留"""
+
+    def __init__(self, recent: int = 1024):
+        self.tasks = 0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.late_total = 0.0
+        self.late_max = 0.0
+        self.busy_total = 0.0
+        self.busy_max = 0.0
+        self.recent_late: "collections.deque[float]" = collections.deque(maxlen=recent)
+
+    def record(self, late: float, busy: float, failed: bool):
+        self.runs += 1
+        self.failures += failed
+        self.late_total += late
+        self.late_max = max(self.late_max, late)
+        self.busy_total += busy
+        self.busy_max = max(self.busy_max, busy)
+        self.recent_late.append(late)
+
+class ScheduledTask:
+    """
+    调度器中的一个任务；dynamic 任务由返回值决定下次执行的间隔，返回 None 时结束
+    nominal 为计划时间（cron 任务为系统时间，其余为单调时钟），due 为换算到单调时钟并加上抖动后的入堆时间
+    """
+
+    def __init__(self, name: str, fn: Callable, schedule, blocking: bool, dynamic: bool):
+        self.name = name
+        self.group = name.split(":", 1)[0]
+        self.fn = fn
+        self.schedule = schedule
+        self.blocking = blocking
+        self.dynamic = dynamic
+        self.nominal = 0.0
+        self.due = 0.0
+        self.running = False
+        self.cancelled = False
+
+    def describe(self) -> str:
+        return "按需" if self.dynamic else self.schedule.describe()
+
+class Scheduler:
+    """
+    单线程定时器堆
+    resolution 为调度精度（秒）：唤醒时一并执行此后 resolution 秒内到期的任务（最多提前这么多），相邻任务因此合并执行；
+    blocking=True 的任务在线程池中执行，上一次尚未结束时本次跳过并计入 skipped
+    """
+
+    def __init__(self, resolution: float = 0.05, workers: int = 4):
+        self.resolution = resolution
+        self.workers = workers
+        self.wakeups = 0
+        self.started = 0.0
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._tasks: Dict[str, ScheduledTask] = {}
+        self._stats: Dict[str, _TaskStats] = {}
+        self._descriptions: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stopping
+
+    def start(self) -> bool:
+        """启动调度线程，已在运行时返回 False"""
+        with self._cond:
+            if self._thread is not None:
+                return False
+            self.started = time.monotonic()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler-worker")
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, wait: bool = True):
+        """停止调度，wait=True 时等待正在执行的任务结束"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    # ---- 注册 ----
+
+    def every(self, name: str, seconds: float, fn: Callable[[], Any], jitter: float = 0.0,
+              blocking: bool = False, first_delay: Optional[float] = None) -> ScheduledTask:
+        """按固定周期执行 fn；同名任务会被替换"""
+        return self._add(ScheduledTask(name, fn, IntervalSchedule(seconds, jitter), blocking, False), first_delay)
+
+    def cron(self, name: str, expr: str, fn: Callable[[], Any], jitter: float = 0.0,
+             blocking: bool = True) -> ScheduledTask:
+        """按 cron 表达式执行 fn"""
+        return self._add(ScheduledTask(name, fn, CronSchedule(expr, jitter), blocking, False))
+
+    def call_later(self, name: str, delay: float, fn: Callable[[], Optional[float]],
+                   blocking: bool = False) -> ScheduledTask:
+        """delay 秒后执行 fn，fn 返回距本次计划时间的下次执行间隔（秒），返回 None 时任务结束"""
+        return self._add(ScheduledTask(name, fn, None, blocking, True), delay)
+
+    def cancel(self, name: str) -> bool:
+        with self._cond:
+            task = self._tasks.pop(name, None)
+            if task is None:
+                return False
+            task.cancelled = True
+            return True
+
+    def _add(self, task: ScheduledTask, delay: Optional[float] = None) -> ScheduledTask:
+        if task.dynamic:
+            task.nominal = time.monotonic() + (delay or 0.0)
+        else:
+            now = time.time() if task.schedule.wall_clock else time.monotonic()
+            task.nominal = task.schedule.first(now, delay)
+        with self._cond:
+            previous = self._tasks.pop(task.name, None)
+            if previous is not None:
+                previous.cancelled = True
+            self._tasks[task.name] = task
+            stats = self._stats.setdefault(task.group, _TaskStats())
+            stats.tasks += 1
+            self._descriptions[task.group] = task.describe()
+            self._push_locked(task)
+        return task
+
+    def _push_locked(self, task: ScheduledTask):
+        jitter = 0.0 if task.dynamic else task.schedule.jitter
+        due = task.nominal
+        if not task.dynamic and task.schedule.wall_clock:
+            due = time.monotonic() + (task.nominal - time.time())
+        task.due = due + (random.uniform(0, jitter) if jitter else 0.0)
+        heapq.heappush(self._heap, (task.due, next(self._seq), task))
+        if self._heap[0][2] is task:
+            self._cond.notify()
+
+    # ---- 执行 ----
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    now = time.monotonic()
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    if self._heap[0][0] <= now:
+                        break
+                    self._cond.wait(self._heap[0][0] - now)
+                self.wakeups += 1
+                batch = []
+                while self._heap and self._heap[0][0] <= now + self.resolution:
+                    task = heapq.heappop(self._heap)[2]
+                    if task.cancelled:
+                        continue
+                    wall_clock = not task.dynamic and task.schedule.wall_clock
+                    if wall_clock and time.time() < task.nominal - self.resolution:
+                        # 入堆后系统时间被回拨，cron 任务尚未到点，按当前系统时间重新入堆
+                        self._push_locked(task)
+                        continue
+                    batch.append((task, task.due))
+                    # 固定计划的任务在派发时即排入下一次，执行耗时不会造成漂移
+                    if not task.dynamic:
+                        task.nominal = task.schedule.next(task.nominal, time.time() if wall_clock else now)
+                        self._push_locked(task)
+            for task, due in batch:
+                if task.blocking:
+                    if task.running:
+                        self._stats[task.group].skipped += 1
+                        continue
+                    task.running = True
+                    try:
+                        self._executor.submit(self._execute, task, due)
+                    except RuntimeError:
+                        return
+                else:
+                    self._execute(task, due)
+
+    def _execute(self, task: ScheduledTask, due: float):
+        start = time.monotonic()
+        failed = False
+        result = None
+        try:
+            result = task.fn()
+        except Exception as e:
+            failed = True
+            print(f"定时任务出错 {task.name}: {e}")
+        finish = time.monotonic()
+        with self._cond:
+            task.running = False
+            self._stats[task.group].record(max(0.0, start - due), finish - start, failed)
+            if not task.dynamic or task.cancelled:
+                return
+            if result is None or failed:
+                if self._tasks.get(task.name) is task:
+                    del self._tasks[task.name]
+                return
+            task.nominal = max(due + float(result), finish)
+            self._push_locked(task)
+
+    # ---- 统计 ----
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """按任务组（任务名冒号前的部分）汇总的执行次数、调度延迟与耗时"""
+        with self._cond:
+            active = collections.Counter(task.group for task in self._tasks.values())
+            rows = []
+            for group, stats in sorted(self._stats.items()):
+                recent = sorted(stats.recent_late)
+                rows.append({
+                    "group": group,
+                    "schedule": self._descriptions.get(group, ""),
+                    "active": active.get(group, 0),
+                    "tasks": stats.tasks,
+                    "runs": stats.runs,
+                    "failures": stats.failures,
+                    "skipped": stats.skipped,
+                    "late_avg_ms": stats.late_total / stats.runs * 1000 if stats.runs else 0.0,
+                    "late_p99_ms": recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000 if recent else 0.0,
+                    "late_max_ms": stats.late_max * 1000,
+                    "busy_avg_ms": stats.busy_total / stats.runs * 1000 if stats.runs else 0.0,
+                    "busy_max_ms": stats.busy_max * 1000,
+                })
+            return rows
+
+def print_scheduler_report(scheduler: Scheduler) -> None:
+    """打印调度器各任务组的执行次数、调度延迟（实际开始时间减计划时间）与执行耗时"""
+    elapsed = max(time.monotonic() - scheduler.started, 1e-9) if scheduler.started else 0.0
+    rate = scheduler.wakeups / elapsed if elapsed else 0.0
+    print(f"调度器: 唤醒 {scheduler.wakeups} 次（{rate:.1f}/s），精度 {scheduler.resolution * 1000:.0f}ms")
+    print(f"{'任务组':<14}{'计划':<20}{'活动':>5}{'执行':>8}{'延迟avg':>10}{'p99':>9}{'max':>9}"
+          f"{'耗时avg':>10}{'max':>9}{'失败':>5}{'跳过':>5}")
+    for row in scheduler.stats():
+        print(f"{row['group']:<14}{row['schedule']:<20}{row['active']:>5}{row['runs']:>8}"
+              f"{row['late_avg_ms']:>8.1f}ms{row['late_p99_ms']:>7.1f}ms{row['late_max_ms']:>7.1f}ms"
+              f"{row['busy_avg_ms']:>8.1f}ms{row['busy_max_ms']:>7.1f}ms{row['failures']:>5}{row['skipped']:>5}")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服管理器自身性能分析
+运行时按需开启：采样式CPU分析（覆盖所有线程）、cProfile（仅调用线程，如GUI主线程）、
+tracemalloc 内存快照与各线程调用栈转储。结果写入文件；未开启时不安装任何钩子，没有额外开销
+
+License: GNU V3 LICENSE
+"""
+
+import cProfile
+import collections
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+def _thread_cpu_times() -> Dict[int, float]:
+    """各原生线程已消耗的CPU时间（秒）"""
+    try:
+        import psutil
+        return {t.id: t.user_time + t.system_time for t in psutil.Process().threads()}
+    except Exception:
+        return {}
+
+class SamplingProfiler:
+    """
+    定期读取所有线程的当前调用栈并计数（墙钟采样，阻塞中的线程同样计入），
+    输出折叠栈格式（可用 speedscope 或 flamegraph.pl 查看）；
+    另外统计分析期间各线程实际消耗的CPU时间，用于区分忙碌与等待
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: "collections.Counter[str]" = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self._cpu_start: Dict[int, float] = {}
+        self._native_names: Dict[int, str] = {}
+
+    def start(self):
+        self.started = time.time()
+        self._cpu_start = _thread_cpu_times()
+        self._native_names = {thread.native_id: thread.name for thread in threading.enumerate()}
+        self._thread = threading.Thread(target=self._run, name="self-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {}
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+                self._native_names[thread.native_id] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                parts.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+
+    def write(self, path: Path, top: int = 30) -> str:
+        """写出折叠栈文件，返回按自身耗时排序的摘要"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        own = collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        total = sum(self.stacks.values()) or 1
+        lines = [f"{self.samples} 次采样，{len(self.stacks)} 种调用栈", "", "各线程CPU时间:"]
+        cpu_end = _thread_cpu_times()
+        names = dict(self._native_names)
+        names.update((thread.native_id, thread.name) for thread in threading.enumerate())
+        usage = sorted(((cpu_end[tid] - self._cpu_start.get(tid, 0.0), tid) for tid in cpu_end), reverse=True)
+        lines += [f"  {seconds * 1000:8.1f}ms  {names.get(tid, tid)}" for seconds, tid in usage[:top] if seconds > 0]
+        lines += ["", "栈顶函数（墙钟占比）:"]
+        lines += [f"{count * 100 / total:6.1f}%  {frame}" for frame, count in own.most_common(top)]
+        return "\n".join(lines)
+
+class SelfProfiler:
+    """管理器自身分析的统一入口，control() 可由命令行、信号或远程管理接口调用"""
+
+    def __init__(self, output_dir: str, sample_interval: float = 0.005,
+                 tracemalloc_frames: int = 10, top: int = 30):
+        self.output_dir = Path(output_dir)
+        self.sample_interval = sample_interval
+        self.tracemalloc_frames = tracemalloc_frames
+        self.top = top
+        self._lock = threading.Lock()
+        self._sampler: Optional[SamplingProfiler] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._cprofile_thread: Optional[int] = None
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def _path(self, prefix: str, suffix: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        return self.output_dir / f"{prefix}-{stamp}-{int(now * 1000) % 1000:03d}{suffix}"
+
+    def control(self, action: str, **kwargs) -> Dict[str, Any]:
+        """执行分析操作：cpu-start/cpu-stop/cpu-toggle/cprofile-toggle/mem-start/mem-snapshot/mem-stop/stacks/status"""
+        handlers = {
+            "cpu-start": self.start_sampling,
+            "cpu-stop": self.stop_sampling,
+            "cpu-toggle": self.toggle_sampling,
+            "cprofile-toggle": self.toggle_cprofile,
+            "mem-start": self.start_tracemalloc,
+            "mem-snapshot": self.tracemalloc_snapshot,
+            "mem-stop": self.stop_tracemalloc,
+            "stacks": self.dump_stacks,
+            "status": self.status,
+        }
+        handler = handlers.get(action)
+        if handler is None:
+            raise ValueError(f"未知分析操作: {action}")
+        with self._lock:
+            return handler(**kwargs)
+
+    def status(self) -> Dict[str, Any]:
+        state = {
+            "sampling": self._sampler is not None,
+            "cprofile": self._cprofile is not None,
+            "tracemalloc": tracemalloc.is_tracing(),
+        }
+        enabled = [name for name, on in state.items() if on]
+        return dict(state, output_dir=str(self.output_dir),
+                    message=f"运行中: {', '.join(enabled) if enabled else '无'}，输出目录 {self.output_dir}")
+
+    # ---- CPU ----
+
+    def start_sampling(self, interval_ms: Optional[float] = None) -> Dict[str, Any]:
+        if self._sampler is not None:
+            return {"message": "采样分析已在运行"}
+        self._sampler = SamplingProfiler(interval_ms / 1000 if interval_ms else self.sample_interval)
+        self._sampler.start()
+        return {"message": f"采样分析已开始，间隔 {self._sampler.interval * 1000:.1f}ms"}
+
+    def stop_sampling(self) -> Dict[str, Any]:
+        if self._sampler is None:
+            return {"message": "采样分析未运行"}
+        sampler, self._sampler = self._sampler, None
+        sampler.stop()
+        path = self._path("cpu", ".folded")
+        summary = sampler.write(path, self.top)
+        return {"message": f"采样分析已停止，持续 {time.time() - sampler.started:.1f}s", "file": str(path),
+                "summary": summary}
+
+    def toggle_sampling(self) -> Dict[str, Any]:
+        return self.stop_sampling() if self._sampler is not None else self.start_sampling()
+
+    def toggle_cprofile(self) -> Dict[str, Any]:
+        """在调用线程上开启或停止 cProfile（GUI 中用于分析 Tk 主线程）"""
+        if self._cprofile is None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile_thread = threading.get_ident()
+            self._cprofile.enable()
+            return {"message": f"cProfile 已在线程 {threading.current_thread().name} 上开启"}
+        if threading.get_ident() != self._cprofile_thread:
+            raise ValueError("cProfile 必须在开启它的线程上停止")
+        profile, self._cprofile = self._cprofile, None
+        profile.disable()
+        path = self._path("cprofile", ".prof")
+        profile.dump_stats(str(path))
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(self.top)
+        return {"message": "cProfile 已停止", "file": str(path), "summary": text.getvalue()}
+
+    # ---- 内存 ----
+
+    def start_tracemalloc(self, frames: Optional[int] = None) -> Dict[str, Any]:
+        if tracemalloc.is_tracing():
+            return {"message": "tracemalloc 已在运行"}
+        tracemalloc.start(frames or self.tracemalloc_frames)
+        self._last_snapshot = None
+        return {"message": "tracemalloc 已开始，之后的内存分配会被记录"}
+
+    def tracemalloc_snapshot(self) -> Dict[str, Any]:
+        """保存快照并输出分配最多的位置，以及与上一次快照相比增长最多的位置"""
+        if not tracemalloc.is_tracing():
+            self.start_tracemalloc()
+            return {"message": "tracemalloc 此前未运行，已开始记录，请稍后再次获取快照"}
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"当前 {current / 1024 / 1024:.1f} MB，峰值 {peak / 1024 / 1024:.1f} MB", "", "分配最多的位置:"]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:self.top]]
+        if self._last_snapshot is not None:
+            lines += ["", "与上次快照相比增长最多的位置:"]
+            lines += [str(stat) for stat in snapshot.compare_to(self._last_snapshot, "lineno")[:self.top]]
+        self._last_snapshot = snapshot
+        path = self._path("memory", ".txt")
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        dump_path = path.with_suffix(".snapshot")
+        snapshot.dump(str(dump_path))
+        return {"message": "内存快照已保存", "file": str(path), "snapshot": str(dump_path),
+                "summary": "\n".join(lines[:12])}
+
+    def stop_tracemalloc(self) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            return {"message": "tracemalloc 未运行"}
+        tracemalloc.stop()
+        self._last_snapshot = None
+        return {"message": "tracemalloc 已停止"}
+
+    # ---- 调用栈 ----
+
+    def dump_stacks(self) -> Dict[str, Any]:
+        """写出所有线程的当前调用栈"""
+        import traceback
+        names = {thread.ident: thread for thread in threading.enumerate()}
+        lines = []
+        for thread_id, frame in sys._current_frames().items():
+            thread = names.get(thread_id)
+            label = f"{thread.name} (daemon)" if thread is not None and thread.daemon else (
+                thread.name if thread is not None else "未知线程")
+            lines.append(f"--- 线程 {label} [{thread_id}] ---")
+            lines.extend(line.rstrip("\n") for line in traceback.format_stack(frame))
+            lines.append("")
+        path = self._path("stacks", ".txt")
+        path.write_text("\n".join(lines), encoding="utf-8")
+        return {"message": f"已转储 {len(names)} 个线程的调用栈", "file": str(path)}
+
+def print_profile_result(result: Dict[str, Any]) -> None:
+    """打印分析操作的结果"""
+    print(result.get("message", ""))
+    if result.get("file"):
+        print(f"  文件: {result['file']}")
+    if result.get("summary"):
+        print(result["summary"])
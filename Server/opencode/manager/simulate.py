@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服模拟模式
+用轻量的替身程序代替真实服务（按速率输出日志、绑定端口并应答连接、定时崩溃或卡死、按连接泄漏内存或句柄），
+并测量管理器在 3/50/500 个服务规模下的CPU、内存、线程数、状态检测延迟与日志吞吐。
+无需游戏二进制文件即可在Linux上运行
+
+替身程序：python simulate.py --stand-in --port 0 --log-rate 10 --crash-after 5
+
+License: GNU V3 LICENSE
+"""
+
+import argparse
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+
+import psutil
+
+# 替身程序在崩溃前输出的标记行，用于计算状态检测延迟
+CRASH_MARKER = "SIM: crashing at "
+
+def _serve_connections(server: socket.socket, leak_kb: int, leak_handles: bool):
+    """应答连接：读取一行后回复并关闭；按配置为每个连接保留内存或不关闭套接字，模拟泄漏"""
+    leaked = []
+    while True:
+        conn, _ = server.accept()
+        try:
+            conn.settimeout(5)
+            conn.recv(4096)
+            conn.sendall(b"pong\n")
+            conn.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        if leak_kb:
+            leaked.append(bytearray(b"x" * (leak_kb * 1024)))
+        if leak_handles:
+            leaked.append(conn)
+        else:
+            conn.close()
+
+def run_stand_in(port: int, log_rate: float, crash_after: float, hang_after: float,
+                 leak_kb: int = 0, leak_handles: bool = False) -> int:
+    """替身程序主循环"""
+    server = None
+    if port:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("127.0.0.1", port))
+        server.listen(16)
+        threading.Thread(target=_serve_connections, args=(server, leak_kb, leak_handles), daemon=True).start()
+    started = time.monotonic()
+    interval = 1.0 / log_rate if log_rate > 0 else None
+    next_log = started
+    count = 0
+    while True:
+        now = time.monotonic()
+        if crash_after and now - started >= crash_after:
+            print(f"{CRASH_MARKER}{time.time():.6f}", flush=True)
+            return 1
+        if hang_after and now - started >= hang_after:
+            # 进程存活但不再输出任何内容
+            threading.Event().wait()
+        if interval is None:
+            time.sleep(0.5)
+            continue
+        # 按速率补齐应输出的行数，一次写出
+        lines = []
+        while next_log <= now:
+            count += 1
+            lines.append(f"INFO: received packet with cmd_id {66 + count % 3}\n")
+            next_log += interval
+        if lines:
+            sys.stdout.write("".join(lines))
+            sys.stdout.flush()
+        time.sleep(max(0.0, min(next_log - time.monotonic(), 0.5)))
+
+def build_simulated_services(count: int, base_port: int = 42000, log_rate: float = 10.0,
+                             crash_every: int = 0, crash_after: float = 0.0,
+                             hang_every: int = 0, hang_after: float = 0.0,
+                             leak_every: int = 0, leak_kb: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    生成替身服务的 service_paths 配置
+    crash_every/hang_every: 每N个服务中有一个在 crash_after/hang_after 秒后崩溃/卡死
+    leak_every: 每N个服务中有一个每应答一个连接泄漏 leak_kb KB 内存与一个套接字
+    """
+    script = str(Path(__file__).resolve())
+    services = {}
+    for index in range(count):
+        port = base_port + index if base_port else 0
+        args = [script, "--stand-in", "--port", str(port), "--log-rate", str(log_rate)]
+        if crash_every and crash_after and index % crash_every == crash_every - 1:
+            args += ["--crash-after", str(crash_after)]
+        elif hang_every and hang_after and index % hang_every == hang_every - 1:
+            args += ["--hang-after", str(hang_after)]
+        if leak_every and index % leak_every == 0:
+            args += ["--leak-kb", str(leak_kb), "--leak-handles"]
+        services[f"sim-{index:03d}"] = {"executable": sys.executable, "args": args, "port": port or None}
+    return services
+
+class SupervisorSampler:
+    """在后台采样管理器自身的CPU、内存与线程数"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.samples: List[Dict[str, float]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.process.cpu_percent(None)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, float]:
+        self._stop.set()
+        self._thread.join()
+        if not self.samples:
+            return {"cpu_percent": 0.0, "rss_mb": 0.0, "threads": 0}
+        return {
+            "cpu_percent": sum(s["cpu"] for s in self.samples) / len(self.samples),
+            "rss_mb": max(s["rss"] for s in self.samples),
+            "threads": max(s["threads"] for s in self.samples),
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.samples.append({
+                "cpu": self.process.cpu_percent(None),
+                "rss": self.process.memory_info().rss / (1024 * 1024),
+                "threads": self.process.num_threads(),
+            })
+
+def run_scale_case(process_manager, services: Dict[str, Dict[str, Any]], running_status, error_status,
+                   duration: float, log_rate: float) -> Dict[str, Any]:
+    """
+    对一组替身服务执行一次规模测试
+    process_manager 需已加载 services 作为 service_paths
+    """
+    lock = threading.Lock()
+    line_count = [0]
+    crash_stamps: Dict[str, float] = {}
+    reached_running: Dict[str, float] = {}
+    detected: Dict[str, float] = {}
+
+    def on_output(service_name, stream_name, line):
+        with lock:
+            line_count[0] += 1
+        if line.startswith(CRASH_MARKER):
+            crash_stamps[service_name] = float(line[len(CRASH_MARKER):])
+
+    def make_callback(service_name):
+        def callback(status):
+            now = time.time()
+            if status == running_status:
+                reached_running.setdefault(service_name, now)
+            elif status == error_status:
+                detected.setdefault(service_name, now)
+        return callback
+
+    process_manager.register_output_callback(on_output)
+    for service_name in services:
+        process_manager.register_status_callback(service_name, make_callback(service_name))
+
+    sampler = SupervisorSampler()
+    sampler.start()
+    started = time.time()
+    failed_to_start = [name for name in services if not process_manager.start_service(name)]
+    spawn_s = time.time() - started
+
+    # 日志吞吐只统计全部服务启动之后的稳态窗口
+    with lock:
+        lines_before = line_count[0]
+    window_start = time.time()
+    time.sleep(duration)
+    with lock:
+        lines_in_window = line_count[0] - lines_before
+    window = time.time() - window_start
+
+    stop_started = time.time()
+    for service_name in services:
+        process_manager.stop_service(service_name)
+    stop_s = time.time() - stop_started
+    usage = sampler.stop()
+
+    latencies = sorted(detected[name] - stamp for name, stamp in crash_stamps.items() if name in detected)
+    crashing = [name for name, config in services.items() if "--crash-after" in config["args"]]
+    return {
+        "services": len(services),
+        "spawn_s": spawn_s,
+        "stop_s": stop_s,
+        "failed_to_start": failed_to_start,
+        "reached_running": len(reached_running),
+        "crashes_expected": len(crashing),
+        "crashes_detected": len(latencies),
+        "detect_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "detect_max_ms": latencies[-1] * 1000 if latencies else None,
+        "log_lines_per_s": lines_in_window / window if window > 0 else 0.0,
+        "log_lines_expected_per_s": log_rate * (len(services) - len(crashing)),
+        **usage,
+    }
+
+def run_scale_benchmark(make_process_manager: Callable[[Dict[str, Dict[str, Any]]], Any],
+                        running_status, error_status, counts=(3, 50, 500),
+                        duration: float = 15.0, log_rate: float = 10.0,
+                        crash_every: int = 10, crash_after: float = 5.0) -> List[Dict[str, Any]]:
+    """
+    依次测试各规模，make_process_manager(service_paths) 返回一个新的 ProcessManager
+    每个用例结束后关闭其后台线程，避免计入下一个用例的线程数
+    """
+    if crash_every and duration < crash_after + 1:
+        raise ValueError(f"测试时长 {duration} 秒不足以覆盖 {crash_after} 秒后的崩溃")
+    results = []
+    for count in counts:
+        services = build_simulated_services(count, log_rate=log_rate,
+                                            crash_every=crash_every, crash_after=crash_after)
+        print(f"[scale] 正在测试 {count} 个替身服务...")
+        process_manager = make_process_manager(services)
+        try:
+            results.append(run_scale_case(process_manager, services, running_status, error_status,
+                                          duration, log_rate))
+        finally:
+            process_manager.close()
+    return results
+
+def scale_regressions(results: List[Dict[str, Any]]) -> List[str]:
+    """检查结果中的硬性错误（启动失败、漏检崩溃），供CI判定"""
+    problems = []
+    for result in results:
+        count = result["services"]
+        if result["failed_to_start"]:
+            problems.append(f"{count} 个服务: {len(result['failed_to_start'])} 个启动失败")
+        if result["crashes_detected"] < result["crashes_expected"]:
+            problems.append(f"{count} 个服务: 仅检测到 {result['crashes_detected']}/"
+                            f"{result['crashes_expected']} 次崩溃")
+    return problems
+
+def print_scale_report(results: List[Dict[str, Any]]) -> None:
+    """打印规模测试报告"""
+    print(f"{'服务数':>6} {'CPU%':>7} {'RSS(MB)':>8} {'线程':>6} {'启动(s)':>8} {'停止(s)':>8} "
+          f"{'检测p50/max(ms)':>16} {'日志(行/s)':>16}")
+    print("-" * 86)
+    for r in results:
+        detect = (f"{r['detect_p50_ms']:.0f}/{r['detect_max_ms']:.0f}"
+                  if r["detect_p50_ms"] is not None else "-")
+        logs = f"{r['log_lines_per_s']:.0f}/{r['log_lines_expected_per_s']:.0f}"
+        print(f"{r['services']:>6} {r['cpu_percent']:>7.1f} {r['rss_mb']:>8.1f} {r['threads']:>6} "
+              f"{r['spawn_s']:>8.2f} {r['stop_s']:>8.2f} {detect:>16} {logs:>16}")
+
+def main():
+    parser = argparse.ArgumentParser(description='SR私服替身服务')
+    parser.add_argument('--stand-in', action='store_true', help='以替身服务运行')
+    parser.add_argument('--port', type=int, default=0, help='绑定的端口，0表示不绑定')
+    parser.add_argument('--log-rate', type=float, default=10.0, help='每秒输出的日志行数')
+    parser.add_argument('--crash-after', type=float, default=0.0, help='N秒后以非零退出码退出')
+    parser.add_argument('--hang-after', type=float, default=0.0, help='N秒后停止输出并卡死')
+    parser.add_argument('--leak-kb', type=int, default=0, help='每应答一个连接泄漏的内存（KB）')
+    parser.add_argument('--leak-handles', action='store_true', help='应答后不关闭连接套接字')
+    args = parser.parse_args()
+    if not args.stand_in:
+        parser.error("请使用 --stand-in")
+    try:
+        sys.exit(run_stand_in(args.port, args.log_rate, args.crash_after, args.hang_after,
+                              args.leak_kb, args.leak_handles))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
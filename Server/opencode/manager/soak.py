@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服长时间稳定性测试（soak）
+以固定速率向各服务发送合成流量（gameserver 心跳、HTTP 请求或裸TCP连接），
+定期采样各服务进程的RSS与句柄数，用剔除离群点的最小二乘拟合增长趋势，
+按小时与每千个连接给出增长率，尽早发现内存与句柄泄漏
+
+License: GNU V3 LICENSE
+"""
+
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+import numpy as np
+import psutil
+
+from protocol import PacketReader, heartbeat_request
+
+# 趋势分析的指标：(键, 名称, 单位, 配置中每小时增长阈值的键)
+SOAK_METRICS = (
+    ("rss_kb", "RSS", "KB", "rss_kb_per_hour"),
+    ("handles", "句柄", "个", "handles_per_hour"),
+)
+
+def parse_duration(value: str) -> float:
+    """解析时长：纯数字为秒，也可带单位 s/m/h/d"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    value = str(value).strip()
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+def robust_trend(x: "np.ndarray", y: "np.ndarray", cutoff: float = 3.5, max_iter: int = 5) -> Optional[Dict[str, float]]:
+    """
+    线性趋势拟合：最小二乘后以残差的 MAD 估计尺度，剔除超过 cutoff 倍的离群点并重新拟合
+    返回斜率、截距、斜率标准误与保留的点数
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) < 4 or np.ptp(x) == 0:
+        return None
+    keep = np.ones(len(x), dtype=bool)
+    for _ in range(max_iter):
+        design = np.column_stack([x[keep], np.ones(keep.sum())])
+        (slope, intercept), *_ = np.linalg.lstsq(design, y[keep], rcond=None)
+        residuals = y - (slope * x + intercept)
+        kept = residuals[keep]
+        center = np.median(kept)
+        scale = 1.4826 * np.median(np.abs(kept - center))
+        if scale == 0:
+            # 句柄数等整数序列大部分残差可能恰好相同，改用平均绝对偏差
+            scale = np.mean(np.abs(kept - center))
+            if scale == 0:
+                break
+        new_keep = np.abs(residuals - center) <= cutoff * scale
+        if new_keep.sum() < 4 or np.array_equal(new_keep, keep):
+            break
+        keep = new_keep
+    xs, ys = x[keep], y[keep]
+    design = np.column_stack([xs, np.ones(len(xs))])
+    (slope, intercept), *_ = np.linalg.lstsq(design, ys, rcond=None)
+    residuals = ys - (slope * xs + intercept)
+    spread = np.sum((xs - xs.mean()) ** 2)
+    dof = max(1, len(xs) - 2)
+    stderr = float(np.sqrt(np.sum(residuals ** 2) / dof / spread)) if spread > 0 else float("inf")
+    return {"slope": float(slope), "intercept": float(intercept), "stderr": stderr,
+            "kept": int(keep.sum()), "points": len(x)}
+
+class TrafficDriver:
+    """
+    向单个服务以固定速率建立连接的后台线程
+    spec: {"type": "gameserver"|"http"|"tcp", "port": 端口, "path": HTTP路径}
+    """
+
+    def __init__(self, service_name: str, spec: Dict[str, Any], rate: float, heartbeats: int = 5,
+                 timeout: float = 5.0):
+        self.service_name = service_name
+        self.spec = spec
+        self.rate = rate
+        self.heartbeats = heartbeats
+        self.timeout = timeout
+        self.connections = 0
+        self.errors = 0
+        self.last_error = ""
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._packet = heartbeat_request(1)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(self.timeout + 1)
+
+    def _run(self):
+        interval = 1.0 / self.rate
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self._connect_once()
+            except OSError as e:
+                self.errors += 1
+                self.last_error = str(e)
+            self.connections += 1
+            next_at += interval
+            delay = next_at - time.monotonic()
+            if delay < -interval * 10:
+                # 服务响应慢时不累积欠账，保持稳态速率
+                next_at = time.monotonic()
+            elif delay > 0:
+                self._stop.wait(delay)
+
+    def _connect_once(self):
+        with socket.create_connection(("127.0.0.1", self.spec["port"]), timeout=self.timeout) as sock:
+            kind = self.spec.get("type")
+            if kind == "gameserver":
+                reader = PacketReader()
+                sock.sendall(self._packet * self.heartbeats)
+                received = 0
+                while received < self.heartbeats:
+                    data = sock.recv(65536)
+                    if not data:
+                        raise ConnectionError("游戏服务器关闭了连接")
+                    received += len(reader.feed(data))
+            elif kind == "http":
+                sock.sendall(f"GET {self.spec.get('path', '/')} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+                             "Connection: close\r\n\r\n".encode())
+                while sock.recv(65536):
+                    pass
+            else:
+                sock.sendall(b"ping\n")
+                while sock.recv(4096):
+                    pass
+
+def sample_process_tree(pid: int) -> Optional[Dict[str, float]]:
+    """进程及其子进程的RSS（KB）与句柄数（Windows 为句柄，POSIX 为文件描述符）"""
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    rss = 0
+    handles = 0
+    for proc in processes:
+        try:
+            rss += proc.memory_info().rss
+            handles += proc.num_handles() if sys.platform == "win32" else proc.num_fds()
+        except psutil.Error:
+            continue
+    return {"rss_kb": rss / 1024, "handles": float(handles)}
+
+def analyze_series(samples: List[Dict[str, float]], thresholds: Dict[str, float],
+                   min_t: float = 3.0) -> Dict[str, Dict[str, Any]]:
+    """
+    对一个服务的采样序列拟合趋势
+    增长率为正、t 值超过 min_t 且每小时增长超过阈值时判定为泄漏
+    """
+    if len(samples) < 4:
+        return {}
+    t = np.array([s["t"] for s in samples])
+    conns = np.array([s["connections"] for s in samples], dtype=np.float64)
+    results = {}
+    for key, _, _, threshold_key in SOAK_METRICS:
+        values = np.array([s[key] for s in samples])
+        trend = robust_trend(t, values)
+        if trend is None:
+            continue
+        per_hour = trend["slope"] * 3600
+        t_value = trend["slope"] / trend["stderr"] if trend["stderr"] > 0 else (
+            float("inf") if trend["slope"] > 0 else 0.0)
+        per_kconn = None
+        if np.ptp(conns) > 0:
+            conn_trend = robust_trend(conns, values)
+            if conn_trend is not None:
+                per_kconn = conn_trend["slope"] * 1000
+        results[key] = {
+            "start": float(values[0]),
+            "end": float(values[-1]),
+            "per_hour": per_hour,
+            "per_kconn": per_kconn,
+            "t_value": t_value,
+            "outliers": trend["points"] - trend["kept"],
+            "leak": per_hour > 0 and t_value >= min_t and per_hour >= float(thresholds.get(threshold_key, 0)),
+        }
+    return results
+
+class SoakRunner:
+    """
+    长时间稳定性测试
+    pid_source(service_name) 返回服务当前的进程号；进程号变化（重启）后该服务的序列重新开始
+    """
+
+    def __init__(self, pid_source: Callable[[str], Optional[int]], targets: Dict[str, Dict[str, Any]],
+                 config: Dict[str, Any]):
+        self.pid_source = pid_source
+        self.targets = targets
+        self.config = config
+        self.thresholds = {
+            "rss_kb_per_hour": float(config.get("rss_kb_per_hour", 2048)),
+            "handles_per_hour": float(config.get("handles_per_hour", 5.0)),
+        }
+        self.drivers = {
+            name: TrafficDriver(name, spec, float(config.get("rate", 5.0)),
+                                int(config.get("heartbeats_per_conn", 5)))
+            for name, spec in targets.items()
+        }
+        self.series: Dict[str, List[Dict[str, float]]] = {name: [] for name in targets}
+        self.pids: Dict[str, Optional[int]] = {}
+        self.restarts: Dict[str, int] = {name: 0 for name in targets}
+        self.flagged: Dict[str, set] = {name: set() for name in targets}
+
+    def run(self, duration: float) -> Dict[str, Dict[str, Any]]:
+        """运行指定时长，期间定期检查趋势并尽早报告疑似泄漏"""
+        interval = float(self.config.get("sample_interval", 5.0))
+        warmup = float(self.config.get("warmup", 120.0))
+        check_interval = float(self.config.get("check_interval", 60.0))
+        started = time.monotonic()
+        for driver in self.drivers.values():
+            driver.start()
+        next_check = started + warmup + check_interval
+        try:
+            while True:
+                now = time.monotonic()
+                elapsed = now - started
+                if elapsed >= duration:
+                    break
+                if elapsed >= warmup:
+                    self._sample(elapsed)
+                if now >= next_check:
+                    self._early_check(elapsed)
+                    next_check = now + check_interval
+                time.sleep(min(interval, max(0.0, duration - elapsed)))
+        except KeyboardInterrupt:
+            print("\n收到中断信号，提前结束并输出报告")
+        finally:
+            for driver in self.drivers.values():
+                driver.stop()
+        return self.report()
+
+    def _sample(self, elapsed: float):
+        for name in self.targets:
+            pid = self.pid_source(name)
+            if pid is None:
+                continue
+            if self.pids.get(name) not in (None, pid):
+                # 服务重启后内存与句柄从头开始，旧序列不再可比
+                self.restarts[name] += 1
+                self.series[name] = []
+            self.pids[name] = pid
+            sample = sample_process_tree(pid)
+            if sample is None:
+                continue
+            sample.update(t=elapsed, connections=self.drivers[name].connections)
+            self.series[name].append(sample)
+
+    def _early_check(self, elapsed: float):
+        for name, samples in self.series.items():
+            for key, result in analyze_series(samples, self.thresholds,
+                                              float(self.config.get("min_t", 3.0))).items():
+                if result["leak"] and key not in self.flagged[name]:
+                    self.flagged[name].add(key)
+                    label = next(title for k, title, _, _ in SOAK_METRICS if k == key)
+                    print(f"[soak] {elapsed / 60:.0f}分钟: {name} 疑似{label}泄漏，"
+                          f"每小时增长 {result['per_hour']:.2f}（t={min(result['t_value'], 999):.1f}）")
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        min_t = float(self.config.get("min_t", 3.0))
+        report = {}
+        for name, samples in self.series.items():
+            driver = self.drivers[name]
+            report[name] = {
+                "connections": driver.connections,
+                "errors": driver.errors,
+                "last_error": driver.last_error,
+                "restarts": self.restarts[name],
+                "samples": len(samples),
+                "metrics": analyze_series(samples, self.thresholds, min_t),
+            }
+        return report
+
+def has_leaks(report: Dict[str, Dict[str, Any]]) -> bool:
+    return any(m["leak"] for r in report.values() for m in r["metrics"].values())
+
+def print_soak_report(report: Dict[str, Dict[str, Any]], duration: float) -> None:
+    """打印稳定性测试报告"""
+    print(f"\n稳定性测试报告（{duration / 3600:.2f} 小时）")
+    print(f"{'服务':<25}{'指标':<6}{'起始':>10}{'结束':>10}{'每小时':>10}{'每千连接':>10}{'t值':>7}  结论")
+    print("-" * 90)
+    for name, r in report.items():
+        for key, label, unit, _ in SOAK_METRICS:
+            m = r["metrics"].get(key)
+            if m is None:
+                print(f"{name:<25}{label:<6} 样本不足")
+                continue
+            per_kconn = f"{m['per_kconn']:.2f}" if m["per_kconn"] is not None else "-"
+            t_value = f"{m['t_value']:.1f}" if abs(m["t_value"]) < 1000 else (">999" if m["t_value"] > 0 else "<-999")
+            verdict = "✗ 疑似泄漏" if m["leak"] else "✓"
+            print(f"{name:<25}{label:<6}{m['start']:>10.1f}{m['end']:>10.1f}{m['per_hour']:>10.2f}"
+                  f"{per_kconn:>10}{t_value:>7}  {verdict}")
+        notes = [f"{r['connections']} 个连接", f"{r['errors']} 个失败"]
+        if r["restarts"]:
+            notes.append(f"重启 {r['restarts']} 次（只分析最后一次重启后的数据）")
+        if r["errors"] and r["last_error"]:
+            notes.append(f"最近错误: {r['last_error']}")
+        print(f"{'':<25}{'，'.join(notes)}")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服资源曲线
+后台线程按固定周期采集各服务的CPU、内存、连接数与重启次数；
+GUI 中的迷你曲线按像素宽度做 min/max 抽稀，在固定刷新周期内只更新发生变化的曲线
+
+License: GNU V3 LICENSE
+"""
+
+import collections
+import threading
+import tkinter as tk
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# 曲线显示的指标：(键, 标题, 格式)
+METRICS = (
+    ("cpu", "CPU", "{:.0f}%"),
+    ("rss_mb", "内存", "{:.0f}M"),
+    ("conns", "连接", "{:.0f}"),
+    ("restarts", "重启", "{:.0f}"),
+)
+
+class MetricHistory:
+    """单个服务各指标的滚动历史（采样线程写入，GUI 线程通过 snapshot 读取）"""
+
+    def __init__(self, length: int = 300):
+        self.series: Dict[str, "collections.deque[float]"] = {
+            key: collections.deque(maxlen=length) for key, _, _ in METRICS
+        }
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def add(self, sample: Optional[Dict[str, Any]]):
+        """
+        追加一次采样：服务未运行时记为0（重启次数保持不变），
+        本次未采集的指标（如低频采集的连接数）沿用上一个值
+        """
+        with self._lock:
+            for key, series in self.series.items():
+                if sample is not None and key in sample:
+                    series.append(float(sample[key]))
+                elif (sample is not None or key == "restarts") and series:
+                    series.append(series[-1])
+                else:
+                    series.append(0.0)
+            self.version += 1
+
+    def snapshot(self, key: str) -> Tuple[int, List[float]]:
+        """返回 (版本, 指标历史的副本)"""
+        with self._lock:
+            return self.version, list(self.series[key])
+
+def decimate_minmax(values: List[float], width: int) -> List[Tuple[int, float, float]]:
+    """
+    将样本按像素列分桶，每列保留最小值与最大值
+    样本数不超过宽度时每个样本占一列
+    """
+    count = len(values)
+    if count == 0 or width <= 0:
+        return []
+    if count <= width:
+        return [(i, v, v) for i, v in enumerate(values)]
+    columns = []
+    for x in range(width):
+        start = x * count // width
+        end = max(start + 1, (x + 1) * count // width)
+        bucket = values[start:end]
+        columns.append((x, min(bucket), max(bucket)))
+    return columns
+
+class TelemetrySampler:
+    """后台采样，source() 返回 {服务名: {指标: 值}}；传入调度器时作为周期任务运行，否则使用独立线程"""
+
+    def __init__(self, source: Callable[[], Dict[str, Dict[str, Any]]], service_names: List[str],
+                 interval: float = 1.0, history: int = 300):
+        self.source = source
+        self.interval = interval
+        self.histories = {name: MetricHistory(history) for name in service_names}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._scheduler = None
+
+    def start(self, scheduler=None):
+        if scheduler is not None:
+            self._scheduler = scheduler
+            scheduler.every("telemetry", self.interval, self.sample, blocking=True)
+        else:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.cancel("telemetry")
+
+    def sample(self):
+        """采样一次并写入各服务的历史"""
+        try:
+            samples = self.source()
+        except Exception as e:
+            print(f"资源采集出错: {e}")
+            return
+        for service_name, history in self.histories.items():
+            history.add(samples.get(service_name))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+class Sparkline(tk.Canvas):
+    """迷你曲线，复用同一条折线，只在数据版本变化时更新坐标"""
+
+    def __init__(self, parent, title: str, fmt: str, width: int = 96, height: int = 30, **kwargs):
+        super().__init__(parent, width=width, height=height, highlightthickness=0, borderwidth=0, **kwargs)
+        self.title = title
+        self.fmt = fmt
+        self.plot_width = width
+        self.plot_height = height
+        self._line = self.create_line(0, 0, 0, 0, width=1, fill="#1F6AA5")
+        self._label = self.create_text(2, 1, anchor="nw", font=("TkDefaultFont", 8), text=title)
+        self._drawn_version = -1
+
+    def apply_theme(self, dark: bool):
+        self.configure(bg="#1A1A1A" if dark else "#F4F4F4")
+        self.itemconfigure(self._label, fill="#BBBBBB" if dark else "#555555")
+        self.itemconfigure(self._line, fill="#4FA3E0" if dark else "#1F6AA5")
+
+    def draw(self, history: MetricHistory, key: str):
+        if history.version == self._drawn_version:
+            return
+        self._drawn_version, snapshot = history.snapshot(key)
+        columns = decimate_minmax(snapshot, self.plot_width)
+        if not columns:
+            return
+        top = max(hi for _, _, hi in columns)
+        scale = (self.plot_height - 12) / top if top > 0 else 0.0
+        base = self.plot_height - 1
+        points = []
+        for x, lo, hi in columns:
+            # 每列先画最小值再画最大值，折线在列内形成竖线以保留峰值
+            points += [x, base - lo * scale, x, base - hi * scale]
+        self.coords(self._line, *points)
+        self.itemconfigure(self._label, text=f"{self.title} {self.fmt.format(snapshot[-1])}")
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""测试直接导入管理器目录下的模块"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""远程管理代理：认证握手、帧大小限制与多节点汇总"""
+
+import asyncio
+import struct
+from enum import Enum
+
+import pytest
+
+from agent import (AUTH_FRAME_SIZE, AgentConnection, AgentCoordinator, SupervisorAgent, encode_frame,
+                   read_frame, read_token_file, sign_challenge)
+
+TOKEN = "test-token"
+
+class _Status(Enum):
+    RUNNING = "running"
+
+class FakeProcessManager:
+    """只提供代理用到的接口"""
+
+    def __init__(self, names):
+        self.service_status = {name: _Status.RUNNING for name in names}
+        self.service_processes = {}
+
+    def get_service_status(self, name):
+        return self.service_status[name]
+
+    def is_service_running(self, name):
+        return True
+
+async def _start_agent(names=("svc",)):
+    return await SupervisorAgent(FakeProcessManager(names), TOKEN, "127.0.0.1", 0).start()
+
+def test_handshake_and_call():
+    async def main():
+        agent = await _start_agent(("a", "b"))
+        connection = await AgentConnection("127.0.0.1", agent.port, TOKEN).open()
+        try:
+            assert await connection.call("list") == ["a", "b"]
+            status = await connection.call("status", services=["b"])
+            assert status == {"b": {"status": "running", "running": True, "pid": None}}
+        finally:
+            await connection.close()
+            agent.close()
+    asyncio.run(main())
+
+def test_wrong_token_is_rejected():
+    async def main():
+        agent = await _start_agent()
+        try:
+            with pytest.raises(PermissionError):
+                await AgentConnection("127.0.0.1", agent.port, "wrong").open()
+        finally:
+            agent.close()
+    asyncio.run(main())
+
+def test_oversized_frame_before_auth_closes_connection():
+    async def main():
+        agent = await _start_agent()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", agent.port)
+            header = await reader.readexactly(4)
+            await reader.readexactly(struct.unpack(">I", header)[0])
+            # 声明一个远超认证帧上限的长度，代理应立即断开而不是等待读取
+            writer.write(struct.pack(">I", AUTH_FRAME_SIZE + 1))
+            await writer.drain()
+            assert await asyncio.wait_for(reader.read(), timeout=2) == b""
+            writer.close()
+        finally:
+            agent.close()
+    asyncio.run(main())
+
+def test_non_object_frames_get_error_replies():
+    async def main():
+        agent = await _start_agent()
+        try:
+            # 认证帧不是对象时按认证失败处理
+            reader, writer = await asyncio.open_connection("127.0.0.1", agent.port)
+            await read_frame(reader)
+            writer.write(encode_frame([]))
+            assert await asyncio.wait_for(read_frame(reader), timeout=2) == {"ok": False, "error": "认证失败"}
+            writer.close()
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", agent.port)
+            hello = await read_frame(reader)
+            writer.write(encode_frame({"auth": sign_challenge(TOKEN, hello["challenge"])}))
+            assert (await read_frame(reader))["ok"]
+            for bad in (1, {"id": 7, "op": "list", "args": 5}):
+                writer.write(encode_frame(bad))
+                reply = await asyncio.wait_for(read_frame(reader), timeout=2)
+                assert not reply["ok"] and reply["error"]
+            # 出错后连接仍然可用
+            writer.write(encode_frame({"id": 8, "op": "list"}))
+            assert await asyncio.wait_for(read_frame(reader), timeout=2) == {"id": 8, "ok": True, "result": ["svc"]}
+            writer.close()
+        finally:
+            agent.close()
+    asyncio.run(main())
+
+def test_coordinator_sweeps_several_agents():
+    async def main():
+        agents = [await _start_agent((f"svc{i}",)) for i in range(3)]
+        coordinator = AgentCoordinator([f"127.0.0.1:{agent.port}" for agent in agents] + ["127.0.0.1:1"], TOKEN)
+        try:
+            errors = await coordinator.connect()
+            assert list(errors) == ["127.0.0.1:1"]
+            sweep = await coordinator.status_sweep()
+            assert sorted(name for statuses in sweep.values() for name in statuses) == ["svc0", "svc1", "svc2"]
+        finally:
+            await coordinator.close()
+            for agent in agents:
+                agent.close()
+    asyncio.run(main())
+
+def test_token_file(tmp_path):
+    path = tmp_path / "token.txt"
+    path.write_text(f"  {TOKEN}\n", encoding="utf-8")
+    assert read_token_file(str(path)) == TOKEN
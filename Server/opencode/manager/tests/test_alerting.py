@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""告警：webhook 投递、失败重试与抖动抑制"""
+
+import pytest
+
+from alerting import AlertEngine, AlertReceiver, Rule, WebhookSink, compile_rules
+
+RULES = [{"name": "slow", "type": "threshold", "metric": "probe_p99_ms", "service": "gs", "op": ">", "value": 200}]
+
+def _sample(value):
+    return {"probe_p99_ms": {"gs": value}}
+
+@pytest.fixture
+def receiver():
+    receiver = AlertReceiver(statuses=[503]).start()
+    yield receiver
+    receiver.stop()
+
+def test_webhook_delivery_retries_server_errors(receiver):
+    engine = AlertEngine(compile_rules(RULES), [WebhookSink(receiver.url, retries=2, backoff=0.01)])
+    engine.evaluate(_sample(500), ts=0)
+    engine.evaluate(_sample(50), ts=10)
+    assert receiver.wait_for(2)
+    assert [n["status"] for n in receiver.received] == ["firing", "resolved"]
+    assert receiver.received[0]["value"] == 500
+    assert receiver.received[0]["fingerprint"] == receiver.received[1]["fingerprint"]
+    # 第一次请求返回 503 后重试
+    assert receiver.requests == 3
+    assert engine.sent == 2 and engine.failed == 0
+
+def test_flapping_alert_is_suppressed_within_cooldown():
+    engine = AlertEngine(compile_rules(RULES), [], cooldown=100)
+    statuses = []
+    for ts, value in [(0, 500), (10, 50), (20, 500), (30, 50), (40, 500)]:
+        statuses += [(ts, n["status"]) for n in engine.evaluate(_sample(value), ts=ts)]
+    assert statuses == [(0, "firing"), (10, "resolved")]
+    # 持续越限到冷却期结束后照常提醒，之后的恢复也会发送
+    statuses = [n["status"] for n in engine.evaluate(_sample(500), ts=100)]
+    statuses += [n["status"] for n in engine.evaluate(_sample(50), ts=110)]
+    assert statuses == ["firing", "resolved"]
+    # 冷却期过后重新触发的告警不受影响
+    assert [n["status"] for n in engine.evaluate(_sample(500), ts=250)] == ["firing"]
+
+def test_rule_base_is_abstract():
+    with pytest.raises(TypeError):
+        Rule({"name": "x"})
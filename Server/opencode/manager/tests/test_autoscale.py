@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""自动扩缩容：决策的冷却与滞后，副本注册不污染默认配置"""
+
+import copy
+
+import pytest
+
+from autoscale import ScalingPolicy
+
+def test_scale_up_is_stepped_and_cooled_down():
+    policy = ScalingPolicy(0, 5, up_cooldown=30, max_step_up=2)
+    assert policy.decide(0, 0, 4, 4) == 2
+    # 冷却期内不再扩容
+    assert policy.decide(10, 2, 4, 4) == 2
+    assert policy.decide(30, 2, 5, 5) == 4
+
+def test_scale_down_waits_for_a_stable_window():
+    policy = ScalingPolicy(0, 4, up_cooldown=0, down_cooldown=60, down_window=60)
+    assert policy.decide(0, 2, 2, 2) == 2
+    # 窗口内仍有需要 2 个副本的样本
+    assert policy.decide(30, 2, 2, 1) == 2
+    assert policy.decide(61, 2, 2, 1) == 1
+    assert policy.decide(62, 1, 1, 0) == 1
+    assert policy.decide(125, 1, 1, 0) == 0
+
+def test_scale_down_respects_cooldown_after_any_scaling():
+    policy = ScalingPolicy(0, 4, up_cooldown=0, down_cooldown=60, down_window=0)
+    assert policy.decide(0, 3, 3, 1) == 2
+    assert policy.decide(10, 2, 2, 1) == 2
+    assert policy.decide(60, 2, 2, 1) == 1
+    # 扩容同样重置缩容冷却
+    assert policy.decide(70, 1, 2, 2) == 2
+    assert policy.decide(100, 2, 2, 0) == 2
+    assert policy.decide(130, 2, 2, 0) == 1
+
+def test_bounds_ignore_cooldowns():
+    policy = ScalingPolicy(1, 3, up_cooldown=300, down_cooldown=300)
+    assert policy.decide(0, 0, 0, 0) == 1
+    assert policy.decide(1, 5, 5, 5) == 3
+
+def test_runtime_replicas_do_not_leak_into_default_config():
+    manager = pytest.importorskip("manager")
+    defaults = copy.deepcopy(manager.HARDCODED_CONFIG)
+    process_manager = manager.ProcessManager(manager.ConfigManager())
+    replica = {"executable": "gameserver", "args": [], "port": 23331}
+    process_manager.add_service("gs@1", replica, probe={"type": "gameserver", "port": 23331})
+
+    assert process_manager.config_manager.get_setting("service_config.service_paths")["gs@1"] == replica
+    assert manager.HARDCODED_CONFIG == defaults
+    assert "gs@1" not in manager.ConfigManager().get_setting("service_config.service_paths")
+
+    process_manager.remove_service("gs@1")
+    service_paths = process_manager.config_manager.get_setting("service_config.service_paths")
+    assert service_paths == defaults["service_config"]["service_paths"]
+    assert "gs@1" not in process_manager.service_status
+    assert manager.HARDCODED_CONFIG == defaults
+    process_manager.close()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""客户端完整性校验：缺失文件按清单中的原始路径报告"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[4] / "Patch" / "opencode" / "manager"))
+client_launcher = pytest.importorskip("client_launcher")
+
+def _manifest_line(name: str, data: bytes) -> str:
+    return json.dumps({"remoteName": name, "md5": hashlib.md5(data).hexdigest().upper(), "fileSize": len(data)})
+
+def _checker(client_dir: Path, tmp_path: Path):
+    return client_launcher.ClientIntegrityChecker(client_dir, tmp_path / "cache.json", tmp_path / "baseline.json",
+                                                  workers=1)
+
+@pytest.fixture
+def case_insensitive_keys(monkeypatch):
+    """模拟 Windows 下不区分大小写的路径键，使路径键与清单路径不同"""
+    monkeypatch.setattr(client_launcher, "_path_key", str.lower)
+
+def test_manifest_names_are_reported(tmp_path, case_insensitive_keys, capsys):
+    client_dir = tmp_path / "client"
+    (client_dir / "StarRail_Data").mkdir(parents=True)
+    files = {"StarRail_Data/Good.bin": b"good", "StarRail_Data/Short.bin": b"short",
+             "StarRail_Data/Changed.bin": b"changed"}
+    (client_dir / "StarRail_Data" / "Good.bin").write_bytes(b"good")
+    (client_dir / "StarRail_Data" / "Short.bin").write_bytes(b"sho")
+    (client_dir / "StarRail_Data" / "Changed.bin").write_bytes(b"CHANGED")
+    manifest = [_manifest_line(name, data) for name, data in files.items()]
+    manifest.append(_manifest_line("StarRail_Data/Missing/Video.usm", b"video"))
+    (client_dir / "pkg_version").write_text("\n".join(manifest) + "\n", encoding="utf-8")
+
+    result = _checker(client_dir, tmp_path).verify(use_cache=False)
+    assert result["source"] == "pkg_version" and result["checked"] == 4
+    assert result["missing"] == ["StarRail_Data/Missing/Video.usm"]
+    assert result["size_mismatch"] == ["StarRail_Data/Short.bin（应为 5 字节，实际 3 字节）"]
+    assert result["hash_mismatch"] == ["StarRail_Data/Changed.bin"]
+    assert result["unreadable"] == []
+
+    assert not client_launcher.print_integrity_report(result)
+    assert "  - StarRail_Data/Missing/Video.usm" in capsys.readouterr().out
+
+def test_baseline_names_are_reported(tmp_path, case_insensitive_keys):
+    client_dir = tmp_path / "client"
+    client_dir.mkdir()
+    (client_dir / "Kept.bin").write_bytes(b"kept")
+    checker = _checker(client_dir, tmp_path)
+    assert checker.save_baseline(use_cache=False) == 1
+
+    (client_dir / "Kept.bin").unlink()
+    result = checker.verify()
+    assert result["source"] == "baseline.json"
+    assert result["missing"] == ["Kept.bin"]
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""dispatch 缓存：命中、并发合并、过期回源、旧数据兜底与网关端口改写"""
+
+import asyncio
+import base64
+
+from dispatchcache import GATESERVER_PORT_FIELD, DispatchCache, rewrite_gateway_port
+from protocol import encode_varint
+
+class FakeDispatch:
+    """按当前版本号返回响应体并统计请求数的 dispatch 替身"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.version = 1
+        self.requests = []
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        self.requests.append(head.split(b" ", 2)[1].decode())
+        await asyncio.sleep(self.delay)
+        body = f"v{self.version}".encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[:2]
+
+async def _get(cache: DispatchCache, target: str) -> bytes:
+    reader, writer = await asyncio.open_connection(*cache.listen)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n".encode())
+    data = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return data.partition(b"\r\n\r\n")[2]
+
+async def _start(dispatch: FakeDispatch, **kwargs) -> DispatchCache:
+    upstream = await dispatch.start()
+    return await DispatchCache(("127.0.0.1", 0), upstream, **kwargs).start()
+
+def test_ignored_params_share_one_cached_entry():
+    async def scenario():
+        dispatch = FakeDispatch()
+        cache = await _start(dispatch, ignore_params=["t"])
+        bodies = [await _get(cache, f"/query_dispatch?version=1&t={t}") for t in range(3)]
+        other = await _get(cache, "/query_dispatch?version=2&t=0")
+        return bodies, other, dispatch.requests, cache._collect_metrics()
+
+    bodies, other, requests, metrics = asyncio.run(scenario())
+    assert bodies == [b"v1"] * 3 and other == b"v1"
+    assert requests == ["/query_dispatch?version=1&t=0", "/query_dispatch?version=2&t=0"]
+    assert metrics["hits"] == 2 and metrics["misses"] == 2 and metrics["entries"] == 2
+
+def test_concurrent_misses_are_coalesced():
+    async def scenario():
+        dispatch = FakeDispatch(delay=0.1)
+        cache = await _start(dispatch)
+        bodies = await asyncio.gather(*(_get(cache, "/query_dispatch") for _ in range(5)))
+        return bodies, dispatch.requests, cache._collect_metrics()
+
+    bodies, requests, metrics = asyncio.run(scenario())
+    assert bodies == [b"v1"] * 5 and len(requests) == 1
+    assert metrics["misses"] == 1 and metrics["coalesced"] == 4
+
+def test_expired_entry_is_refreshed_and_served_stale_when_dispatch_is_down():
+    async def scenario():
+        dispatch = FakeDispatch()
+        cache = await _start(dispatch, ttl=0.1, upstream_timeout=1.0)
+        first = await _get(cache, "/query_gateway")
+        dispatch.version = 2
+        cached = await _get(cache, "/query_gateway")
+        await asyncio.sleep(0.15)
+        refreshed = await _get(cache, "/query_gateway")
+        dispatch.server.close()
+        await dispatch.server.wait_closed()
+        await asyncio.sleep(0.15)
+        stale = await _get(cache, "/query_gateway")
+        return [first, cached, refreshed, stale], cache._collect_metrics()
+
+    bodies, metrics = asyncio.run(scenario())
+    assert bodies == [b"v1", b"v1", b"v2", b"v2"]
+    assert metrics["upstream_errors"] == 1 and metrics["stale"] == 1
+
+def test_binary_change_invalidates_cache(tmp_path):
+    binary = tmp_path / "dispatch"
+    binary.write_bytes(b"build-1")
+
+    async def scenario():
+        dispatch = FakeDispatch()
+        cache = await _start(dispatch, binary=binary, check_interval=0.05)
+        first = await _get(cache, "/query_dispatch")
+        dispatch.version = 2
+        binary.write_bytes(b"build-2-longer")
+        await asyncio.sleep(0.2)
+        second = await _get(cache, "/query_dispatch")
+        return first, second, cache._collect_metrics()
+
+    first, second, metrics = asyncio.run(scenario())
+    assert (first, second) == (b"v1", b"v2")
+    assert metrics["invalidations"] == 1 and metrics["misses"] == 2
+
+def _field_varint(field: int, value: int) -> bytes:
+    return encode_varint(field << 3) + encode_varint(value)
+
+def _field_bytes(field: int, value: bytes) -> bytes:
+    return encode_varint(field << 3 | 2) + encode_varint(len(value)) + value
+
+def test_gateway_port_is_rewritten_in_place():
+    raw = _field_bytes(2, b"127.0.0.1") + _field_varint(GATESERVER_PORT_FIELD, 23301) + _field_varint(15, 1)
+    expected = _field_bytes(2, b"127.0.0.1") + _field_varint(GATESERVER_PORT_FIELD, 23311) + _field_varint(15, 1)
+    assert rewrite_gateway_port(raw, 23311) == expected
+    # 不含端口字段或不是合法 protobuf 时不改写
+    assert rewrite_gateway_port(_field_bytes(2, b"127.0.0.1"), 23311) is None
+    assert rewrite_gateway_port(b"\xff", 23311) is None
+
+    cache = DispatchCache(("127.0.0.1", 0), ("127.0.0.1", 1), gateway_port=23311)
+    assert base64.b64decode(cache._rewrite_gateway(base64.b64encode(raw))) == expected
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""准入前端：排队超时、队满拒绝与故障后端恢复"""
+
+import asyncio
+import socket
+
+from frontend import AdmissionFrontend
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def _echo(reader, writer):
+    while True:
+        data = await reader.read(65536)
+        if not data:
+            break
+        writer.write(data)
+        await writer.drain()
+    writer.close()
+
+def _frontend(backend, **kwargs) -> AdmissionFrontend:
+    kwargs.setdefault("rate", 100)
+    kwargs.setdefault("burst", 100)
+    return AdmissionFrontend(("127.0.0.1", 0), [backend], **kwargs)
+
+async def _connect_and_wait_close(frontend: AdmissionFrontend) -> bytes:
+    reader, writer = await asyncio.open_connection(*frontend.listen)
+    data = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return data
+
+def test_timed_out_waiters_leave_the_queue():
+    async def scenario():
+        frontend = _frontend(("127.0.0.1", _free_port()), queue_size=2, queue_timeout=0.1)
+        await frontend.start()
+        # 唯一的槽位被长连接占用
+        assert frontend._acquire_slot() is not None
+        for _ in range(4):
+            assert await _connect_and_wait_close(frontend) == b""
+        frontend._server.close()
+        return frontend._collect_metrics(), len(frontend._waiters)
+
+    metrics, waiters = asyncio.run(scenario())
+    assert metrics["timeouts"] == 4
+    assert metrics.get("rejected_full", 0) == 0
+    assert metrics["queue_depth"] == 0 and waiters == 0
+    assert metrics["max_queue_depth"] == 1
+
+def test_full_queue_rejects_new_clients():
+    async def scenario():
+        frontend = _frontend(("127.0.0.1", _free_port()), queue_size=1, queue_timeout=0.5)
+        await frontend.start()
+        assert frontend._acquire_slot() is not None
+        queued = asyncio.ensure_future(_connect_and_wait_close(frontend))
+        await asyncio.sleep(0.05)
+        await _connect_and_wait_close(frontend)
+        rejected_early = frontend.counters["rejected_full"]
+        await queued
+        frontend._server.close()
+        return rejected_early, frontend._collect_metrics()
+
+    rejected_early, metrics = asyncio.run(scenario())
+    assert rejected_early == 1
+    assert metrics["timeouts"] == 1 and metrics["queue_depth"] == 0
+
+def test_failed_backend_with_active_connections_is_restored():
+    async def scenario():
+        backend = ("127.0.0.1", _free_port())
+        frontend = _frontend(backend, backend_capacity=2, backend_retry=0.2, queue_timeout=5)
+        await frontend.start()
+        held = frontend._acquire_slot()
+        # 后端未监听，连接失败后进入排空状态，但仍有一个活跃连接
+        reader, writer = await asyncio.open_connection(*frontend.listen)
+        await asyncio.sleep(0.05)
+        draining = backend in frontend._draining and backend in frontend._backends
+        server = await asyncio.start_server(_echo, *backend)
+        writer.write(b"ping")
+        await writer.drain()
+        reply = await asyncio.wait_for(reader.read(4), 5)
+        frontend._release_slot(held)
+        load = dict(frontend._backends)
+        writer.close()
+        server.close()
+        frontend._server.close()
+        return backend, draining, reply, load, frontend.counters["backend_errors"]
+
+    backend, draining, reply, load, errors = asyncio.run(scenario())
+    assert draining and errors == 1
+    assert reply == b"ping"
+    # 恢复后两个槽位都可用：当前连接占用一个，归还的长连接槽位未丢失
+    assert load == {backend: 1}
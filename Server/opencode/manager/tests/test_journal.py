@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""生命周期日志：跨会话的崩溃历史查询"""
+
+import journal
+from journal import LifecycleJournal, crash_history, service_report
+
+class _Clock:
+    """只替换 journal 模块使用的 time.time()"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+def test_crash_history_across_sessions(tmp_path, monkeypatch):
+    clock = _Clock(1000.0)
+    monkeypatch.setattr(journal, "time", clock)
+    path = str(tmp_path / "journal.db")
+
+    first = LifecycleJournal(path, flush_interval=0.05)
+    first.record("gs", "status", status="running")
+    clock.now = 1010.0
+    first.record("gs", "crash", exit_code=139, phase="running", uptime=10.0)
+    first.record("gs", "status", status="error")
+    clock.now = 1020.0
+    first.record("dispatch", "crash", exit_code=1, phase="startup", uptime=0.5)
+    first.close()
+
+    second = LifecycleJournal(path, flush_interval=0.05)
+    clock.now = 1120.0
+    second.record("gs", "crash", exit_code=-9, phase="running", uptime=3.0)
+    second.close()
+
+    crashes = crash_history(path)
+    assert [(c["ts"], c["service"], c["exit_code"]) for c in crashes] == [
+        (1120.0, "gs", -9), (1020.0, "dispatch", 1), (1010.0, "gs", 139)]
+    # 记录时附带的字段合并到结果中
+    assert crashes[0]["phase"] == "running" and crashes[0]["uptime"] == 3.0
+
+    assert [c["ts"] for c in crash_history(path, service="gs")] == [1120.0, 1010.0]
+    assert [c["service"] for c in crash_history(path, since=1015.0, until=1100.0)] == ["dispatch"]
+    assert len(crash_history(path, limit=1)) == 1
+    assert service_report(path, service="gs")[0]["crashes"] == 2
+
+def test_missing_journal_has_no_history(tmp_path):
+    assert crash_history(str(tmp_path / "journal.db")) == []
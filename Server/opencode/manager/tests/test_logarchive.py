@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""日志归档：按服务、cmd_id、级别、时间与正则查询"""
+
+import time
+
+import pytest
+
+from logarchive import LogArchive, query_archive
+
+LINES = [
+    ("cyrene-sr-gameserver", "stdout", "INFO cmd_id 101 PlayerGetTokenCsReq"),
+    ("cyrene-sr-gameserver", "stderr", "ERROR cmd_id 102 GetAvatarDataCsReq failed"),
+    ("cyrene-sr-dispatch", "stdout", "WARNING query_gateway took 900ms"),
+    ("hoyo-sdk", "stdout", "INFO listening on 0.0.0.0:20100"),
+    ("cyrene-sr-gameserver", "stdout", "INFO cmd_id 101 PlayerGetTokenCsReq"),
+]
+
+@pytest.fixture
+def archive_root(tmp_path):
+    archive = LogArchive(str(tmp_path), segment_lines=3, segment_seconds=3600, block_lines=2, workers=1)
+    try:
+        for line in LINES:
+            archive.append(*line)
+        archive.flush()
+    finally:
+        archive.close()
+    return str(tmp_path)
+
+def _lines(root, **filters):
+    return [(service, line) for _, service, _, line in query_archive(root, **filters)]
+
+def test_query_by_service_returns_lines_in_order(archive_root):
+    assert [line for _, line in _lines(archive_root, service="cyrene-sr-gameserver")] == [
+        LINES[0][2], LINES[1][2], LINES[4][2]]
+
+def test_query_by_cmd_id_and_level(archive_root):
+    assert _lines(archive_root, cmd_id=101) == [(LINES[0][0], LINES[0][2]), (LINES[4][0], LINES[4][2])]
+    assert _lines(archive_root, level="error") == [(LINES[1][0], LINES[1][2])]
+    # WARNING 与 WARN 视为同一级别
+    assert _lines(archive_root, level="warn") == [(LINES[2][0], LINES[2][2])]
+    assert _lines(archive_root, service="hoyo-sdk", level="error") == []
+
+def test_query_by_pattern_time_and_limit(archive_root):
+    assert _lines(archive_root, pattern=r"\d+ms") == [(LINES[2][0], LINES[2][2])]
+    assert len(_lines(archive_root, limit=2)) == 2
+    assert len(_lines(archive_root, since=time.time() - 60)) == len(LINES)
+    assert _lines(archive_root, until=time.time() - 60) == []
+
+def test_prune_removes_old_segments(tmp_path):
+    archive = LogArchive(str(tmp_path), segment_lines=2, segment_seconds=3600, workers=1)
+    try:
+        for line in LINES[:4]:
+            archive.append(*line)
+        archive.flush()
+        assert archive.prune(time.time() + 1) == 2
+    finally:
+        archive.close()
+    assert _lines(str(tmp_path)) == []
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""日志指标：默认指标配置对照 cyrene-sr 汇编源码中的日志格式串"""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from logmetrics import LogMetrics
+
+SRC = Path(__file__).resolve().parents[2] / "cyrene-sr" / "src"
+GAMESERVER = "cyrene-sr-gameserver"
+DISPATCH = "cyrene-sr-dispatch"
+
+def _messages(name: str):
+    """汇编中的日志格式串：{标签名: 格式}，% 为数值占位符"""
+    path = SRC / f"{name}.asm"
+    if not path.exists():
+        pytest.skip(f"缺少 {path}")
+    return dict(re.findall(r'^\s*(\w+)_msg db "([^"]*)", 10$', path.read_text(encoding="utf-8"), re.M))
+
+def _render(template: str, *values) -> str:
+    return template.replace("%", "{}").format(*values)
+
+@pytest.fixture
+def extractor():
+    manager = pytest.importorskip("manager")
+    return LogMetrics(manager.HARDCODED_CONFIG["log_metrics_config"]["metrics"])
+
+def test_gameserver_and_dispatch_lines(extractor):
+    gs = _messages("gameserver")
+    dispatch = _messages("dispatch")
+    peer = (127, 0, 0, 1, 40000)
+    lines = [
+        (GAMESERVER, _render(gs["startup"], 23301)),
+        (GAMESERVER, _render(gs["new_connection_trace"], *peer)),
+        (GAMESERVER, _render(gs["recv_cmd_id_trace"], 101)),
+        (GAMESERVER, _render(gs["recv_cmd_id_trace"], 101)),
+        (GAMESERVER, _render(gs["recv_cmd_id_trace"], 102)),
+        (GAMESERVER, _render(gs["received_too_few"], 16, 4)),
+        (GAMESERVER, _render(gs["head_magic_mismatch"], 2641676052, 0)),
+        (GAMESERVER, _render(gs["accept_error"], -24)),
+        (GAMESERVER, _render(gs["disconnect_trace"], *peer)),
+        (DISPATCH, _render(dispatch["new_connection_trace"], *peer)),
+        (DISPATCH, _render(dispatch["read_trace"], 300)),
+        (DISPATCH, _render(dispatch["read_trace"], 3000)),
+        (DISPATCH, _render(dispatch["write_error"], -32)),
+    ]
+    for service_name, line in lines:
+        extractor(service_name, "stdout", line)
+
+    snapshot = extractor.snapshot()
+    assert snapshot["lines"] == len(lines) and snapshot["matched"] == len(lines) - 1
+    assert snapshot["counters"] == {
+        ("connections", GAMESERVER): {"": 1},
+        ("packets", GAMESERVER): {"101": 2, "102": 1},
+        ("short_reads", GAMESERVER): {"": 1},
+        ("head_magic_mismatch", GAMESERVER): {"": 1},
+        ("socket_errors", GAMESERVER): {"accept": 1},
+        ("disconnects", GAMESERVER): {"": 1},
+        ("connections", DISPATCH): {"": 1},
+        ("dispatch_request_bytes", DISPATCH): {"": 2},
+        ("socket_errors", DISPATCH): {"write": 1},
+    }
+    histogram = snapshot["histograms"][("dispatch_request_bytes", DISPATCH)]
+    assert histogram.count == 2 and histogram.sum == 3300
+    assert histogram.quantile(0.5) == 512 and histogram.quantile(0.99) == 4096
+    assert extractor.values()["packets"] == {GAMESERVER: 3.0}
+
+@pytest.mark.parametrize("name, service_name", [("gameserver", GAMESERVER), ("dispatch", DISPATCH)])
+def test_every_runtime_message_is_counted(extractor, name, service_name):
+    """除启动、致命错误与心跳外，每条运行期日志都应计入某个指标，格式串改动时能及时发现"""
+    for label, template in _messages(name).items():
+        # 心跳包已按 cmd_id 计入 packets，其内容行不单独统计
+        if label in ("startup", "fatal_error", "heartbeat_trace"):
+            continue
+        extractor(service_name, "stdout", _render(template, *range(1, template.count("%") + 1)))
+    snapshot = extractor.snapshot()
+    assert snapshot["matched"] == snapshot["lines"] > 0
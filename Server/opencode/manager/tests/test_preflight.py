@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""启动前检查：按文件 mtime 与大小缓存的结果在文件变化后失效"""
+
+import hashlib
+import os
+
+import pytest
+
+from preflight import FAIL, OK, PreflightEngine
+
+@pytest.fixture
+def engine():
+    engine = PreflightEngine(workers=2)
+    yield engine
+    engine.close()
+
+def test_binary_hash_is_cached_until_the_file_changes(engine, tmp_path):
+    binary = tmp_path / "gameserver"
+    binary.write_bytes(b"v1")
+    first = engine.check_binary(str(binary))
+    assert first["level"] == OK and not first["cached"]
+    assert engine.check_binary(str(binary))["cached"]
+
+    # 大小改变
+    binary.write_bytes(b"v2-longer")
+    changed = engine.check_binary(str(binary))
+    assert not changed["cached"]
+    assert changed["sha256"] == hashlib.sha256(b"v2-longer").hexdigest()
+
+    # 大小不变但 mtime 改变
+    stat = binary.stat()
+    binary.write_bytes(b"v3-longer")
+    os.utime(binary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    touched = engine.check_binary(str(binary))
+    assert not touched["cached"]
+    assert touched["sha256"] == hashlib.sha256(b"v3-longer").hexdigest()
+
+def test_expected_hash_mismatch_is_reported_from_cache(engine, tmp_path):
+    binary = tmp_path / "dispatch"
+    binary.write_bytes(b"dispatch")
+    expected = hashlib.sha256(b"dispatch").hexdigest()
+    assert engine.check_binary(str(binary), sha256=expected)["level"] == OK
+    mismatch = engine.check_binary(str(binary), sha256="0" * 64)
+    assert mismatch["cached"] and mismatch["level"] == FAIL
+
+def test_config_is_reparsed_after_edit(engine, tmp_path):
+    config = tmp_path / "sdk_server.toml"
+    config.write_text('http_addr = "0.0.0.0:20100"\n', encoding="utf-8")
+    assert engine.check_config(str(config), required=["http_addr", "db_file"])["level"] == FAIL
+    assert engine.check_config(str(config), required=["http_addr", "db_file"])["cached"]
+
+    config.write_text('http_addr = "0.0.0.0:20100"\ndb_file = "sdk.db"\n', encoding="utf-8")
+    result = engine.check_config(str(config), required=["http_addr", "db_file"])
+    assert result["level"] == OK and not result["cached"]
+    assert result["values"]["db_file"] == "sdk.db"
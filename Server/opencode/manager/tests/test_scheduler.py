@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""调度器：系统时间回拨时周期任务不停摆"""
+
+import threading
+import time
+import types
+
+import scheduler as scheduler_module
+from scheduler import Scheduler
+
+def test_interval_tasks_survive_wall_clock_step_back(monkeypatch):
+    offset = [0.0]
+    fake_time = types.SimpleNamespace(monotonic=time.monotonic, time=lambda: time.time() + offset[0])
+    monkeypatch.setattr(scheduler_module, "time", fake_time)
+
+    runs = []
+    fired = threading.Event()
+    scheduler = Scheduler(resolution=0.01)
+
+    def tick():
+        runs.append(time.monotonic())
+        if len(runs) >= 3:
+            fired.set()
+
+    scheduler.every("tick", 0.1, tick)
+    scheduler.start()
+    try:
+        time.sleep(0.15)
+        offset[0] = -3600.0
+        assert fired.wait(2), f"回拨后周期任务停止执行（已执行 {len(runs)} 次）"
+    finally:
+        scheduler.stop()
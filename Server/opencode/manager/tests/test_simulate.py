@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""规模测试的CI判定"""
+
+import pytest
+
+from simulate import run_scale_benchmark, scale_regressions
+
+def _result(**overrides):
+    result = {"services": 3, "failed_to_start": [], "crashes_expected": 1, "crashes_detected": 1}
+    result.update(overrides)
+    return result
+
+def test_clean_results_pass():
+    assert scale_regressions([_result(), _result(services=50, crashes_expected=5, crashes_detected=5)]) == []
+
+def test_start_failures_and_missed_crashes_fail():
+    problems = scale_regressions([_result(failed_to_start=["sim-000"]), _result(crashes_detected=0)])
+    assert problems == ["3 个服务: 1 个启动失败", "3 个服务: 仅检测到 0/1 次崩溃"]
+
+def test_duration_shorter_than_crash_is_rejected():
+    with pytest.raises(ValueError):
+        run_scale_benchmark(lambda services: None, "running", "error", counts=(3,),
+                            duration=3.0, crash_every=1, crash_after=5.0)
+
+def test_scale_case_detects_every_crash():
+    manager = pytest.importorskip("manager")
+    results = run_scale_benchmark(manager.build_simulation_manager, manager.ServiceStatus.RUNNING,
+                                  manager.ServiceStatus.ERROR, counts=(4,), duration=2.5,
+                                  log_rate=20.0, crash_every=2, crash_after=1.0)
+    assert scale_regressions(results) == []
+    assert results[0]["crashes_expected"] == 2
+    assert results[0]["crashes_detected"] == 2
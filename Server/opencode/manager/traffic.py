@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SR私服 cmd_id 流量分析
+从 cyrene-sr/src 下的 gameserver.pb.asm、dummy_handlers.asm 与 gameserver.asm 解析出
+cmd_id 到消息名的对照表，并区分已实现、占位（dummy）与未处理的请求；
+抓包代理把经过的每个封包记为定长记录，用 NumPy 按消息分组统计次数、字节量、
+到达间隔与请求-响应延迟的分布
+
+License: GNU V3 LICENSE
+"""
+
+import asyncio
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+import numpy as np
+
+from frontend import start_server_thread
+from protocol import PacketReader
+
+# 抓包文件：8字节魔数后紧跟定长记录
+CAPTURE_MAGIC = b"SRTRAF01"
+RECORD_DTYPE = np.dtype([("ts", "<f8"), ("conn", "<u4"), ("dir", "u1"), ("cmd", "<u2"), ("size", "<u4")])
+
+# 方向：客户端到服务端 / 服务端到客户端
+DIR_UP = 0
+DIR_DOWN = 1
+
+_CMD_EQU = re.compile(r"^Cmd(\w+)\s+equ\s+(\d+)", re.M)
+_DUMMY_LIST = re.compile(r"^\s*gen_dummy_cmps\s+(.+)$", re.M)
+_HANDLED_CMP = re.compile(r"^\s*cmp\s+rax,\s*Cmd(\w+)CsReq\b", re.M)
+
+def default_proto_dir() -> Path:
+    """源码树中的 cyrene-sr/src 目录"""
+    return Path(__file__).resolve().parent.parent / "cyrene-sr" / "src"
+
+class CmdTable:
+    """cmd_id 对照表"""
+
+    def __init__(self):
+        self.names: Dict[int, str] = {}
+        self.handled: Set[int] = set()
+        self.dummy: Set[int] = set()
+        self.response_of: Dict[int, int] = {}
+
+    def name(self, cmd_id: int) -> str:
+        return self.names.get(cmd_id, f"Cmd{cmd_id}")
+
+    def kind(self, cmd_id: int) -> str:
+        """请求的处理方式：实现 / 占位（返回空响应）/ 未处理（服务端不回复）"""
+        if cmd_id in self.handled:
+            return "实现"
+        if cmd_id in self.dummy:
+            return "占位"
+        return "未处理"
+
+def load_cmd_table(proto_dir: Optional[Path] = None) -> CmdTable:
+    """
+    解析汇编源码生成对照表
+    源码不存在时（如打包后的发布版）返回空表，分析结果只显示数字 cmd_id
+    """
+    proto_dir = Path(proto_dir) if proto_dir else default_proto_dir()
+    table = CmdTable()
+
+    def read(name: str) -> str:
+        try:
+            return (proto_dir / name).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return ""
+
+    by_name: Dict[str, int] = {}
+    for name, value in _CMD_EQU.findall(read("gameserver.pb.asm")):
+        by_name.setdefault(name, int(value))
+        table.names.setdefault(int(value), name)
+    for name, cmd_id in by_name.items():
+        if name.endswith("CsReq") and name[:-5] + "ScRsp" in by_name:
+            table.response_of[cmd_id] = by_name[name[:-5] + "ScRsp"]
+
+    for names in _DUMMY_LIST.findall(read("dummy_handlers.asm")):
+        for name in names.split(","):
+            cmd_id = by_name.get(name.strip() + "CsReq")
+            if cmd_id is not None:
+                table.dummy.add(cmd_id)
+    for name in _HANDLED_CMP.findall(read("gameserver.asm")):
+        if name + "CsReq" in by_name:
+            table.handled.add(by_name[name + "CsReq"])
+    return table
+
+# ---- 抓包文件 ----
+
+def write_capture(path: Path, records: "np.ndarray") -> None:
+    """追加记录，新文件先写入魔数"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as f:
+        if f.tell() == 0:
+            f.write(CAPTURE_MAGIC)
+        records.astype(RECORD_DTYPE, copy=False).tofile(f)
+
+def read_capture(path: Path) -> "np.ndarray":
+    """读取抓包文件，末尾不完整的记录（写入中断）被忽略"""
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"不是流量抓包文件: {path}")
+        data = f.read()
+    usable = len(data) - len(data) % RECORD_DTYPE.itemsize
+    return np.frombuffer(data[:usable], dtype=RECORD_DTYPE)
+
+# ---- 分组统计 ----
+
+def group_quantiles(groups: "np.ndarray", values: "np.ndarray", qs: Tuple[float, ...]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    按组计算分位数（线性插值），一次排序完成，不逐组循环
+    返回 (组键, 形状为 [len(qs), 组数] 的分位数)
+    """
+    if len(groups) == 0:
+        return np.empty(0, dtype=groups.dtype), np.empty((len(qs), 0))
+    order = np.lexsort((values, groups))
+    sorted_groups = groups[order]
+    sorted_values = values[order]
+    keys, start, counts = np.unique(sorted_groups, return_index=True, return_counts=True)
+    last = start + counts - 1
+    out = np.empty((len(qs), len(keys)))
+    for row, q in enumerate(qs):
+        pos = start + q * (counts - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        out[row] = sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+    return keys, out
+
+def _rank_within(keys: "np.ndarray", ts: "np.ndarray") -> "np.ndarray":
+    """每条记录在同键记录中按时间的序号"""
+    order = np.lexsort((ts, keys))
+    sorted_keys = keys[order]
+    boundary = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    starts = np.flatnonzero(boundary)
+    ranks_sorted = np.arange(len(keys)) - np.repeat(starts, np.diff(np.r_[starts, len(keys)]))
+    ranks = np.empty(len(keys), dtype=np.int64)
+    ranks[order] = ranks_sorted
+    return ranks
+
+def pair_responses(records: "np.ndarray", table: CmdTable) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    将请求与响应配对，返回 (请求 cmd_id, 延迟秒)
+    gameserver 在每个连接上按顺序处理封包，因此同一连接上第 k 个某类请求对应第 k 个相应的响应
+    """
+    if not table.response_of or len(records) == 0:
+        return np.empty(0, dtype=np.uint16), np.empty(0)
+    req_ids = np.fromiter(table.response_of.keys(), dtype=np.int64)
+    rsp_ids = np.fromiter(table.response_of.values(), dtype=np.int64)
+    cmd = records["cmd"].astype(np.int64)
+    conn = records["conn"].astype(np.int64)
+
+    requests = (records["dir"] == DIR_UP) & np.isin(cmd, req_ids)
+    responses = (records["dir"] == DIR_DOWN) & np.isin(cmd, rsp_ids)
+    # 请求按期望的响应 cmd_id 归类，与响应共用 (连接, 响应 cmd_id) 键
+    order = np.argsort(req_ids)
+    expected = rsp_ids[order][np.searchsorted(req_ids[order], cmd[requests])]
+    req_keys = (conn[requests] << 16) | expected
+    rsp_keys = (conn[responses] << 16) | cmd[responses]
+    _, dense = np.unique(np.concatenate([req_keys, rsp_keys]), return_inverse=True)
+    dense = dense.reshape(-1).astype(np.int64)
+    req_dense, rsp_dense = dense[:len(req_keys)], dense[len(req_keys):]
+
+    req_ts = records["ts"][requests]
+    rsp_ts = records["ts"][responses]
+    req_pair = (req_dense << 32) | _rank_within(req_dense, req_ts)
+    rsp_pair = (rsp_dense << 32) | _rank_within(rsp_dense, rsp_ts)
+    _, req_index, rsp_index = np.intersect1d(req_pair, rsp_pair, assume_unique=True, return_indices=True)
+    latency = rsp_ts[rsp_index] - req_ts[req_index]
+    valid = latency >= 0
+    return records["cmd"][requests][req_index][valid], latency[valid]
+
+def analyze_traffic(records: "np.ndarray", table: CmdTable) -> Dict[str, Any]:
+    """按 (方向, cmd_id) 汇总次数、字节量、到达间隔分位数与请求延迟分位数"""
+    if len(records) == 0:
+        return {"records": 0, "duration": 0.0, "connections": 0, "rows": []}
+    ts = records["ts"]
+    keys = (records["dir"].astype(np.int64) << 16) | records["cmd"]
+    uniq, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    volume = np.bincount(inverse, weights=records["size"], minlength=len(uniq))
+
+    # 到达间隔：同一消息相邻两次的时间差（跨连接合并）
+    order = np.lexsort((ts, keys))
+    sorted_keys, sorted_ts = keys[order], ts[order]
+    same = sorted_keys[1:] == sorted_keys[:-1]
+    gap_keys, gap_q = group_quantiles(sorted_keys[1:][same], np.diff(sorted_ts)[same], (0.5, 0.99))
+    gap_index = np.searchsorted(uniq, gap_keys)
+
+    req_cmd, latency = pair_responses(records, table)
+    lat_keys, lat_q = group_quantiles((DIR_UP << 16) | req_cmd.astype(np.int64), latency, (0.5, 0.99, 1.0))
+    lat_index = np.searchsorted(uniq, lat_keys)
+
+    gap = np.full((2, len(uniq)), np.nan)
+    gap[:, gap_index] = gap_q
+    lat = np.full((3, len(uniq)), np.nan)
+    lat[:, lat_index] = lat_q
+
+    duration = float(ts.max() - ts.min())
+    rows = []
+    for i, key in enumerate(uniq.tolist()):
+        cmd_id = key & 0xFFFF
+        direction = key >> 16
+        rows.append({
+            "dir": direction,
+            "cmd_id": cmd_id,
+            "name": table.name(cmd_id),
+            "kind": table.kind(cmd_id) if direction == DIR_UP else "",
+            "count": int(counts[i]),
+            "bytes": int(volume[i]),
+            "gap_p50": gap[0, i], "gap_p99": gap[1, i],
+            "latency_p50": lat[0, i], "latency_p99": lat[1, i], "latency_max": lat[2, i],
+        })
+    rows.sort(key=lambda row: -row["count"])
+    return {
+        "records": int(len(records)),
+        "duration": duration,
+        "connections": int(len(np.unique(records["conn"]))),
+        "paired": int(len(latency)),
+        "rows": rows,
+    }
+
+def _ms(value: float) -> str:
+    return "-" if np.isnan(value) else f"{value * 1000:.1f}"
+
+def print_traffic_report(result: Dict[str, Any], top: int = 20) -> None:
+    """打印按消息汇总的流量报告"""
+    rows = result["rows"]
+    if not rows:
+        print("[traffic] 没有流量记录")
+        return
+    duration = max(result["duration"], 1e-9)
+    print(f"[traffic] {result['records']} 个封包，{result['connections']} 个连接，"
+          f"时长 {result['duration']:.1f}s，配对响应 {result['paired']} 个")
+    for direction, title in ((DIR_UP, "客户端 -> 服务端"), (DIR_DOWN, "服务端 -> 客户端")):
+        selected = [row for row in rows if row["dir"] == direction]
+        if not selected:
+            continue
+        total = sum(row["count"] for row in selected)
+        print(f"\n{title}（共 {total} 个）")
+        header = f"{'消息':<42}{'cmd_id':>7}{'次数':>9}{'占比':>7}{'每秒':>8}{'字节':>11}{'间隔p50/p99ms':>16}"
+        if direction == DIR_UP:
+            header += f"{'处理':>6}{'延迟p50/p99/max ms':>22}"
+        print(header)
+        for row in selected[:top]:
+            line = (f"{row['name']:<42}{row['cmd_id']:>7}{row['count']:>9}{row['count'] / total * 100:>6.1f}%"
+                    f"{row['count'] / duration:>8.1f}{row['bytes']:>11}"
+                    f"{_ms(row['gap_p50']) + '/' + _ms(row['gap_p99']):>16}")
+            if direction == DIR_UP:
+                line += (f"{row['kind']:>6}"
+                         f"{'/'.join(_ms(row[k]) for k in ('latency_p50', 'latency_p99', 'latency_max')):>22}")
+            print(line)
+
+    requests = [row for row in rows if row["dir"] == DIR_UP]
+    total = sum(row["count"] for row in requests) or 1
+    for kind, note in (("占位", "占位处理器（返回空响应）"), ("未处理", "未处理的请求（服务端不回复）")):
+        hit = [row for row in requests if row["kind"] == kind]
+        if hit:
+            share = sum(row["count"] for row in hit) / total * 100
+            names = ", ".join(f"{row['name']}({row['count']})" for row in hit[:5])
+            print(f"\n{note}: {len(hit)} 种，占请求 {share:.1f}%；最多: {names}")
+
+# ---- 抓包代理 ----
+
+class TrafficTap:
+    """
+    gameserver 抓包代理
+    原样转发字节流，同时按封包切分并记录 (时间, 连接, 方向, cmd_id, 长度)；
+    记录定期追加到抓包文件，并保留最近一段时间的数据供实时分析
+    """
+
+    def __init__(self, listen: Tuple[str, int], upstream: Tuple[str, int],
+                 capture: Optional[Path] = None, window: float = 300.0, flush_interval: float = 1.0):
+        self.listen = listen
+        self.upstream = upstream
+        self.capture = Path(capture) if capture else None
+        self.window = window
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[float, int, int, int, int]] = []
+        self._recent: List["np.ndarray"] = []
+        self._lock = threading.Lock()
+        self._next_conn = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.counters: Dict[str, int] = {"connections": 0, "packets": 0, "bad_frames": 0, "upstream_errors": 0}
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            up_reader, up_writer = await asyncio.open_connection(*self.upstream)
+        except OSError:
+            self.counters["upstream_errors"] += 1
+            writer.close()
+            return
+        self._next_conn += 1
+        conn = self._next_conn
+        self.counters["connections"] += 1
+
+        async def pump(src: asyncio.StreamReader, dst: asyncio.StreamWriter, direction: int):
+            frames: Optional[PacketReader] = PacketReader()
+            try:
+                while True:
+                    data = await src.read(65536)
+                    if not data:
+                        break
+                    dst.write(data)
+                    if frames is not None:
+                        try:
+                            packets = frames.feed(data)
+                        except ValueError:
+                            # 封包魔数错误后无法再定位边界，该方向只转发不记录
+                            self.counters["bad_frames"] += 1
+                            frames = None
+                            packets = []
+                        if packets:
+                            now = time.time()
+                            with self._lock:
+                                self._pending.extend((now, conn, direction, cmd_id, len(packet))
+                                                     for cmd_id, packet in packets)
+                            self.counters["packets"] += len(packets)
+                    await dst.drain()
+            except (ConnectionError, OSError):
+                pass
+            try:
+                dst.close()
+            except Exception:
+                pass
+
+        await asyncio.gather(pump(reader, up_writer, DIR_UP), pump(up_reader, writer, DIR_DOWN))
+
+    def flush(self) -> int:
+        """把缓冲的记录写入抓包文件与近期窗口，返回写入条数"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            chunk = np.array(pending, dtype=RECORD_DTYPE)
+            self._recent.append(chunk)
+            horizon = chunk["ts"][-1] - self.window
+            while self._recent and self._recent[0]["ts"][-1] < horizon:
+                self._recent.pop(0)
+        if self.capture:
+            write_capture(self.capture, chunk)
+        return len(chunk)
+
+    def recent(self) -> "np.ndarray":
+        """最近 window 秒内的记录"""
+        self.flush()
+        with self._lock:
+            if not self._recent:
+                return np.empty(0, dtype=RECORD_DTYPE)
+            records = np.concatenate(self._recent)
+        return records[records["ts"] >= records["ts"][-1] - self.window]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        host, port = self.listen
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        self._loop.create_task(self._flush_loop())
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> threading.Thread:
+        """在后台线程的独立事件循环中运行，监听失败时抛出异常"""
+        return start_server_thread(self, "traffic-tap")